@@ -0,0 +1,53 @@
+"""
+Compares serial and thread-pool parsing against a local fake Claude server.
+
+    python benchmarks/bench_concurrency.py --entries 200 --latency 0.05 --workers 1 8 32
+    python benchmarks/bench_concurrency.py --max-batch-tokens 4000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from log_parser_sdk.log_parser import LogParsingSDK
+from fake_claude_server import FakeClaudeServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the fake server waits per request.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests-per-minute", type=float, default=None)
+    parser.add_argument("--max-batch-tokens", type=int, default=0, help="0 sends one request per entry.")
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp()
+    log_path = os.path.join(log_dir, "bench.log")
+    with open(log_path, "w") as f:
+        for i in range(args.entries):
+            f.write(f"host{i} sshd: session opened for user u{i}\n")
+
+    try:
+        with FakeClaudeServer(latency=args.latency) as server:
+            for workers in args.workers:
+                sdk = LogParsingSDK("benchmark-key", parse_cache_size=0, max_workers=workers,
+                                    requests_per_minute=args.requests_per_minute,
+                                    max_batch_tokens=args.max_batch_tokens)
+                sdk.claude_client.base_url = server.url
+                start = time.perf_counter()
+                results = sdk.parse_logs_from_directory(log_dir)
+                elapsed = time.perf_counter() - start
+                errors = sum(1 for r in results if "parsing_error" in r)
+                print(f"workers={workers:3d}  entries={len(results)}  errors={errors}  "
+                      f"{elapsed:7.2f}s  {len(results) / elapsed:8.1f} lines/s")
+    finally:
+        os.remove(log_path)
+        os.rmdir(log_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compares reading compressed logs through log_parser_sdk.compression with
+piping them through `zcat` (or `zstd -dc`), the usual way to feed rotated
+logs to a tool that only reads plain text.
+
+The corpus is generated from raw_logs/ and written as a single-member gzip
+file (plain `gzip`), a multi-member gzip file (one member per --member-bytes
+of text, as bgzip or concatenated rotations produce) and, when zstandard is
+installed, a multi-frame zstd file. Every reader splits the output into
+lines, so each row measures what a log reader pays before segmenting
+entries. Parallel rows only help on a machine with more than one core.
+
+    python benchmarks/bench_decompress.py --lines 1000000 --workers 4
+"""
+import argparse
+import gzip
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from corpus import generate_lines
+from log_parser_sdk.compression import open_decompressed
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def count_lines(stream) -> int:
+    return sum(1 for _ in stream)
+
+
+def piped(command: list[str], path: str) -> int:
+    with subprocess.Popen(command + [path], stdout=subprocess.PIPE, bufsize=256 * 1024) as process:
+        return count_lines(process.stdout)
+
+
+def sdk(path: str, workers: int, chunk_size: int) -> int:
+    with open_decompressed(path, workers, chunk_size) as stream:
+        return count_lines(stream)
+
+
+def timed(label: str, run, text_bytes: int, baseline: float = None) -> float:
+    started = time.perf_counter()
+    lines = run()
+    elapsed = time.perf_counter() - started
+    speedup = f"  {baseline / elapsed:5.2f}x" if baseline else ""
+    print(f"{label:40s} {lines:9d} lines {text_bytes / elapsed / 1e6:8.1f} MB/s{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--member-bytes", type=int, default=1024 * 1024)
+    parser.add_argument("--chunk-size", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+
+    text = "".join(line + "\n" for line in generate_lines(args.lines, args.seed)).encode()
+    members = [text[i:i + args.member_bytes] for i in range(0, len(text), args.member_bytes)]
+    print(f"{len(text) / 1e6:.1f} MB of text, {args.workers} workers, {os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as directory:
+        files = {"gzip, single member": gzip.compress(text, 6),
+                 "gzip, multi-member": b"".join(gzip.compress(member, 6) for member in members)}
+        if zstandard is not None:
+            compressor = zstandard.ZstdCompressor(level=3)
+            files["zstd, multi-frame"] = b"".join(compressor.compress(member) for member in members)
+        for label, data in files.items():
+            path = os.path.join(directory, label.replace(" ", "").replace(",", "_"))
+            with open(path, "wb") as f:
+                f.write(data)
+            print(f"\n{label}: {len(data) / 1e6:.1f} MB")
+            command = ["zstd", "-dcq"] if label.startswith("zstd") else ["zcat"]
+            baseline = None
+            if shutil.which(command[0]):
+                baseline = timed(f"{' '.join(command)} | readline", lambda: piped(command, path), len(text))
+            timed("open_decompressed, 1 worker", lambda: sdk(path, 1, args.chunk_size), len(text), baseline)
+            if args.workers > 1:
+                timed(f"open_decompressed, {args.workers} workers",
+                      lambda: sdk(path, args.workers, args.chunk_size), len(text), baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Measures the local dispatch stage on a mixed corpus of JSON cloud audit
+records, RFC 3164 syslog and PAN-OS TRAFFIC lines. It compares the earlier
+decode-to-test-then-decode-again approach with the single-decode dispatch,
+with and without orjson.
+
+    python benchmarks/bench_dispatch.py --entries 100000 --json-share 0.6
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from log_parser_sdk import json_extract
+from log_parser_sdk.log_parser import LogParsingSDK
+
+PANOS = ("Jun 11 00:02:59 PA-{host} 1,2021/10/13 12:54:53,011901019052,TRAFFIC,end,2049,2021/10/13 12:54:53,"
+         "10.80.22.{octet},8.8.8.8,0.0.0.0,0.0.0.0,Trust to Untrust,,,dns,vsys1,Trust,Untrust,ae2,ae1,Syslog To SOC VM,"
+         "2021/10/13 12:54:53,3973,1,61879,53,0,0,0x19,udp,allow,1198,103,1095,2,2021/10/13 12:54:22,0,any,0,812631294,"
+         "0x0,10.0.0.0-10.255.255.255,United States,0,1,1,aged-out,0,0,0,0,,PA-{host},from-policy,,,0,,0,,N/A,0,0,0,0")
+
+
+def make_corpus(count: int, json_share: float, seed: int = 3) -> list[str]:
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        if rng.random() < json_share:
+            entries.append(json.dumps({
+                "eventVersion": "1.08", "eventTime": f"2024-05-01T12:{i // 60 % 60:02d}:{i % 60:02d}Z",
+                "eventSource": rng.choice(["s3.amazonaws.com", "iam.amazonaws.com", "ec2.amazonaws.com"]),
+                "eventName": rng.choice(["GetObject", "PutObject", "AssumeRole", "DescribeInstances"]),
+                "awsRegion": "us-east-1", "sourceIPAddress": f"203.0.113.{rng.randrange(256)}",
+                "userIdentity": {"type": "AssumedRole", "arn": f"arn:aws:sts::123456789012:assumed-role/r{i % 20}"},
+                "requestParameters": {"bucketName": f"bucket-{i % 7}", "key": f"logs/{i}.gz"},
+                "readOnly": True,
+            }))
+        elif rng.random() < 0.6:
+            entries.append(f"Jun 11 00:39:{i % 60:02d} web{i % 9} sshd[{i}]: Accepted publickey for u{i % 40} "
+                           f"from 10.14.2.{rng.randrange(256)} port {rng.randrange(1024, 65536)} ssh2")
+        else:
+            entries.append(PANOS.format(host=i % 4, octet=rng.randrange(256)))
+    return entries
+
+
+def decode_twice(sdk: LogParsingSDK, entry: str):
+    # The approach before the dispatch stage: decode to test, then decode again.
+    try:
+        json.loads(entry)
+        is_json = True
+    except ValueError:
+        is_json = False
+    if is_json:
+        return json.loads(entry)
+    return sdk._parse_locally(entry)
+
+
+def timed(label: str, corpus: list[str], parse) -> float:
+    start = time.perf_counter()
+    for entry in corpus:
+        parse(entry)
+    elapsed = time.perf_counter() - start
+    print(f"{label:36s} {elapsed:7.3f}s  {len(corpus) / elapsed:10.0f} entries/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--json-share", type=float, default=0.6)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.entries, args.json_share)
+    sdk = LogParsingSDK("benchmark", parse_cache_size=0)
+    print(f"{len(corpus)} entries, {args.json_share:.0%} JSON, orjson {'installed' if json_extract.orjson else 'missing'}")
+    baseline = timed("decode to test, then decode again", corpus, lambda entry: decode_twice(sdk, entry))
+    with patch.object(json_extract, "orjson", None):
+        single = timed("single-decode dispatch (json)", corpus, sdk._parse_locally)
+    print(f"{'':36s} {baseline / single:6.2f}x")
+    if json_extract.orjson is not None:
+        fast = timed("single-decode dispatch (orjson)", corpus, sdk._parse_locally)
+        print(f"{'':36s} {baseline / fast:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
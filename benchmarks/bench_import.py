@@ -0,0 +1,91 @@
+"""
+Measures the cold-start cost of the SDK: the wall time of a fresh interpreter
+importing it, the modules loaded by the import and the slowest ones reported
+by `python -X importtime`. Exits with status 1 if the median import time
+exceeds the budget, so it can run as a CI gate.
+
+    python benchmarks/bench_import.py --runs 10 --budget-ms 100
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+STATEMENTS = (
+    "import log_parser_sdk",
+    "from log_parser_sdk import LogParsingSDK",
+    "from log_parser_sdk import LogParsingSDK; LogParsingSDK('key').parse_log_entry('{\"a\": 1}')",
+)
+# Optional or network dependencies that must only load on first use.
+HEAVY_MODULES = ("scapy", "requests", "urllib3", "tenacity", "pyarrow", "asyncio", "http.server")
+
+_PROBE = """
+import sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(elapsed)
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def run_probe(statement: str) -> tuple[float, list[str]]:
+    output = subprocess.run([sys.executable, "-c", _PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+                            cwd=ROOT, capture_output=True, text=True, check=True).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(",") if name]
+
+
+def _importtime(statement: str) -> dict[str, int]:
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stderr
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only top-level entries; nested imports are included in their cumulative time.
+        if not name.startswith("  "):
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def slowest_modules(statement: str, top: int) -> list[tuple[int, str]]:
+    startup = _importtime("pass")
+    modules = [(cumulative, name) for name, cumulative in _importtime(statement).items() if name not in startup]
+    return sorted(modules, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="Maximum median time for 'from log_parser_sdk import LogParsingSDK'.")
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    medians = {}
+    for statement in STATEMENTS:
+        timings = []
+        for _ in range(args.runs):
+            elapsed, loaded = run_probe(statement)
+            timings.append(elapsed)
+        medians[statement] = statistics.median(timings) * 1000
+        print(f"{medians[statement]:8.1f} ms  {statement}")
+        print(f"{'':13s}heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+    print(f"\nslowest top-level imports (cumulative) for '{STATEMENTS[1]}':")
+    for microseconds, name in slowest_modules(STATEMENTS[1], args.top):
+        print(f"{microseconds / 1000:8.1f} ms  {name}")
+
+    median = medians[STATEMENTS[1]]
+    if median > args.budget_ms:
+        print(f"\nFAIL: import took {median:.1f} ms, budget is {args.budget_ms:.1f} ms")
+        sys.exit(1)
+    print(f"\nOK: import took {median:.1f} ms, budget is {args.budget_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
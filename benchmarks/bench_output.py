@@ -0,0 +1,74 @@
+"""
+Compares the size and write time of the JSON, JSON Lines, CSV and Parquet
+writers on synthetic parsed PAN-OS TRAFFIC records.
+
+    python benchmarks/bench_output.py --records 200000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from log_parser_sdk.output_formatter import OutputFormatter
+
+
+def make_records(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    apps = ["ssl", "dns", "web-browsing", "ms-update", "ntp", "google-base", "incomplete"]
+    hosts = [f"PA-{i:02d}" for i in range(8)]
+    for i in range(count):
+        yield {
+            "syslog": {"timestamp": f"Jun 11 00:{i // 60 % 60:02d}:{i % 60:02d}", "hostname": rng.choice(hosts),
+                       "facility": 1, "severity": 6},
+            "type": "TRAFFIC",
+            "subtype": rng.choice(["start", "end", "drop"]),
+            "source_ip": f"10.{rng.randrange(4)}.{rng.randrange(256)}.{rng.randrange(256)}",
+            "destination_ip": f"172.16.{rng.randrange(256)}.{rng.randrange(256)}",
+            "rule": rng.choice(["allow-out", "default-deny", "dns"]),
+            "app": rng.choice(apps),
+            "source_zone": "Trust",
+            "destination_zone": "Untrust",
+            "session_id": 100000 + i,
+            "source_port": rng.randrange(1024, 65536),
+            "destination_port": rng.choice([53, 80, 443, 123]),
+            "action": rng.choice(["allow", "allow", "allow", "deny", "drop"]),
+            "bytes": rng.randrange(60, 200000),
+            "packets": rng.randrange(1, 400),
+        }
+
+
+def write_json(formatter: OutputFormatter, records, path: str):
+    with open(path, "w") as f:
+        f.write(formatter.format_list_to_json(list(records)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=200000)
+    args = parser.parse_args()
+
+    formatter = OutputFormatter()
+    writers = {
+        "json": lambda path: write_json(formatter, make_records(args.records), path),
+        "jsonl": lambda path: formatter.write_json_lines(make_records(args.records), path),
+        "csv": lambda path: formatter.write_csv_stream(make_records(args.records), path),
+        "parquet": lambda path: formatter.write_parquet(make_records(args.records), path),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        sizes = {}
+        for name, write in writers.items():
+            path = os.path.join(directory, f"records.{name}")
+            start = time.perf_counter()
+            write(path)
+            elapsed = time.perf_counter() - start
+            sizes[name] = os.path.getsize(path)
+            print(f"{name:8s} {sizes[name] / 1e6:9.2f} MB  {elapsed:7.2f}s  "
+                  f"({sizes['json'] / sizes[name]:5.1f}x smaller than json)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compares the scapy and native PCAP engines on a synthetic capture of syslog
+over UDP and TCP mixed with unrelated binary traffic.
+
+    python benchmarks/bench_pcap.py --packets 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from scapy.all import IP, TCP, UDP, Ether, Raw, wrpcap
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from log_parser_sdk.input_handler import InputHandler
+
+
+def write_capture(path: str, packets: int):
+    frames = []
+    seq = 1000
+    for i in range(packets):
+        line = f"<13>Jun 11 00:39:{i % 60:02d} host{i % 50} sshd[{i}]: session opened for user u{i}\n".encode()
+        kind = i % 4
+        if kind == 0:
+            frames.append(Ether() / IP(src="10.0.0.1", dst="10.0.0.2") / UDP(sport=40000, dport=514) / Raw(line))
+        elif kind == 1:
+            frames.append(Ether() / IP(src="10.0.0.3", dst="10.0.0.2") / TCP(sport=40001, dport=601, flags="A", seq=seq) / Raw(line))
+            seq += len(line)
+        else:
+            frames.append(Ether() / IP(src="10.0.0.4", dst="10.0.0.5") / TCP(sport=443, dport=50000, flags="A") / Raw(os.urandom(900)))
+    wrpcap(path, frames)
+
+
+def timed(label: str, run):
+    start = time.perf_counter()
+    entries = run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:32s} entries={len(entries):6d}  {elapsed:7.3f}s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packets", type=int, default=20000)
+    args = parser.parse_args()
+
+    handler = InputHandler()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.pcap")
+        write_capture(path, args.packets)
+        print(f"{args.packets} packets, {os.path.getsize(path) / 1e6:.1f} MB")
+        scapy_time = timed("scapy", lambda: handler.read_pcap_file(path, engine="scapy"))
+        native_time = timed("native", lambda: handler.read_pcap_file(path))
+        filtered_time = timed("native, ports 514/601", lambda: handler.read_pcap_file(path, ports=[514, 601]))
+        print(f"speedup: {scapy_time / native_time:.1f}x (filtered {scapy_time / filtered_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
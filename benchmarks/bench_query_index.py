@@ -0,0 +1,81 @@
+"""
+Measures QueryIndex lookup latency as the corpus grows, against a linear
+scan of the same records in memory. Records are synthetic PAN-OS style
+dicts, one per second, with seeded random sources, types and actions.
+
+Each size runs three triage queries: a single source IP, THREAT events from
+one source, and everything in a one-minute window. Latency should stay
+nearly flat as the corpus grows by orders of magnitude, while the scan grows
+linearly.
+
+    python benchmarks/bench_query_index.py --sizes 10000,100000,1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from log_parser_sdk.query_index import QueryIndex, to_epoch_micros
+
+START = datetime(2021, 10, 13)
+
+
+def generate_records(count: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "type": "THREAT" if rng.random() < 0.05 else "TRAFFIC",
+            "src": f"10.80.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+            "dst": f"172.16.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+            "action": rng.choice(("allow", "allow", "allow", "deny", "drop")),
+            "receive_time": (START + timedelta(seconds=i)).strftime("%Y/%m/%d %H:%M:%S"),
+            "syslog": {"hostname": f"PA-{rng.randrange(8):02d}"},
+        }
+
+
+def timed(run, repeat: int) -> tuple[float, int]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        matches = run()
+    return (time.perf_counter() - started) / repeat, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'records':>9s} {'build':>8s}  {'query':28s} {'matches':>7s} {'index':>10s} {'scan':>10s}")
+    for size in (int(size) for size in args.sizes.split(",")):
+        records = list(generate_records(size, args.seed))
+        probe = records[size // 2]
+        window_start = to_epoch_micros(probe["receive_time"])
+        window_end = window_start + 60_000_000
+        queries = [
+            ("src", {"src": probe["src"]}, lambda record: record["src"] == probe["src"]),
+            ("THREAT from src", {"type": "THREAT", "src": probe["src"]},
+             lambda record: record["type"] == "THREAT" and record["src"] == probe["src"]),
+            ("one-minute window", {"start": probe["receive_time"], "end": window_end / 1_000_000},
+             lambda record: window_start <= to_epoch_micros(record["receive_time"]) < window_end),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            with QueryIndex(os.path.join(directory, "index.db"), batch_size=10000) as index:
+                started = time.perf_counter()
+                index.add_records(records)
+                build = time.perf_counter() - started
+                for label, conditions, predicate in queries:
+                    indexed, matches = timed(lambda: len(index.query(**conditions)), args.repeat)
+                    scanned, _ = timed(lambda: sum(1 for record in records if predicate(record)), 1)
+                    print(f"{size:9d} {build:7.1f}s  {label:28s} {matches:7d} {indexed * 1000:8.3f}ms "
+                          f"{scanned * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the memory held by parsed results as plain dicts and as
+CompactRecords. The corpus is generated from raw_logs/ (PAN-OS and Unix
+syslog, see corpus.py) and parsed with the native parsers, so no Claude
+server is needed. Memory is measured with tracemalloc and covers the records
+only, not the input lines.
+
+    python benchmarks/bench_records.py --lines 200000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from corpus import generate_lines
+from log_parser_sdk.compact_records import RecordCompactor
+from log_parser_sdk.log_parser import LogParsingSDK
+from log_parser_sdk.output_formatter import OutputFormatter
+
+
+def measure(label: str, build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    records = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:10s} records={len(records):7d}  {size / 1e6:8.1f} MB  {size / len(records):7.0f} B/record"
+          f"  build={elapsed:6.2f}s")
+    return records, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    lines = generate_lines(args.lines, args.seed)
+    sdk = LogParsingSDK("unused", parse_cache_size=0)
+    compactor = RecordCompactor()
+
+    def parse_dicts():
+        return [record for record in map(sdk._parse_locally, lines) if record is not None]
+
+    def parse_compact():
+        return [compactor.compact(record) for record in map(sdk._parse_locally, lines) if record is not None]
+
+    dicts, dict_size = measure("dict", parse_dicts)
+    compact, compact_size = measure("compact", parse_compact)
+    print(f"{compactor.schema_count} schemas; compact records use {compact_size / dict_size:.0%} of the dict memory")
+
+    formatter = OutputFormatter()
+    for label, records in (("dict", dicts), ("compact", compact)):
+        started = time.perf_counter()
+        formatter.write_csv_stream(records, os.devnull)
+        print(f"{label:10s} csv write {time.perf_counter() - started:6.2f}s")
+    assert compact == dicts
+
+
+if __name__ == "__main__":
+    main()
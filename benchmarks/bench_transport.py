@@ -0,0 +1,77 @@
+"""
+Measures per-request latency against a local TLS stub of the Claude API, with
+a fresh connection per request (the old requests.post behaviour) and with the
+pooled keep-alive transport.
+
+    python benchmarks/bench_transport.py --requests 200 --workers 1 8
+"""
+import argparse
+import os
+import ssl
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from log_parser_sdk.transport import PooledTransport
+from fake_claude_server import FakeClaudeServer, self_signed_certificate
+
+PAYLOAD = {
+    "model": "claude-3-opus-20240229",
+    "max_tokens": 100,
+    "messages": [{"role": "user", "content": "Raw Log Entry:\nJun 11 00:39:16 host sshd[1]: session opened"}],
+}
+
+
+def run(send, total: int, workers: int) -> list[float]:
+    def timed(_):
+        start = time.perf_counter()
+        send().raise_for_status()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(workers) as pool:
+        return sorted(pool.map(timed, range(total)))
+
+
+def report(name: str, latencies: list[float], elapsed: float):
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    print(f"{name:24s} p50={p50:7.2f}ms  p95={p95:7.2f}ms  {len(latencies) / elapsed:8.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stub server waits per request.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = self_signed_certificate(directory)
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert_path, key_path)
+        with FakeClaudeServer(latency=args.latency, ssl_context=context) as server:
+            for workers in args.workers:
+                print(f"workers={workers}")
+                start = time.perf_counter()
+                latencies = run(lambda: requests.post(server.url, json=PAYLOAD, verify=cert_path, timeout=10),
+                                args.requests, workers)
+                report("requests.post", latencies, time.perf_counter() - start)
+
+                for keepalive in (False, True):
+                    with PooledTransport(pool_maxsize=workers, keepalive=keepalive, verify=cert_path) as transport:
+                        start = time.perf_counter()
+                        latencies = run(lambda: transport.post(server.url, json=PAYLOAD), args.requests, workers)
+                        report(f"pooled keepalive={keepalive}", latencies, time.perf_counter() - start)
+                        metrics = transport.metrics.snapshot()
+                        print(f"{'':24s} connections={metrics['connections_opened']}  "
+                              f"reused={metrics['connections_reused']}  "
+                              f"avg_connect={metrics['avg_connect_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
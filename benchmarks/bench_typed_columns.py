@@ -0,0 +1,98 @@
+"""
+Compares converting parsed PAN-OS records to typed values one record at a
+time in Python (socket.inet_aton, datetime.strptime, int(value, 16) and
+int()) with TypedColumnConverter's bulk conversion. The corpus is
+generated from raw_logs/ and parsed with the native parsers, so no Claude
+server is needed.
+
+"convert" times the type conversion alone: the per-record loop against
+convert_column on columns that are already Arrow string arrays. "end to
+end" also includes flattening the records and building the columns.
+
+    python benchmarks/bench_typed_columns.py --lines 200000
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pyarrow as pa
+
+from corpus import generate_lines
+from log_parser_sdk.log_parser import LogParsingSDK
+from log_parser_sdk.typed_columns import TypedColumnConverter
+
+COLUMN_TYPES = {
+    "src": "ipv4", "dst": "ipv4", "natsrc": "ipv4", "natdst": "ipv4",
+    "receive_time": "timestamp", "time_generated": "timestamp", "start": "timestamp",
+    "flags": "hex", "actionflags": "hex",
+    "bytes": "int", "bytes_sent": "int", "bytes_received": "int", "packets": "int", "sessionid": "int",
+}
+
+
+def convert_record(record: dict) -> dict:
+    row = dict(record)
+    for name, kind in COLUMN_TYPES.items():
+        value = row.get(name)
+        if value is None:
+            continue
+        try:
+            if kind == "ipv4":
+                row[name] = int.from_bytes(socket.inet_aton(value), "big")
+            elif kind == "timestamp":
+                row[name] = datetime.strptime(value, "%Y/%m/%d %H:%M:%S")
+            elif kind == "hex":
+                row[name] = int(value, 16)
+            else:
+                row[name] = int(value)
+        except (OSError, ValueError, TypeError):
+            row[name] = None
+    return row
+
+
+def timed(label: str, run, baseline: float = None) -> float:
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    speedup = f"  {baseline / elapsed:6.1f}x" if baseline else ""
+    print(f"{label:32s} {elapsed:7.3f}s{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sdk = LogParsingSDK("unused", parse_cache_size=0)
+    records = [record for record in map(sdk._parse_locally, generate_lines(args.lines, args.seed))
+               if record is not None and record.get("type") in ("TRAFFIC", "THREAT")]
+    print(f"{len(records)} PAN-OS records, {len(COLUMN_TYPES)} typed columns")
+
+    converter = TypedColumnConverter(COLUMN_TYPES, infer=False)
+    columns = {name: pa.array([record.get(name) if isinstance(record.get(name), str) else None
+                               for record in records], pa.string())
+               for name, kind in COLUMN_TYPES.items() if kind != "int"}
+    columns.update({name: pa.array([record.get(name) for record in records]) for name, kind in COLUMN_TYPES.items()
+                    if kind == "int"})
+
+    per_record = timed("convert, per record", lambda: [convert_record(record) for record in records])
+    timed("convert, columnar", lambda: [converter.convert_column(name, array) for name, array in columns.items()],
+          per_record)
+    print()
+    per_record = timed("end to end, per record", lambda: [convert_record(record) for record in records])
+    timed("end to end, columnar", lambda: list(converter.iter_batches(records, 10000)), per_record)
+    timed("end to end, columnar + inference",
+          lambda: list(TypedColumnConverter(COLUMN_TYPES).iter_batches(records, 10000)), per_record)
+    if converter.conversion_errors:
+        print(f"values that did not convert: {converter.conversion_errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Deterministic synthetic corpora for the benchmarks.
+
+Lines are sampled from the sample logs in raw_logs/ (PAN-OS firewall and Unix
+syslog) and their variable parts are rewritten with a seeded random generator:
+IPv4 addresses keep their first two octets, hex values and other numbers keep
+their length, and dates and times are left alone so every line still has the
+shape of its seed. The same seed always produces the same corpus.
+"""
+import os
+import random
+import re
+import struct
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SEED_FILES = [os.path.join(ROOT, "raw_logs", "fw_logs.txt"), os.path.join(ROOT, "raw_logs", "unix_logs.txt")]
+
+_VARIABLE = re.compile(
+    r"(?P<keep>\b\d{4}/\d{2}/\d{2}\b|\b\d{2}:\d{2}:\d{2}\b|^[A-Z][a-z]{2} [ \d]\d)"
+    r"|(?P<ip>\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b)"
+    r"|(?P<hex>\b0x[0-9a-fA-F]+\b)"
+    r"|(?P<number>\d+)"
+)
+
+
+def load_seed_lines(paths: list[str] = None) -> list[str]:
+    lines = []
+    for path in paths or SEED_FILES:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines.extend(line.strip() for line in f if line.strip())
+    return lines
+
+
+def mutate(line: str, rng: random.Random) -> str:
+    def replace(match):
+        if match.group("keep"):
+            return match.group(0)
+        if match.group("ip"):
+            first, second = match.group("ip").split(".")[:2]
+            return f"{first}.{second}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+        if match.group("hex"):
+            return "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(len(match.group(0)) - 2))
+        digits = match.group(0)
+        if len(digits) == 1:
+            return str(rng.randrange(10))
+        return str(rng.randrange(1, 10)) + "".join(str(rng.randrange(10)) for _ in range(len(digits) - 1))
+    return _VARIABLE.sub(replace, line)
+
+
+def generate_lines(count: int, seed: int = 0, seed_lines: list[str] = None) -> list[str]:
+    rng = random.Random(seed)
+    seed_lines = seed_lines or load_seed_lines()
+    return [mutate(rng.choice(seed_lines), rng) for _ in range(count)]
+
+
+def write_log_file(path: str, lines: list[str]):
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line)
+            f.write("\n")
+
+
+def write_log_directory(directory: str, lines: list[str], files: int = 4) -> list[str]:
+    """
+    Splits lines across `files` .log files in directory. Returns their paths.
+    """
+    paths = []
+    per_file = -(-len(lines) // files)
+    for index in range(files):
+        path = os.path.join(directory, f"corpus-{index:02d}.log")
+        write_log_file(path, lines[index * per_file:(index + 1) * per_file])
+        paths.append(path)
+    return paths
+
+
+def write_syslog_pcap(path: str, lines: list[str]):
+    """
+    Writes each line as one syslog-over-UDP/514 packet (Ethernet, IPv4, UDP)
+    in a classic little-endian pcap file, without needing scapy.
+    """
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        for index, line in enumerate(lines):
+            payload = line.encode("utf-8")
+            udp = struct.pack("!HHHH", 40000, 514, 8 + len(payload), 0) + payload
+            ip = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(udp), index & 0xFFFF, 0, 64, 17, 0,
+                             bytes([10, 0, 0, 1]), bytes([10, 0, 0, 2])) + udp
+            frame = b"\x00\x11\x22\x33\x44\x55\x66\x77\x88\x99\xaa\xbb\x08\x00" + ip
+            f.write(struct.pack("<IIII", 1718064000 + index // 1000, index % 1000 * 1000, len(frame), len(frame)))
+            f.write(frame)
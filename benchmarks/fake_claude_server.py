@@ -0,0 +1,124 @@
+"""
+A local stand-in for the Claude Messages API used by the benchmarks.
+
+The server answers POST requests with a Messages-style response whose text is a
+JSON object derived from the prompt, after an optional artificial latency
+(plus uniform jitter). Multi-entry batch prompts get a JSON array with one item
+per numbered entry. A seeded fraction of requests (error_rate) is answered
+with HTTP 529 "overloaded" instead, so retry behaviour can be measured.
+Pass an ssl.SSLContext to serve HTTPS, e.g. with a certificate from
+self_signed_certificate().
+"""
+import json
+import os
+import random
+import re
+import socket
+import ssl
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeClaudeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; without this, Nagle's
+        # algorithm adds ~40ms to every response on a kept-alive connection.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            fail = server.error_rate and server.random.random() < server.error_rate
+            delay = server.latency + (server.random.uniform(0, server.jitter) if server.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            with server.lock:
+                server.error_count += 1
+            self._send_json(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+            return
+
+        prompt = payload.get("messages", [{}])[-1].get("content", "")
+        if isinstance(prompt, list):
+            prompt = "".join(block.get("text", "") for block in prompt)
+        if "Raw Log Entries:" in prompt:
+            entries = re.findall(r"^\[(\d+)\] (.*)$", prompt, re.MULTILINE)
+            text = json.dumps([{"id": int(entry_id), "parsed": {"message": entry}} for entry_id, entry in entries])
+        else:
+            text = json.dumps({"message": prompt[-200:], "length": len(prompt)})
+        self._send_json(200, {
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4 + 1},
+        })
+
+    def _send_json(self, status: int, data: dict):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.headers.get("Connection", "").lower() == "close":
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeClaudeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0,
+                 ssl_context: ssl.SSLContext = None, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        super().__init__((host, port), FakeClaudeHandler)
+        if ssl_context is not None:
+            # Handshakes happen on first read, in the handler thread.
+            self.socket = ssl_context.wrap_socket(self.socket, server_side=True, do_handshake_on_connect=False)
+        self.scheme = "https" if ssl_context is not None else "http"
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self.error_count = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{self.scheme}://{host}:{port}/v1/messages"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+def self_signed_certificate(directory: str, host: str = "127.0.0.1"):
+    """
+    Writes a throwaway certificate and key for host into directory using the
+    openssl command line tool. Returns (cert_path, key_path).
+    """
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", key_path, "-out", cert_path, "-subj", f"/CN={host}",
+         "-addext", f"subjectAltName=IP:{host}"],
+        check=True, capture_output=True,
+    )
+    return cert_path, key_path
@@ -0,0 +1,223 @@
+"""
+Reproducible end-to-end benchmarks against a local fake Claude server.
+
+Each scenario runs in a fresh child process on a synthetic corpus generated
+from raw_logs/ with a fixed seed (see corpus.py), so peak RSS is per scenario
+and runs are comparable. Reported per scenario:
+
+    lines_per_sec       entries processed per second of wall time
+    p50_ms / p99_ms     Claude request latency seen by the client (single_entry:
+                        per entry; output scenarios: per record written)
+    peak_rss_mb         peak resident set size of the child and its workers
+    api_calls_per_line  requests that reached the fake server per entry
+
+Results are compared with benchmarks/baseline.json; a scenario regresses when
+throughput drops, or latency, memory or API calls grow, by more than
+--tolerance (ignoring sub-millisecond latency and sub-5 MB memory changes),
+and the run exits with status 1.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scenarios file pcap --lines 20000 --latency 0.05
+    python benchmarks/run_benchmarks.py --save-baseline
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import corpus
+from fake_claude_server import FakeClaudeServer
+from log_parser_sdk.log_parser import LogParsingSDK
+
+SCENARIOS = ["single_entry", "file", "directory", "pcap", "csv_output", "json_output"]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Metric -> True if higher is better.
+METRICS = {"lines_per_sec": True, "p50_ms": False, "p99_ms": False, "peak_rss_mb": False, "api_calls_per_line": False}
+# Changes smaller than these are noise, whatever the percentage.
+NOISE_FLOOR = {"p50_ms": 1.0, "p99_ms": 1.0, "peak_rss_mb": 5.0}
+# Parameters that must match for a baseline comparison to mean anything.
+COMPARABLE = ("lines", "single_lines", "seed", "latency", "jitter", "error_rate", "workers", "processes")
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux.
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(usage / 1024, 1)
+
+
+def timed_iter(records, latencies: list[float]):
+    last = time.perf_counter()
+    for record in records:
+        yield record
+        now = time.perf_counter()
+        latencies.append(now - last)
+        last = now
+
+
+def run_scenario(name: str, args) -> dict:
+    lines = corpus.generate_lines(args.lines, seed=args.seed)
+    latencies = []
+    with tempfile.TemporaryDirectory() as directory, \
+            FakeClaudeServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                             seed=args.seed) as server:
+        sdk = LogParsingSDK("benchmark-key", max_workers=args.workers)
+        sdk.claude_client.base_url = server.url
+        post = sdk.claude_client.transport.post
+
+        def timed_post(*post_args, **post_kwargs):
+            start = time.perf_counter()
+            try:
+                return post(*post_args, **post_kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        if name not in ("single_entry", "csv_output", "json_output"):
+            sdk.claude_client.transport.post = timed_post
+
+        log_path = os.path.join(directory, "corpus.log")
+        if name == "single_entry":
+            lines = lines[:args.single_lines]
+        elif name == "file":
+            corpus.write_log_file(log_path, lines)
+        elif name == "directory":
+            corpus.write_log_directory(directory, lines)
+        elif name == "pcap":
+            corpus.write_syslog_pcap(os.path.join(directory, "corpus.pcap"), lines)
+        else:
+            # Output scenarios time only the writers, on records parsed up front.
+            records = sdk._parse_entries(lines)
+            server.request_count = 0
+
+        start = time.perf_counter()
+        if name == "single_entry":
+            for line in lines:
+                entry_start = time.perf_counter()
+                sdk.parse_log_entry(line)
+                latencies.append(time.perf_counter() - entry_start)
+            count = len(lines)
+        elif name == "file":
+            count = len(sdk.parse_log_file(log_path))
+        elif name == "directory":
+            count = len(sdk.parse_logs_from_directory(directory, processes=args.processes))
+        elif name == "pcap":
+            count = len(sdk.parse_pcap_file(os.path.join(directory, "corpus.pcap")))
+        elif name == "csv_output":
+            count = sdk.output_formatter.write_csv_stream(timed_iter(records, latencies),
+                                                          os.path.join(directory, "out.csv"))
+        else:
+            count = sdk.output_formatter.write_json_lines(timed_iter(records, latencies),
+                                                          os.path.join(directory, "out.jsonl"))
+        elapsed = time.perf_counter() - start
+
+        p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+        return {
+            "scenario": name,
+            "lines": count,
+            "seconds": round(elapsed, 3),
+            "lines_per_sec": round(count / elapsed, 1) if elapsed else None,
+            "p50_ms": None if p50 is None else round(1000 * p50, 3),
+            "p99_ms": None if p99 is None else round(1000 * p99, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "api_calls": server.request_count,
+            "api_errors": server.error_count,
+            "api_calls_per_line": round(server.request_count / count, 4) if count else None,
+        }
+
+
+def run_in_child(name: str, args) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--run-one", name, "--lines", str(args.lines),
+               "--single-lines", str(args.single_lines), "--seed", str(args.seed), "--latency", str(args.latency),
+               "--jitter", str(args.jitter), "--error-rate", str(args.error_rate), "--workers", str(args.workers)]
+    if args.processes:
+        command += ["--processes", str(args.processes)]
+    # Only stdout is captured, so errors and tracebacks from the scenario reach the terminal.
+    completed = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    cells = []
+    for metric, higher_is_better in METRICS.items():
+        current, previous = result.get(metric), baseline.get(metric)
+        if current is None or not previous:
+            continue
+        change = (current - previous) / previous
+        worse = -change if higher_is_better else change
+        cells.append(f"{metric} {change:+.0%}")
+        if worse > tolerance and abs(current - previous) > NOISE_FLOOR.get(metric, 0):
+            regressions.append(metric)
+    print(f"    vs baseline: {', '.join(cells) or 'no comparable metrics'}"
+          + (f"  REGRESSION: {', '.join(regressions)}" if regressions else ""))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--single-lines", type=int, default=500, help="Entries parsed one at a time in single_entry.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the fake server waits per request.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random latency, in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 529.")
+    parser.add_argument("--workers", type=int, default=1, help="LogParsingSDK max_workers.")
+    parser.add_argument("--processes", type=int, default=None, help="Process pool size for the directory scenario.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--run-one", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_scenario(args.run_one, args)))
+        return
+
+    params = {"lines": args.lines, "single_lines": args.single_lines, "seed": args.seed, "latency": args.latency,
+              "jitter": args.jitter, "error_rate": args.error_rate, "workers": args.workers,
+              "processes": args.processes}
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if all(stored.get("params", {}).get(key) == params[key] for key in COMPARABLE):
+            baseline = stored.get("results", {})
+        else:
+            print(f"Baseline {args.baseline} was recorded with different parameters; not comparing.")
+
+    results = {}
+    regressed = False
+    for name in args.scenarios:
+        result = run_in_child(name, args)
+        results[name] = result
+        print(f"{name:13s} lines={result['lines']:6d}  {result['lines_per_sec'] or 0:10.1f} lines/s  "
+              f"p50={result['p50_ms']} ms  p99={result['p99_ms']} ms  rss={result['peak_rss_mb']} MB  "
+              f"api/line={result['api_calls_per_line']}  errors={result['api_errors']}")
+        if name in baseline:
+            regressed |= bool(compare(result, baseline[name], args.tolerance))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"params": params, "python": platform.python_version(), "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
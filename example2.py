@@ -40,9 +40,7 @@ if parsed_single_log:
     print("Parsed Single Log (JSON) saved to /home/dk/SDK_Parser/output_single_log.json")
 
     # Save CSV Output
-    csv_output = sdk.output_formatter.format_to_csv([parsed_single_log])
-    with open("/home/dk/SDK_Parser/output_single_log.csv", "w") as f:
-        f.write(csv_output)
+    sdk.output_formatter.write_csv_stream([parsed_single_log], "/home/dk/SDK_Parser/output_single_log.csv")
     print("Parsed Single Log (CSV) saved to /home/dk/SDK_Parser/output_single_log.csv")
 else:
     print("Failed to parse single log entry.")
@@ -58,9 +56,7 @@ if parsed_file_logs:
     print(f"Parsed Logs from {TEST_LOG_FILE} (JSON) saved to /home/ubuntu/output_file_logs.json")
 
     # Save CSV Output
-    csv_output = sdk.output_formatter.format_to_csv(parsed_file_logs)
-    with open("/home/dk/SDK_Parser/output_file_logs.csv", "w") as f:
-        f.write(csv_output)
+    sdk.output_formatter.write_csv_stream(parsed_file_logs, "/home/dk/SDK_Parser/output_file_logs.csv")
     print(f"Parsed Logs from {TEST_LOG_FILE} (CSV) saved to /home/dk/SDK_Parser/output_file_logs.csv")
 else:
     print(f"Failed to parse logs from file: {TEST_LOG_FILE}")
@@ -77,9 +73,7 @@ if parsed_dir_logs:
     print(f"Parsed Logs from directory {TEST_LOG_DIRECTORY} (JSON) saved to /home/ubuntu/output_dir_logs.json")
 
     # Save CSV Output
-    csv_output = sdk.output_formatter.format_to_csv(parsed_dir_logs)
-    with open("/home/dk/SDK_Parser//output_dir_logs.csv", "w") as f:
-        f.write(csv_output)
+    sdk.output_formatter.write_csv_stream(parsed_dir_logs, "/home/dk/SDK_Parser/output_dir_logs.csv")
     print(f"Parsed Logs from directory {TEST_LOG_DIRECTORY} (CSV) saved to /home/ubuntu/output_dir_logs.csv")
 else:
     print(f"Failed to parse logs from directory: {TEST_LOG_DIRECTORY}")
@@ -1,2 +1,24 @@
-from .log_parser import LogParsingSDK
+# The SDK classes are imported on first access, so `import log_parser_sdk` stays
+# cheap and each optional backend (scapy, the HTTP client, pyarrow) is only
+# loaded by the code path that needs it.
+_LAZY_EXPORTS = {
+    "LogParsingSDK": ".log_parser",
+    "AsyncLogParsingSDK": ".async_log_parser",
+}
 
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import requests
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from .async_transport import AsyncTransport
+from .claude_client import BATCH_PARSE_SYSTEM_PROMPT, GROK_SYSTEM_PROMPT, PARSE_SYSTEM_PROMPT, ClaudeClient
+from .grok import clean_pattern
+from .instrumentation import metrics
+from .rate_limiter import estimate_tokens
+
+
+class AsyncClaudeClient(ClaudeClient):
+    """
+    asyncio version of ClaudeClient. It sends the same prompts, keeps the
+    same ledger, output budget and result store, and follows the same retry
+    rules, but its request methods are coroutines and requests go through an
+    AsyncTransport. At most max_concurrency requests are in flight at once;
+    further callers wait their turn without blocking the event loop.
+    """
+
+    def __init__(self, api_key, base_url=None, rate_limiter=None, result_store=None, transport=None,
+                 model="claude-3-opus-20240229", prompt_caching=True, ledger=None, output_budget=None,
+                 max_concurrency=4):
+        super().__init__(api_key, base_url=base_url, rate_limiter=rate_limiter, result_store=result_store,
+                         transport=transport or AsyncTransport(pool_maxsize=max(max_concurrency, 16)),
+                         model=model, prompt_caching=prompt_caching, ledger=ledger, output_budget=output_budget)
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def _off_loop(self, function, *args):
+        # Result store calls are blocking SQLite queries, so they run on a worker thread.
+        if self.result_store is None:
+            return function(*args)
+        return await asyncio.to_thread(function, *args)
+
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=1, min=4, max=20),
+        retry=retry_if_exception_type(ClaudeClient.RETRYABLE_ERRORS)
+    )
+    async def _make_request(self, prompt, max_tokens=None, temperature=0.0, extract_json=True, system=None,
+                            kind="parse"):
+        if not self.api_key:
+            raise ValueError("Claude API key is not set. Please set the CLAUDE_API_KEY environment variable.")
+
+        prompt_tokens = estimate_tokens(prompt)
+        if max_tokens is None:
+            max_tokens = self.output_budget.max_tokens(kind, prompt_tokens)
+        payload = self._build_payload(prompt, max_tokens, temperature, system)
+
+        async with self._slots:
+            if self.rate_limiter is not None:
+                with metrics.timer("rate_limit_wait"):
+                    await self.rate_limiter.acquire_async(
+                        prompt_tokens + (estimate_tokens(system) if system else 0) + max_tokens)
+
+            metrics.increment("claude_requests", kind=kind)
+            response = None
+            try:
+                with metrics.timer("network_wait"):
+                    response = await self.transport.post(self.base_url, headers=self.headers, json=payload,
+                                                         timeout=self.timeout)
+                response.raise_for_status()
+                result, retry_truncated = self._read_response(response.json(), kind, prompt_tokens, max_tokens,
+                                                              extract_json)
+            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+                self._log_request_error(e, response)
+                raise
+        if retry_truncated:
+            return await self._make_request(prompt, self.output_budget.maximum, temperature, extract_json, system,
+                                            kind)
+        return result
+
+    async def parse_log(self, log_entry):
+        """
+        Parses one log entry with Claude and returns the decoded JSON object
+        ({} if the response held none).
+        """
+        stored = await self._off_loop(self._stored_result, log_entry)
+        if stored is not None:
+            return stored
+        result = await self._make_request(self._build_parse_prompt(log_entry), system=PARSE_SYSTEM_PROMPT)
+        await self._off_loop(self._store_result, log_entry, result)
+        return result
+
+    async def parse_log_with_claude(self, log_entry):
+        return json.dumps(await self.parse_log(log_entry))
+
+    async def parse_logs(self, log_entries, max_batch_tokens=4000, max_batch_entries=20):
+        """
+        Parses many log entries in packed multi-entry requests, like
+        ClaudeClient.parse_logs. The batches are sent concurrently, up to
+        max_concurrency at a time. Returns one decoded object per entry, in
+        input order.
+        """
+        log_entries = list(log_entries)
+        results, remaining = await self._off_loop(self._stored_results, log_entries)
+        batches = self._pack_remaining(log_entries, remaining, max_batch_tokens, max_batch_entries)
+        await asyncio.gather(*(self._parse_batch(log_entries, batch, results) for batch in batches))
+        await self._off_loop(self._store_results, log_entries, remaining, results)
+        return results
+
+    async def parse_logs_batch(self, log_entries, max_batch_tokens=4000, max_batch_entries=20):
+        return [json.dumps(result) for result in await self.parse_logs(log_entries, max_batch_tokens,
+                                                                       max_batch_entries)]
+
+    async def _parse_batch(self, log_entries, indices, results):
+        if len(indices) == 1:
+            results[indices[0]] = await self.parse_log(log_entries[indices[0]])
+            return
+
+        prompt = self._build_batch_prompt([(index, log_entries[index]) for index in indices])
+        response_text = await self._make_request(prompt, extract_json=False, system=BATCH_PARSE_SYSTEM_PROMPT,
+                                                 kind="batch")
+        for retry_indices in self._apply_batch_response(response_text, indices, results):
+            await self._parse_batch(log_entries, retry_indices, results)
+
+    async def generate_grok_pattern_with_claude(self, log_entry):
+        prompt = self._build_grok_prompt(log_entry)
+        return clean_pattern(await self._make_request(prompt, extract_json=False, system=GROK_SYSTEM_PROMPT,
+                                                      kind="grok"))
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,406 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from .log_parser import LogParsingSDK
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output in the pipeline queues.
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class AsyncLogParsingSDK(LogParsingSDK):
+    """
+    asyncio version of LogParsingSDK for ingestion services that run on an
+    event loop. The parsing methods are coroutines, and the iter_* methods
+    are async generators used with `async for`.
+
+    Files are parsed in a three-stage pipeline. A reader thread reads
+    chunk_size entries at a time into a queue of at most queue_size chunks.
+    The local dispatch stage runs on each chunk, and about max_in_flight
+    chunks (default: max_concurrency) wait on Claude at once. Records are
+    yielded in input order. When Claude is slow, both bounds fill up and
+    reading pauses, so memory stays bounded instead of growing with the
+    backlog. Claude requests go through an AsyncClaudeClient with at most
+    max_concurrency requests in flight; per-batch failures are reported
+    inline as {"parsing_error": ..., "raw_log": ...} records. The CPU-bound
+    local dispatch runs on a dedicated worker thread and result store
+    queries on worker threads, so neither stalls the event loop.
+
+    Closing or cancelling an iterator cancels its in-flight requests, stops
+    the reader after its current chunk and closes the file. Call the
+    iterator's aclose() (or use contextlib.aclosing() on Python 3.10+) when
+    leaving an `async for` early, and the SDK's aclose() (or `async with`)
+    to release pooled connections.
+    """
+
+    def __init__(self, claude_api_key, parse_cache_size=1024, grok_patterns_path=None, learn_grok_patterns=False,
+                 max_concurrency=4, requests_per_minute=None, tokens_per_minute=None, max_batch_tokens=4000,
+                 result_store_path=None, native_parsers=True, compact_records=False, chunk_size=500, queue_size=4,
+                 max_in_flight=None):
+        self.max_concurrency = max_concurrency
+        super().__init__(claude_api_key, parse_cache_size=parse_cache_size, grok_patterns_path=grok_patterns_path,
+                         learn_grok_patterns=learn_grok_patterns, max_workers=max_concurrency,
+                         requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute,
+                         max_batch_tokens=max_batch_tokens, result_store_path=result_store_path,
+                         native_parsers=native_parsers, compact_records=compact_records)
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        self.max_in_flight = max_in_flight or max_concurrency
+        # One thread, so local parsing keeps running one chunk at a time as it did on the event loop.
+        self._local_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-dispatch")
+
+    async def _run_locally(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._local_executor, function, *args)
+
+    def _make_claude_client(self, claude_api_key, rate_limiter, max_workers):
+        from .async_claude_client import AsyncClaudeClient
+        from .async_transport import AsyncTransport
+
+        transport = AsyncTransport(pool_maxsize=max(max_workers, 16))
+        return AsyncClaudeClient(claude_api_key, rate_limiter=rate_limiter, result_store=self.result_store,
+                                 transport=transport, max_concurrency=self.max_concurrency)
+
+    async def _parse_with_claude(self, log_entry):
+        parsed_data = await self._run_locally(self._parse_locally, log_entry)
+        if parsed_data is not None:
+            return parsed_data
+
+        if self.learn_grok_patterns:
+            pattern = await self.learn_grok_pattern(log_entry)
+            if pattern is not None:
+                return pattern.match(log_entry)
+
+        return self._cache_claude_output(log_entry, await self.claude_client.parse_log(log_entry))
+
+    async def _parse_entries(self, log_entries):
+        """
+        Parses a sequence of entries like LogParsingSDK._parse_entries, sending
+        the Claude batches of each round concurrently.
+        """
+        log_entries = list(log_entries)
+        results = [None] * len(log_entries)
+        pending = await self._run_locally(self._dispatch_locally, log_entries, range(len(log_entries)), results)
+        sent_per_template = {}
+        while pending:
+            representatives, deferred = self._pick_representatives(log_entries, pending, sent_per_template)
+            await self._resolve_with_claude(log_entries, representatives, results)
+            pending = await self._run_locally(self._dispatch_locally, log_entries, deferred, results)
+        return await self._run_locally(self._compact, results)
+
+    async def _resolve_with_claude(self, log_entries, indices, results):
+        if self.learn_grok_patterns:
+            unmatched = []
+            for index in indices:
+                pattern = await self.learn_grok_pattern(log_entries[index])
+                if pattern is None:
+                    unmatched.append(index)
+                else:
+                    results[index] = pattern.match(log_entries[index])
+            indices = unmatched
+
+        batches = self._claude_batches(log_entries, indices)
+        parsed_batches = await asyncio.gather(*(self._parse_claude_batch(log_entries, batch) for batch in batches),
+                                              return_exceptions=True)
+        for batch, parsed_batch in zip(batches, parsed_batches):
+            if isinstance(parsed_batch, asyncio.CancelledError):
+                raise parsed_batch
+            if isinstance(parsed_batch, Exception):
+                logger.error("Error parsing batch of %d log entries: %s", len(batch), parsed_batch)
+                parsed_batch = [{"parsing_error": str(parsed_batch), "raw_log": log_entries[index]}
+                                for index in batch]
+            for index, parsed_data in zip(batch, parsed_batch):
+                results[index] = parsed_data
+
+    async def _parse_claude_batch(self, log_entries, batch):
+        entries = [log_entries[index] for index in batch]
+        if len(entries) == 1:
+            outputs = [await self.claude_client.parse_log(entries[0])]
+        else:
+            outputs = await self.claude_client.parse_logs(entries, max_batch_tokens=self.max_batch_tokens)
+        return [self._cache_claude_output(entry, output) for entry, output in zip(entries, outputs)]
+
+    async def _read_stage(self, chunks, queue: asyncio.Queue):
+        # Each chunk is read on a worker thread. When cancelled, let the read in
+        # progress finish before closing the source so it is never closed while
+        # a thread is still inside it.
+        try:
+            while True:
+                read = asyncio.ensure_future(asyncio.to_thread(next, chunks, _DONE))
+                try:
+                    chunk = await asyncio.shield(read)
+                except asyncio.CancelledError:
+                    await asyncio.wait({read})
+                    raise
+                await queue.put(chunk)
+                if chunk is _DONE:
+                    return
+        except Exception as e:
+            await queue.put(_StageError(e))
+        finally:
+            chunks.close()
+
+    async def _parse_stage(self, read_queue: asyncio.Queue, parse_queue: asyncio.Queue, in_flight: set):
+        while True:
+            item = await read_queue.get()
+            if item is _DONE or isinstance(item, _StageError):
+                await parse_queue.put(item)
+                return
+            entries, checkpoint = item
+            task = asyncio.ensure_future(self._parse_entries(entries))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            await parse_queue.put((task, checkpoint))
+
+    async def _iter_pipeline(self, chunks):
+        """
+        Runs (entries, checkpoint) chunks from a blocking iterator through the
+        read and parse stages and yields (record, checkpoint) in input order,
+        where checkpoint is set on the last record of each chunk.
+        """
+        read_queue = asyncio.Queue(self.queue_size)
+        parse_queue = asyncio.Queue(self.max_in_flight)
+        in_flight = set()
+        reader = asyncio.ensure_future(self._read_stage(chunks, read_queue))
+        parser = asyncio.ensure_future(self._parse_stage(read_queue, parse_queue, in_flight))
+        try:
+            while True:
+                item = await parse_queue.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _StageError):
+                    raise item.error
+                task, checkpoint = item
+                records = await task
+                for position, record in enumerate(records, 1):
+                    yield record, checkpoint if position == len(records) else None
+        finally:
+            parser.cancel()
+            reader.cancel()
+            for task in list(in_flight):
+                task.cancel()
+            await asyncio.gather(reader, parser, *in_flight, return_exceptions=True)
+
+    def _chunk_entries(self, entries):
+        entries = iter(entries)
+        try:
+            while chunk := list(islice(entries, self.chunk_size)):
+                yield chunk, None
+        finally:
+            close = getattr(entries, "close", None)
+            if close is not None:
+                close()
+
+    def _chunk_segments(self, segments):
+        try:
+            while chunk := list(islice(segments, self.chunk_size)):
+                yield [entry for _, _, entry in chunk], chunk[-1][1]
+        finally:
+            segments.close()
+
+    async def parse_log_entry(self, log_entry):
+        try:
+            parsed_data = await self._parse_with_claude(log_entry)
+            if self.record_compactor is not None:
+                return self.record_compactor.compact(parsed_data)
+            return parsed_data
+        except Exception as e:
+            self.error_handler.handle_error(e, f"Error parsing single log entry: {log_entry}")
+
+    async def parse_entries(self, log_entries):
+        """
+        Parses a list of entries and returns the results in input order.
+        """
+        return await self._parse_entries(log_entries)
+
+    async def iter_parse_entries(self, log_entries):
+        """
+        Parses entries from any iterable (e.g. lines arriving from a socket
+        reader thread) through the bounded pipeline and yields the records.
+        """
+        async for record, _ in self._iter_pipeline(self._chunk_entries(log_entries)):
+            yield record
+
+    async def parse_log_file(self, file_path, since_offset=None, resume=False):
+        return [record async for record in self.iter_parse_log_file(file_path, since_offset=since_offset,
+                                                                    resume=resume)]
+
+    async def iter_parse_log_file(self, file_path, since_offset=None, resume=False):
+        """
+        Yields the parsed records of a file. since_offset and resume work as in
+        LogParsingSDK.iter_parse_log_file; with resume=True the checkpoint is
+        saved once every record of a chunk has been yielded.
+        """
+        try:
+            start_offset = await asyncio.to_thread(self._start_offset, file_path, since_offset, resume)
+            segments = self.input_handler.iter_log_file_with_offsets(file_path, start_offset)
+            async for record, checkpoint in self._iter_pipeline(self._chunk_segments(segments)):
+                yield record
+                if checkpoint is not None and resume and self.result_store is not None:
+                    await asyncio.to_thread(self.result_store.set_checkpoint, file_path, checkpoint)
+        except Exception as e:
+            self.error_handler.handle_error(e, f"Error processing log file: {file_path}")
+
+    async def parse_logs_from_directory(self, directory_path):
+        return [record async for record in self.iter_parse_logs_from_directory(directory_path)]
+
+    async def iter_parse_logs_from_directory(self, directory_path):
+        """
+        Yields the parsed records of every log file in a directory, file by
+        file in sorted order. Files are read in this process; use
+        LogParsingSDK.iter_parse_logs_from_directory for process sharding.
+        """
+        try:
+            file_paths = await asyncio.to_thread(self.input_handler.list_log_files, directory_path)
+            entries = (entry for file_path in file_paths for entry in self.input_handler.iter_log_file(file_path))
+            async for record, _ in self._iter_pipeline(self._chunk_entries(entries)):
+                yield record
+        except Exception as e:
+            self.error_handler.handle_error(e, f"Error processing directory: {directory_path}")
+
+    async def parse_pcap_file(self, file_path, max_packets=None, engine="native", protocols=None, ports=None,
+                              reassemble_tcp=True):
+        return [record async for record in self.iter_parse_pcap_file(file_path, max_packets, engine, protocols,
+                                                                     ports, reassemble_tcp)]
+
+    async def iter_parse_pcap_file(self, file_path, max_packets=None, engine="native", protocols=None, ports=None,
+                                   reassemble_tcp=True):
+        try:
+            payloads = self.input_handler.iter_pcap_file(file_path, max_packets, engine, protocols, ports,
+                                                         reassemble_tcp)
+            async for record, _ in self._iter_pipeline(self._chunk_entries(payloads)):
+                yield record
+        except Exception as e:
+            self.error_handler.handle_error(e, f"Error processing PCAP file: {file_path}")
+
+    async def follow_log_file(self, file_path, checkpoint_path=None, batch_size=100, max_batch_delay=0.5,
+                              poll_interval=1.0, start_at_end=False, stop_event=None, idle_timeout=None):
+        """
+        Async version of LogParsingSDK.follow_log_file. Reads run on a worker
+        thread and, while the file is idle, it polls every poll_interval
+        seconds with asyncio.sleep. stop_event may be an asyncio.Event or a
+        threading.Event.
+        """
+        from .log_follower import LogFollower
+
+        with LogFollower(file_path, checkpoint_path=checkpoint_path, poll_interval=poll_interval,
+                         start_at_end=start_at_end, use_inotify=False) as follower:
+            buffer = []
+            first_buffered = None
+            idle_since = time.monotonic()
+            while True:
+                entries = await asyncio.to_thread(follower.read_available, batch_size - len(buffer))
+                now = time.monotonic()
+                if entries:
+                    if not buffer:
+                        first_buffered = now
+                    buffer.extend(entry for _, _, entry in entries)
+                    idle_since = now
+                if buffer and (not entries or len(buffer) >= batch_size or now - first_buffered >= max_batch_delay):
+                    for record in await self._parse_entries(buffer):
+                        yield record
+                    await asyncio.to_thread(follower.checkpoint)
+                    buffer = []
+                    continue
+                if entries:
+                    continue
+                if stop_event is not None and stop_event.is_set():
+                    return
+                if idle_timeout is not None and now - idle_since >= idle_timeout:
+                    return
+                await asyncio.sleep(poll_interval)
+
+    async def _write(self, write, records, *args, **kwargs):
+        # The blocking writer runs on a worker thread and pulls chunks of
+        # records from a bounded queue, so a slow disk holds back the producer.
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(self.queue_size)
+
+        def blocking_records():
+            while True:
+                chunk = asyncio.run_coroutine_threadsafe(queue.get(), loop).result()
+                if chunk is _DONE:
+                    return
+                if isinstance(chunk, _StageError):
+                    raise chunk.error
+                yield from chunk
+
+        writer = asyncio.ensure_future(asyncio.to_thread(write, blocking_records(), *args, **kwargs))
+
+        async def put(chunk):
+            putting = asyncio.ensure_future(queue.put(chunk))
+            await asyncio.wait({putting, writer}, return_when=asyncio.FIRST_COMPLETED)
+            if not putting.done():
+                # The writer failed; surface its error.
+                putting.cancel()
+                await writer
+
+        try:
+            chunk = []
+            async for record in records:
+                chunk.append(record)
+                if len(chunk) >= self.chunk_size:
+                    await put(chunk)
+                    chunk = []
+            if chunk:
+                await put(chunk)
+            await put(_DONE)
+            return await writer
+        except BaseException as e:
+            # Unblock the writer thread with an error so it closes its output, and
+            # wait for it before propagating.
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_StageError(RuntimeError(f"Writing was aborted: {e!r}")))
+            await asyncio.gather(writer, return_exceptions=True)
+            raise
+
+    async def write_json_lines(self, records, output) -> int:
+        """
+        Writes records from an async iterable as JSON Lines (see
+        OutputFormatter.write_json_lines). Returns the number written.
+        """
+        return await self._write(self.output_formatter.write_json_lines, records, output)
+
+    async def write_csv_stream(self, records, output, **kwargs) -> int:
+        """
+        Writes records from an async iterable as CSV; keyword arguments are
+        passed to OutputFormatter.write_csv_stream.
+        """
+        return await self._write(self.output_formatter.write_csv_stream, records, output, **kwargs)
+
+    async def write_parquet(self, records, output, **kwargs) -> int:
+        """
+        Writes records from an async iterable as Parquet; keyword arguments are
+        passed to OutputFormatter.write_parquet.
+        """
+        return await self._write(self.output_formatter.write_parquet, records, output, **kwargs)
+
+    async def generate_grok_pattern(self, log_entry):
+        try:
+            return await self.claude_client.generate_grok_pattern_with_claude(log_entry)
+        except Exception as e:
+            self.error_handler.handle_error(e, f"Error generating Grok pattern for log entry: {log_entry}")
+
+    async def learn_grok_pattern(self, log_entry):
+        return self._register_grok_pattern(await self.generate_grok_pattern(log_entry), log_entry)
+
+    async def aclose(self):
+        if self._claude_client is not None:
+            await self._claude_client.aclose()
+        self._local_executor.shutdown(wait=False)
+        if self.result_store is not None:
+            self.result_store.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,139 @@
+import json as jsonlib
+import ssl
+import time
+import requests
+from .transport import TransportMetrics
+
+
+def _load_httpx():
+    try:
+        import httpx
+    except ImportError as e:
+        raise ImportError("The async API requires httpx: pip install log_parser_sdk[async]") from e
+    return httpx
+
+
+class AsyncResponse:
+    """
+    The parts of a requests.Response that ClaudeClient relies on, for a
+    response read by AsyncTransport. raise_for_status raises the same
+    requests.exceptions.HTTPError, so retry rules are shared.
+    """
+
+    def __init__(self, status_code: int, reason: str, headers: dict, content: bytes, url: str):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return jsonlib.loads(self.content)
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error: {self.reason} for url: {self.url}",
+                                                response=self)
+
+
+class AsyncTransport:
+    """
+    A keep-alive transport for the Claude API on a pooled httpx.AsyncClient,
+    with the same interface and metrics as PooledTransport but an awaitable
+    post(). Up to pool_maxsize idle connections are kept. Requires httpx
+    (pip install log_parser_sdk[async]), which is loaded on the first request.
+
+    It behaves like the requests session behind PooledTransport: proxies are
+    taken from HTTP_PROXY, HTTPS_PROXY, ALL_PROXY and NO_PROXY, redirects are
+    followed and 1xx interim responses are skipped. Failures surface as the
+    requests exceptions PooledTransport raises (ConnectTimeout, ReadTimeout,
+    ConnectionError, HTTPError), so retry rules are shared. A connection
+    whose request is cancelled or fails is closed rather than reused.
+    """
+
+    def __init__(self, pool_maxsize: int = 16, connect_timeout: float = 10.0, read_timeout: float = 60.0,
+                 keepalive: bool = True, verify=True):
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_maxsize = pool_maxsize
+        self.keepalive = keepalive
+        self.metrics = TransportMetrics()
+        # True, False, or the path of a CA bundle, as for requests.
+        self.verify = verify
+        self._client = None
+
+    def _ssl(self) -> ssl.SSLContext:
+        if self.verify is False:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            return context
+        if isinstance(self.verify, str):
+            return ssl.create_default_context(cafile=self.verify)
+        return ssl.create_default_context()
+
+    def _get_client(self):
+        if self._client is None:
+            httpx = _load_httpx()
+            limits = httpx.Limits(max_connections=None,
+                                  max_keepalive_connections=self.pool_maxsize if self.keepalive else 0)
+            self._client = httpx.AsyncClient(limits=limits, verify=self._ssl(), follow_redirects=True,
+                                             trust_env=True)
+        return self._client
+
+    def _connect_tracer(self, url: str):
+        # httpcore reports each new connection through the "trace" request extension.
+        done = "connection.start_tls.complete" if url.startswith("https:") else "connection.connect_tcp.complete"
+        started = []
+
+        async def trace(event: str, info: dict):
+            if event == "connection.connect_tcp.started":
+                started.append(time.perf_counter())
+            elif event == done and started:
+                self.metrics.record_connect(time.perf_counter() - started.pop())
+
+        return trace
+
+    async def post(self, url: str, headers: dict = None, json=None, timeout=None) -> AsyncResponse:
+        if timeout is None:
+            connect_timeout, read_timeout = self.timeout
+        elif isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+        else:
+            connect_timeout = read_timeout = timeout
+        client = self._get_client()
+        httpx = _load_httpx()
+
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, headers=headers, json=json,
+                                         timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                                         extensions={"trace": self._connect_tracer(url)})
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(f"Connecting to {url} timed out") from e
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(f"Reading from {url} timed out") from e
+        except httpx.TooManyRedirects as e:
+            raise requests.exceptions.TooManyRedirects(str(e)) from e
+        except httpx.ProxyError as e:
+            raise requests.exceptions.ProxyError(f"Proxy error for {url}: {e}") from e
+        except httpx.RequestError as e:
+            raise requests.exceptions.ConnectionError(f"Request to {url} failed: {e}") from e
+        finally:
+            self.metrics.record_request(time.perf_counter() - start)
+        return AsyncResponse(response.status_code, response.reason_phrase, dict(response.headers),
+                             response.content, str(response.url))
+
+    async def aclose(self):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
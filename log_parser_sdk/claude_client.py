@@ -1,134 +1,312 @@
+import logging
 import os
 import requests
 import json
-import re
 import time
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from .grok import clean_pattern
+from .instrumentation import metrics
+from .json_extract import extract_json_value, iter_json_values, loads
+from .prompts import BATCH_PARSE_SYSTEM_PROMPT, GROK_SYSTEM_PROMPT, PARSE_SYSTEM_PROMPT, PROMPT_VERSION
+from .rate_limiter import estimate_tokens
+from .token_budget import OutputBudget, TokenLedger
+from .transport import PooledTransport
+
+logger = logging.getLogger(__name__)
 
 class ClaudeClient:
-    def __init__(self, api_key):
+    def __init__(self, api_key, base_url=None, rate_limiter=None, result_store=None, transport=None,
+                 model="claude-3-opus-20240229", prompt_caching=True, ledger=None, output_budget=None):
         self.api_key = api_key
-        self.base_url = "https://api.anthropic.com/v1/messages"
+        self.base_url = base_url or "https://api.anthropic.com/v1/messages"
+        self.model = model
+        # Marks the static system block with cache_control so repeated requests read it from the prompt cache.
+        self.prompt_caching = prompt_caching
+        # Token usage and cost of every request, shared by all threads.
+        self.ledger = ledger or TokenLedger()
+        # Sizes max_tokens from the input length and the output sizes seen so far.
+        self.output_budget = output_budget or OutputBudget()
+        # Optional RateLimiter shared by every thread that uses this client.
+        self.rate_limiter = rate_limiter
+        # Optional ResultStore; entries it already holds are never sent again.
+        self.result_store = result_store
         self.headers = {
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01",
             "Content-Type": "application/json"
         }
-        self.timeout = 60  # seconds
+        # Keep-alive connection pool shared by every thread that uses this client.
+        self.transport = transport or PooledTransport()
+        self.timeout = None  # seconds; None uses the transport's connect/read timeouts
 
-    def _extract_json_from_response(self, text):
-        # First, try to find JSON within a markdown code block (```json ... ```)
-        match = re.search(r"```json\n(.*?)```", text, re.DOTALL)
-        if match:
-            json_str = match.group(1).strip()
-            try:
-                # Validate if the extracted string is indeed valid JSON
-                json.loads(json_str)
-                return json_str
-            except json.JSONDecodeError:
-                # If it's not valid JSON even within the block, fall through to broader search
-                pass
-
-        # If no markdown block, or if content within block was invalid, try to find a standalone JSON object/array
-        stack = []
-        json_start = -1
-        json_end = -1
-
-        for i, char in enumerate(text):
-            if char == '{' or char == '[':
-                if json_start == -1:
-                    json_start = i
-                stack.append(char)
-            elif char == '}' or char == ']':
-                if stack:
-                    last_open = stack.pop()
-                    if (char == '}' and last_open != '{') or (char == ']' and last_open != '['):
-                        stack = [] # Reset stack to avoid further issues
-                        json_start = -1 # Reset start
-                        continue
-                elif json_start != -1: # If we started a JSON, but this is an unmatched closing brace/bracket
-                    pass
-            
-            if json_start != -1 and not stack and (char == '}' or char == ']'):
-                json_end = i + 1
-                break
-        
-        if json_start != -1 and json_end != -1:
-            extracted_text = text[json_start:json_end]
-            try:
-                json.loads(extracted_text) # Final validation
-                return extracted_text
-            except json.JSONDecodeError:
-                pass
+    # Retried on timeouts, connection failures and HTTP errors (e.g. 429 and 529 overloaded).
+    RETRYABLE_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                        requests.exceptions.HTTPError)
+
+    def _build_payload(self, prompt, max_tokens, temperature, system):
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature
+        }
+        if system:
+            block = {"type": "text", "text": system}
+            if self.prompt_caching:
+                block["cache_control"] = {"type": "ephemeral"}
+            payload["system"] = [block]
+        return payload
 
-        print(f"Warning: Could not extract clean JSON. Returning empty object. Raw: {text[:200]}...")
-        return "{}"
+    def _read_response(self, response_data, kind, prompt_tokens, max_tokens, extract_json):
+        """
+        Records the usage of a Messages API response and decodes its text.
+        Returns (result, retry), where retry is True if the response was cut
+        off at max_tokens and should be sent again with the budget maximum.
+        """
+        usage = response_data.get("usage") or {}
+        truncated = response_data.get("stop_reason") == "max_tokens"
+        self.ledger.record_usage(usage, truncated)
+
+        if "content" in response_data and len(response_data["content"]) > 0:
+            claude_output = response_data["content"][0]["text"]
+            output_tokens = usage.get("output_tokens") or estimate_tokens(claude_output)
+            self.output_budget.observe(kind, prompt_tokens, output_tokens, truncated)
+            if truncated and max_tokens < self.output_budget.maximum:
+                logger.warning("Claude response was cut off at max_tokens=%d. Retrying with a larger budget.",
+                               max_tokens)
+                return None, True
+            if not extract_json:
+                return claude_output.strip(), False
+            with metrics.timer("json_extract"):
+                parsed = extract_json_value(claude_output)
+            if parsed is None:
+                logger.warning("Could not extract JSON. Returning empty object. Raw: %s...", claude_output[:200])
+                return {}, False
+            return parsed, False
+        logger.warning("Claude API response content is empty.")
+        return {} if extract_json else "", False
+
+    def _log_request_error(self, error, response=None):
+        if isinstance(error, requests.exceptions.HTTPError):
+            metrics.increment("claude_errors", error=f"http_{error.response.status_code}")
+            if error.response.status_code == 429: # Too Many Requests
+                logger.warning("Rate limit hit (HTTP 429). Retrying...")
+            else:
+                logger.warning("HTTP Error: %s - %s", error.response.status_code, error.response.text)
+        elif isinstance(error, requests.exceptions.Timeout):
+            metrics.increment("claude_errors", error="timeout")
+            logger.warning("Timeout Error: %s. Retrying...", error)
+        elif isinstance(error, requests.exceptions.ConnectionError):
+            metrics.increment("claude_errors", error="connection")
+            logger.warning("Connection Error: %s. Retrying...", error)
+        elif isinstance(error, json.JSONDecodeError):
+            metrics.increment("claude_errors", error="invalid_json")
+            logger.error("JSON Decode Error from Claude API response: %s. Raw response text: %s", error,
+                         response.text if response is not None else 'No response object')
+        else:
+            metrics.increment("claude_errors", error="request")
+            logger.error("Request Error: %s", error)
 
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=4, max=20),
-        retry=retry_if_exception_type((requests.exceptions.Timeout, requests.exceptions.ConnectionError, requests.exceptions.HTTPError))
+        retry=retry_if_exception_type(RETRYABLE_ERRORS)
     )
-    def _make_request(self, prompt, max_tokens=1000, temperature=0.7):
+    def _make_request(self, prompt, max_tokens=None, temperature=0.0, extract_json=True, system=None, kind="parse"):
         if not self.api_key:
             raise ValueError("Claude API key is not set. Please set the CLAUDE_API_KEY environment variable.")
 
-        payload = {
-            "model": "claude-3-opus-20240229",
-            "max_tokens": max_tokens,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": temperature
-        }
+        prompt_tokens = estimate_tokens(prompt)
+        if max_tokens is None:
+            max_tokens = self.output_budget.max_tokens(kind, prompt_tokens)
+        payload = self._build_payload(prompt, max_tokens, temperature, system)
 
+        if self.rate_limiter is not None:
+            with metrics.timer("rate_limit_wait"):
+                self.rate_limiter.acquire(prompt_tokens + (estimate_tokens(system) if system else 0) + max_tokens)
+
+        metrics.increment("claude_requests", kind=kind)
+        response = None
         try:
-            response = requests.post(self.base_url, headers=self.headers, json=payload, timeout=self.timeout)
+            with metrics.timer("network_wait"):
+                response = self.transport.post(self.base_url, headers=self.headers, json=payload, timeout=self.timeout)
             response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
-            response_data = response.json()
-            
-            if "content" in response_data and len(response_data["content"]) > 0:
-                claude_output = response_data["content"][0]["text"]
-                json_output = self._extract_json_from_response(claude_output)
-                return json_output
-            else:
-                print("Warning: Claude API response content is empty.")
-                return "{}"
-        except requests.exceptions.HTTPError as e:
-            print(f"HTTP Error: {e.response.status_code} - {e.response.text}")
-            if e.response.status_code == 429: # Too Many Requests
-                print("Rate limit hit. Retrying...")
-            raise
-        except requests.exceptions.Timeout as e:
-            print(f"Timeout Error: {e}. Retrying...")
-            raise
-        except requests.exceptions.ConnectionError as e:
-            print(f"Connection Error: {e}. Retrying...")
-            raise
-        except requests.exceptions.RequestException as e:
-            print(f"Request Error: {e}")
-            raise
-        except json.JSONDecodeError as e:
-            print(f"JSON Decode Error from Claude API response: {e}")
-            print(f"Raw response text: {response.text if 'response' in locals() else 'No response object'}")
+            result, retry_truncated = self._read_response(response.json(), kind, prompt_tokens, max_tokens,
+                                                          extract_json)
+        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+            self._log_request_error(e, response)
             raise
+        if retry_truncated:
+            return self._make_request(prompt, self.output_budget.maximum, temperature, extract_json, system, kind)
+        return result
 
-    def parse_log_with_claude(self, log_entry):
-        prompt = f"""You are a security log parsing assistant. Your task is to parse the following raw security log entry into a structured JSON object. Extract all relevant fields and their values. If a field is not explicitly present, you can infer it if possible, or omit it. Ensure the output is a valid JSON object, and do not include any conversational text outside the JSON. If you cannot parse it, return an empty JSON object {{}}.
-
-Raw Log Entry:
+    def _build_parse_prompt(self, log_entry):
+        return f"""Raw Log Entry:
 {log_entry}
 
 JSON Output:"""
-        return self._make_request(prompt)
-
-    def generate_grok_pattern_with_claude(self, log_entry):
-        prompt = f"""You are a security log parsing assistant. Your task is to generate a Grok pattern for the following raw security log entry. Provide only the Grok pattern string, without any additional text or explanations.
 
-Raw Log Entry:
+    def _build_grok_prompt(self, log_entry):
+        return f"""Raw Log Entry:
 {log_entry}
 
 Grok Pattern:"""
-        return self._make_request(prompt)
+
+    def _stored_result(self, log_entry):
+        if self.result_store is None:
+            return None
+        stored = self.result_store.get(log_entry)
+        return None if stored is None else loads(stored)
+
+    def _store_result(self, log_entry, result):
+        self.ledger.record_entries(1)
+        if self.result_store is not None and result:
+            self.result_store.put(log_entry, json.dumps(result))
+
+    def parse_log(self, log_entry):
+        """
+        Parses one log entry with Claude and returns the decoded JSON object
+        ({} if the response held none).
+        """
+        stored = self._stored_result(log_entry)
+        if stored is not None:
+            return stored
+        result = self._make_request(self._build_parse_prompt(log_entry), system=PARSE_SYSTEM_PROMPT)
+        self._store_result(log_entry, result)
+        return result
+
+    def parse_log_with_claude(self, log_entry):
+        """
+        Like parse_log, but returns the result as a JSON string.
+        """
+        return json.dumps(self.parse_log(log_entry))
+
+    def _build_batch_prompt(self, numbered_entries):
+        entries_block = "\n".join(f"[{entry_id}] {entry}" for entry_id, entry in numbered_entries)
+        return f"""Raw Log Entries:
+{entries_block}
+
+JSON Output:"""
+
+    def pack_batches(self, log_entries, max_batch_tokens=4000, max_batch_entries=20):
+        """
+        Groups entries into batches whose estimated prompt size stays within
+        max_batch_tokens. Returns lists of indices into log_entries.
+        """
+        preamble_tokens = estimate_tokens(BATCH_PARSE_SYSTEM_PROMPT) + estimate_tokens(self._build_batch_prompt([]))
+        batches = []
+        current = []
+        current_tokens = preamble_tokens
+        for index, entry in enumerate(log_entries):
+            entry_tokens = estimate_tokens(entry) + 4
+            if current and (current_tokens + entry_tokens > max_batch_tokens or len(current) >= max_batch_entries):
+                batches.append(current)
+                current = []
+                current_tokens = preamble_tokens
+            current.append(index)
+            current_tokens += entry_tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def parse_logs(self, log_entries, max_batch_tokens=4000, max_batch_entries=20):
+        """
+        Parses many log entries with as few requests as possible. Entries are
+        packed into numbered multi-entry prompts and Claude's JSON array is
+        mapped back by ID. Batches with missing or malformed items are split
+        and retried; a single leftover entry falls back to parse_log.
+        Returns one decoded JSON object per entry, in input order.
+        """
+        log_entries = list(log_entries)
+        results, remaining = self._stored_results(log_entries)
+        for batch in self._pack_remaining(log_entries, remaining, max_batch_tokens, max_batch_entries):
+            self._parse_batch(log_entries, batch, results)
+        self._store_results(log_entries, remaining, results)
+        return results
+
+    def _stored_results(self, log_entries):
+        """
+        Returns (results, remaining): the stored result of each entry (None if
+        there is none) and the indices of the entries still to be parsed.
+        """
+        if self.result_store is not None:
+            results = [None if stored is None else loads(stored) for stored in self.result_store.get_many(log_entries)]
+        else:
+            results = [None] * len(log_entries)
+        return results, [index for index, result in enumerate(results) if result is None]
+
+    def _pack_remaining(self, log_entries, remaining, max_batch_tokens, max_batch_entries):
+        packed = self.pack_batches([log_entries[index] for index in remaining], max_batch_tokens, max_batch_entries)
+        return [[remaining[index] for index in batch] for batch in packed]
+
+    def _store_results(self, log_entries, remaining, results):
+        if self.result_store is not None:
+            self.result_store.put_many(
+                (log_entries[index], json.dumps(results[index])) for index in remaining if results[index]
+            )
+
+    def parse_logs_batch(self, log_entries, max_batch_tokens=4000, max_batch_entries=20):
+        """
+        Like parse_logs, but returns one JSON string per entry.
+        """
+        return [json.dumps(result) for result in self.parse_logs(log_entries, max_batch_tokens, max_batch_entries)]
+
+    def _batch_items(self, response_text):
+        """
+        Yields the {"id": ..., "parsed": ...} items of a batch response. Items
+        may arrive in one array, in an object wrapping the array, or as several
+        separate arrays or objects; complete items of a truncated array are
+        still found.
+        """
+        for value in iter_json_values(response_text):
+            if isinstance(value, dict) and "id" not in value:
+                value = next((inner for inner in value.values() if isinstance(inner, list)), [])
+            yield from value if isinstance(value, list) else [value]
+
+    def _parse_batch(self, log_entries, indices, results):
+        if len(indices) == 1:
+            results[indices[0]] = self.parse_log(log_entries[indices[0]])
+            return
+
+        prompt = self._build_batch_prompt([(index, log_entries[index]) for index in indices])
+        response_text = self._make_request(prompt, extract_json=False, system=BATCH_PARSE_SYSTEM_PROMPT, kind="batch")
+        for retry_indices in self._apply_batch_response(response_text, indices, results):
+            self._parse_batch(log_entries, retry_indices, results)
+
+    def _apply_batch_response(self, response_text, indices, results):
+        """
+        Fills results from a batch response and returns the batches to retry
+        for the entries it missed: all of them together if some entries were
+        answered, otherwise split in two halves.
+        """
+        wanted = set(indices)
+        with metrics.timer("json_extract"):
+            items = list(self._batch_items(response_text))
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get("parsed"), dict):
+                continue
+            try:
+                entry_id = int(item.get("id"))
+            except (TypeError, ValueError):
+                continue
+            if entry_id in wanted and results[entry_id] is None:
+                results[entry_id] = item["parsed"]
+                self.ledger.record_entries(1)
+
+        missing = [index for index in indices if results[index] is None]
+        if not missing:
+            return []
+        logger.warning("Claude batch response was missing %d of %d entries. Splitting and retrying.",
+                       len(missing), len(indices))
+        if len(missing) < len(indices):
+            return [missing]
+        middle = len(missing) // 2
+        return [missing[:middle], missing[middle:]]
+
+    def generate_grok_pattern_with_claude(self, log_entry):
+        prompt = self._build_grok_prompt(log_entry)
+        return clean_pattern(self._make_request(prompt, extract_json=False, system=GROK_SYSTEM_PROMPT, kind="grok"))
 
 
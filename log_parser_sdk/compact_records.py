@@ -0,0 +1,150 @@
+from collections.abc import Mapping
+
+
+class RecordSchema:
+    """
+    The field names of a record layout, in order, with their positions.
+    RecordCompactor hands out one shared instance per layout, so a million
+    records of the same PAN-OS type or learned template hold one set of key
+    strings and one index between them.
+    """
+
+    __slots__ = ("fields", "index")
+
+    def __init__(self, fields: tuple[str, ...]):
+        self.fields = fields
+        self.index = {name: position for position, name in enumerate(fields)}
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __repr__(self):
+        return f"RecordSchema({self.fields!r})"
+
+
+class CompactRecord(Mapping):
+    """
+    A read-only record stored as a shared RecordSchema and a tuple of values.
+
+    It is a Mapping, so lookups, iteration, `in`, get(), items(), dict(record)
+    and comparison with plain dicts work as they do for the dict it was built
+    from; nested records are CompactRecords too. Use to_dict() for a mutable
+    copy. The JSON, CSV and Parquet writers accept it directly; elsewhere,
+    pass json.dumps(default=record_default).
+    """
+
+    __slots__ = ("schema", "values")
+
+    def __init__(self, schema: RecordSchema, values: tuple):
+        self.schema = schema
+        self.values = values
+
+    def __getitem__(self, key):
+        return self.values[self.schema.index[key]]
+
+    def __iter__(self):
+        return iter(self.schema.fields)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, key):
+        return key in self.schema.index
+
+    def get(self, key, default=None):
+        position = self.schema.index.get(key)
+        return default if position is None else self.values[position]
+
+    def to_dict(self) -> dict:
+        """
+        Returns the record as a plain dict, converting nested records too.
+        """
+        return {name: value.to_dict() if isinstance(value, CompactRecord) else value
+                for name, value in zip(self.schema.fields, self.values)}
+
+    def __reduce__(self):
+        return CompactRecord, (self.schema, self.values)
+
+    def __repr__(self):
+        return f"CompactRecord({self.to_dict()!r})"
+
+
+def record_default(value):
+    """
+    `default` hook for json.dumps that serializes CompactRecords as objects.
+    """
+    if isinstance(value, CompactRecord):
+        return dict(zip(value.schema.fields, value.values))
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class RecordCompactor:
+    """
+    Converts parsed records (dicts) into CompactRecords.
+
+    Records with the same keys in the same order share one RecordSchema, and
+    nested dicts are compacted the same way. String values are interned per
+    field while the field has seen at most max_distinct different values, so
+    low-cardinality columns (log type, action, zone, application, device
+    name) hold one string object per distinct value instead of one per
+    record. Fields that exceed the limit, such as addresses and session IDs,
+    stop being interned and their table is dropped. Strings longer than
+    max_intern_length are never interned.
+
+    One compactor should be shared by every record of a run; its schemas and
+    tables live as long as it does.
+    """
+
+    def __init__(self, max_distinct: int = 1024, max_intern_length: int = 64):
+        self.max_distinct = max_distinct
+        self.max_intern_length = max_intern_length
+        self._schemas = {}
+        # Field name -> {value: value}, or None once the field has too many values.
+        self._interned = {}
+
+    @property
+    def schema_count(self) -> int:
+        return len(self._schemas)
+
+    def schema_for(self, fields: tuple[str, ...]) -> RecordSchema:
+        schema = self._schemas.get(fields)
+        if schema is None:
+            schema = self._schemas[fields] = RecordSchema(fields)
+        return schema
+
+    def compact(self, record):
+        """
+        Returns record as a CompactRecord. Anything that is not a dict (None,
+        an existing CompactRecord) is returned unchanged.
+        """
+        if type(record) is not dict:
+            return record
+        fields = tuple(record)
+        values = []
+        interned = self._interned
+        for name, value in record.items():
+            value_type = type(value)
+            if value_type is str:
+                if len(value) <= self.max_intern_length:
+                    table = interned.get(name, ())
+                    if table is not None:
+                        value = self._intern(name, table, value)
+            elif value_type is dict:
+                value = self.compact(value)
+            values.append(value)
+        return CompactRecord(self.schema_for(fields), tuple(values))
+
+    def _intern(self, name: str, table, value: str) -> str:
+        if table == ():
+            table = self._interned[name] = {}
+        existing = table.get(value)
+        if existing is not None:
+            return existing
+        if len(table) >= self.max_distinct:
+            self._interned[name] = None
+            return value
+        table[value] = value
+        return value
+
+    def compact_all(self, records) -> list:
+        return [self.compact(record) for record in records]
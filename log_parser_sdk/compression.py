@@ -0,0 +1,385 @@
+from __future__ import annotations
+import io
+import mmap
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Leading bytes of each supported format. A zstd file may also start with a skippable frame.
+MAGIC_BYTES = {
+    "gzip": (b"\x1f\x8b",),
+    "bz2": (b"BZh",),
+    "xz": (b"\xfd7zXZ\x00",),
+    "zstd": (b"\x28\xb5\x2f\xfd",) + tuple(bytes([0x50 + i, 0x2a, 0x4d, 0x18]) for i in range(16)),
+}
+# Suffixes of compressed files picked up from log directories, e.g. rotated messages.1.gz.
+COMPRESSED_EXTENSIONS = ('.gz', '.bz2', '.xz', '.zst')
+
+_READ_SIZE = 256 * 1024
+_CHUNK_SIZE = 1024 * 1024
+# Decompressed bytes that parallel decompression may hold at once, finished or still decoding.
+_MAX_BUFFER_BYTES = 64 * 1024 * 1024
+# Parallel decompression only pays off with a few threads, and each one adds to the memory held.
+_MAX_DEFAULT_WORKERS = 4
+# Upper bound on the output of one decompress call, so highly compressible input stays in small pieces.
+_OUTPUT_SIZE = 1024 * 1024
+# A gzip member header: magic, deflate and reserved flag bits clear.
+_GZIP_MEMBER = b"\x1f\x8b\x08"
+_ZSTD_FRAME = b"\x28\xb5\x2f\xfd"
+
+
+def _load_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("Reading .zst files requires zstandard: pip install log_parser_sdk[zstd]") from e
+    return zstandard
+
+
+def detect_codec(file_path: str) -> str | None:
+    """
+    Returns "gzip", "bz2", "xz" or "zstd" when the file starts with that
+    format's magic bytes, and None otherwise. The file name is not consulted.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(6)
+    for codec, prefixes in MAGIC_BYTES.items():
+        if header.startswith(prefixes):
+            return codec
+    return None
+
+
+def iter_decompressed(file_path: str, codec: str = None, workers: int = None, chunk_size: int = _CHUNK_SIZE,
+                      max_buffer_bytes: int = _MAX_BUFFER_BYTES):
+    """
+    Yields the decompressed bytes of a file piece by piece, so neither the
+    file nor its contents are ever held in memory whole. Concatenated gzip
+    members, bz2 and xz streams and zstd frames are read one after another,
+    like zcat does. A file that is not compressed is yielded as it is.
+
+    Files of several gzip members or zstd frames that are larger than two
+    chunks are decompressed on `workers` threads (default: one per CPU, up
+    to 4), a chunk_size of compressed input at a time, and yielded in order.
+    zlib and zstd release the GIL while they work. The output of the chunks
+    in flight is kept under max_buffer_bytes: a chunk whose share would be
+    exceeded, such as a run of zeros, is decompressed as a stream on this
+    thread instead. A single-member gzip file, e.g. from plain `gzip`,
+    cannot be split and is decompressed on this thread.
+    """
+    codec = detect_codec(file_path) if codec is None else codec
+    workers = min(_MAX_DEFAULT_WORKERS, os.cpu_count() or 1) if workers is None else workers
+    # Leave each chunk in flight room for at least four times its compressed size.
+    workers = min(workers, max_buffer_bytes // (4 * chunk_size))
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return
+        if codec is None:
+            while True:
+                data = f.read(_OUTPUT_SIZE)
+                if not data:
+                    return
+                yield data
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            parallel = workers > 1 and size > 2 * chunk_size
+            if codec == "gzip":
+                if parallel:
+                    yield from _iter_gzip_parallel(mm, size, workers, chunk_size, max_buffer_bytes // workers)
+                else:
+                    yield from _decode_gzip_members(mm, 0, size)
+            elif codec == "zstd":
+                if parallel:
+                    yield from _iter_zstd_parallel(mm, size, workers, chunk_size, max_buffer_bytes // workers)
+                else:
+                    yield from _iter_zstd(mm)
+            elif codec == "bz2":
+                import bz2
+
+                yield from _decode_streams(mm, size, bz2.BZ2Decompressor, MAGIC_BYTES["bz2"])
+            elif codec == "xz":
+                import lzma
+
+                yield from _decode_streams(mm, size, lzma.LZMADecompressor, MAGIC_BYTES["xz"])
+            else:
+                raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def open_decompressed(file_path: str, workers: int = None, chunk_size: int = _CHUNK_SIZE,
+                      max_buffer_bytes: int = _MAX_BUFFER_BYTES) -> io.BufferedReader:
+    """
+    Opens a file for binary reading through iter_decompressed, detecting the
+    codec from its magic bytes. Iterating over it yields lines.
+    """
+    pieces = iter_decompressed(file_path, None, workers, chunk_size, max_buffer_bytes)
+    return io.BufferedReader(DecompressedReader(pieces), _READ_SIZE)
+
+
+class DecompressedReader(io.RawIOBase):
+    """
+    A read-only raw stream over an iterator of byte strings, such as
+    iter_decompressed. Closing it closes the iterator.
+    """
+
+    def __init__(self, pieces):
+        self._pieces = iter(pieces)
+        self._buffer = b""
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._position >= len(self._buffer):
+            self._buffer = next(self._pieces, None)
+            self._position = 0
+            if self._buffer is None:
+                self._buffer = b""
+                return 0
+        count = min(len(buffer), len(self._buffer) - self._position)
+        buffer[:count] = self._buffer[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def close(self):
+        if not self.closed:
+            close = getattr(self._pieces, "close", None)
+            if close is not None:
+                close()
+        super().close()
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def _collect(output: list, generator):
+    # Appends the items of a generator to output and returns its return value.
+    while True:
+        try:
+            output.append(next(generator))
+        except StopIteration as stop:
+            return stop.value
+
+
+def _decode_gzip_members(mm, start: int, stop: int, budget: int = None):
+    # Decodes the gzip members that begin in [start, stop), yielding their output, and returns the offset where
+    # the last one ends. Zero padding after a member ends the file, as in gzip. With a budget, raises
+    # _BudgetExceeded once more than that many bytes have been produced.
+    size = len(mm)
+    position = start
+    produced = 0
+    while position < stop:
+        if mm[position:position + 2] != b"\x1f\x8b":
+            if mm[position:position + 2] and mm[position:position + _READ_SIZE].strip(b"\x00"):
+                raise zlib.error(f"Trailing garbage at offset {position}")
+            return size
+        decompressor = zlib.decompressobj(31)
+        while not decompressor.eof:
+            if position >= size:
+                raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+            data = mm[position:position + _READ_SIZE]
+            position += len(data)
+            while data and not decompressor.eof:
+                # Under a budget, never decode more than one byte past it.
+                limit = _OUTPUT_SIZE if budget is None else min(_OUTPUT_SIZE, budget - produced + 1)
+                output = decompressor.decompress(data, limit)
+                data = decompressor.unconsumed_tail
+                if output:
+                    produced += len(output)
+                    if budget is not None and produced > budget:
+                        raise _BudgetExceeded
+                    yield output
+        # Input past the end of the member is in unused_data.
+        position -= len(decompressor.unused_data)
+    return position
+
+
+def _decode_gzip_chunk(mm, start: int, stop: int, budget: int):
+    # Finds the first real member header in [start, stop) and decodes the members that begin before stop.
+    # Returns (member start, end offset, output pieces), or None if no member begins in the range or the
+    # members produce more than budget bytes. A header found inside deflate data almost never decodes, and when it
+    # does, the merge in _iter_gzip_parallel notices that it is not where the previous member ended.
+    candidate = mm.find(_GZIP_MEMBER, start, stop)
+    while candidate != -1:
+        try:
+            output = []
+            end = _collect(output, _decode_gzip_members(mm, candidate, stop, budget))
+            return candidate, end, output
+        except (zlib.error, EOFError):
+            candidate = mm.find(_GZIP_MEMBER, candidate + 1, stop)
+        except _BudgetExceeded:
+            return None
+    return None
+
+
+def _iter_gzip_parallel(mm, size: int, workers: int, chunk_size: int, budget: int):
+    # The file is cut into chunks of chunk_size compressed bytes. Threads decode the members that begin in
+    # chunks 1, 2, ... while this thread streams chunk 0; results are then taken in order, and whenever a
+    # chunk's result does not start where the previous member ended (a member spanning chunks, output over
+    # budget, a false header), the members beginning in that chunk are decoded here instead. At most
+    # `workers` chunks are in flight, so at most workers * budget bytes are held.
+    bounds = [(offset, min(offset + chunk_size, size)) for offset in range(0, size, chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        submitted = 1
+        position = 0
+        for index, (chunk_start, chunk_stop) in enumerate(bounds):
+            while submitted < len(bounds) and len(pending) < workers:
+                pending.append(executor.submit(_decode_gzip_chunk, mm, *bounds[submitted], budget))
+                submitted += 1
+            result = pending.popleft().result() if index else None
+            if position >= chunk_stop:
+                continue
+            if result is not None and result[0] == position:
+                yield from result[2]
+                position = result[1]
+            else:
+                position = yield from _decode_gzip_members(mm, position, chunk_stop)
+        for future in pending:
+            future.cancel()
+
+
+def _zstd_frames(mm, size: int):
+    # Yields the (start, end, content size) of the zstd frames of a file by walking frame and block headers,
+    # without decompressing anything. The content size is None when the frame header leaves it out.
+    # Skippable frames are left out.
+    position = 0
+    while position < size:
+        magic = mm[position:position + 4]
+        if len(magic) == 4 and magic[1:] == b"\x2a\x4d\x18" and magic[0] & 0xf0 == 0x50:
+            position += 8 + int.from_bytes(mm[position + 4:position + 8], "little")
+            continue
+        if magic != _ZSTD_FRAME:
+            if mm[position:position + _READ_SIZE].strip(b"\x00"):
+                raise ValueError(f"Not a zstd frame at offset {position}")
+            return
+        descriptor = mm[position + 4]
+        single_segment = descriptor >> 5 & 1
+        content_size_bytes = (1 if single_segment else 0, 2, 4, 8)[descriptor >> 6]
+        frame_start = position
+        position += 5 + (0 if single_segment else 1) + (0, 1, 2, 4)[descriptor & 3]
+        content_size = None
+        if content_size_bytes:
+            content_size = int.from_bytes(mm[position:position + content_size_bytes], "little")
+            content_size += 256 if content_size_bytes == 2 else 0
+        position += content_size_bytes
+        while True:
+            header = int.from_bytes(mm[position:position + 3], "little")
+            block_type = header >> 1 & 3
+            if block_type == 3:
+                raise ValueError(f"Corrupt zstd block at offset {position}")
+            position += 3 + (1 if block_type == 1 else header >> 3)
+            if header & 1:
+                break
+        position += 4 if descriptor & 4 else 0
+        if position > size:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+        yield frame_start, position, content_size
+
+
+def _zstd_groups(mm, size: int, chunk_size: int, budget: int) -> list[list]:
+    # Groups consecutive frames into about chunk_size compressed bytes and at most budget decompressed bytes.
+    # A frame of unknown or larger content size is a group of its own, marked by a content size of None.
+    groups = []
+    output = 0
+    for start, end, content_size in _zstd_frames(mm, size):
+        if content_size is None or content_size > budget:
+            groups.append([(start, end, None)])
+            continue
+        group = groups[-1] if groups else None
+        if (group is None or group[0][2] is None or group[-1][1] - group[0][0] >= chunk_size
+                or output + content_size > budget):
+            group = []
+            groups.append(group)
+            output = 0
+        group.append((start, end, content_size))
+        output += content_size
+    return groups
+
+
+def _decode_zstd_frames(zstandard, mm, frames: list[tuple[int, int, int]]) -> list[bytes]:
+    # Each call gets its own decompression context, so calls can run on different threads.
+    context = zstandard.ZstdDecompressor()
+    output = []
+    for start, end, _ in frames:
+        decompressor = context.decompressobj()
+        output.append(decompressor.decompress(mm[start:end]))
+        if not decompressor.eof:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+    return output
+
+
+def _iter_zstd_parallel(mm, size: int, workers: int, chunk_size: int, budget: int):
+    # At most `workers` groups are in flight, so at most workers * budget bytes are held. Frames too large
+    # for a group are streamed on this thread once the groups before them have been yielded.
+    zstandard = _load_zstandard()
+    groups = _zstd_groups(mm, size, chunk_size, budget)
+    if len(groups) < 2:
+        yield from _iter_zstd(mm)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for group in groups:
+            if group[0][2] is None:
+                while pending:
+                    yield from pending.popleft().result()
+                yield from _iter_zstd(_MappedSlice(mm, group[0][0], group[0][1]))
+                continue
+            if len(pending) >= workers:
+                yield from pending.popleft().result()
+            pending.append(executor.submit(_decode_zstd_frames, zstandard, mm, group))
+        while pending:
+            yield from pending.popleft().result()
+
+
+class _MappedSlice:
+    """
+    A file-like reader over mm[start:end], so one frame can be streamed
+    without copying it out of the map.
+    """
+
+    def __init__(self, mm, start: int, end: int):
+        self._mm = mm
+        self._position = start
+        self._end = end
+
+    def read(self, size: int = -1) -> bytes:
+        stop = self._end if size < 0 else min(self._end, self._position + size)
+        data = self._mm[self._position:stop]
+        self._position += len(data)
+        return data
+
+
+def _iter_zstd(source):
+    zstandard = _load_zstandard()
+    with zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True, closefd=False) as reader:
+        while True:
+            data = reader.read(_OUTPUT_SIZE)
+            if not data:
+                return
+            yield data
+
+
+def _decode_streams(mm, size: int, new_decompressor, magic: tuple[bytes, ...]):
+    # Decodes concatenated bz2 or xz streams.
+    position = 0
+    while position < size:
+        if not mm[position:position + 6].startswith(magic):
+            if mm[position:position + _READ_SIZE].strip(b"\x00"):
+                raise OSError(f"Trailing garbage at offset {position}")
+            return
+        decompressor = new_decompressor()
+        while not decompressor.eof:
+            if position >= size:
+                raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+            data = mm[position:position + _READ_SIZE]
+            position += len(data)
+            output = decompressor.decompress(data, _OUTPUT_SIZE)
+            while True:
+                if output:
+                    yield output
+                if decompressor.eof or decompressor.needs_input:
+                    break
+                output = decompressor.decompress(b"", _OUTPUT_SIZE)
+        position -= len(decompressor.unused_data)
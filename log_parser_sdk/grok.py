@@ -0,0 +1,314 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Core subset of the Logstash grok-patterns library. Patterns may reference
+# each other with %{NAME}; they are expanded when a pattern is compiled.
+BASE_PATTERNS = {
+    "USERNAME": r"[a-zA-Z0-9._-]+",
+    "USER": r"%{USERNAME}",
+    "EMAILLOCALPART": r"[a-zA-Z][a-zA-Z0-9_.+-=:]+",
+    "EMAILADDRESS": r"%{EMAILLOCALPART}@%{HOSTNAME}",
+    "INT": r"(?:[+-]?(?:[0-9]+))",
+    "BASE10NUM": r"(?<![0-9.+-])(?:[+-]?(?:[0-9]+(?:\.[0-9]+)?|\.[0-9]+))",
+    "NUMBER": r"(?:%{BASE10NUM})",
+    "BASE16NUM": r"(?<![0-9A-Fa-f])(?:[+-]?(?:0x)?(?:[0-9A-Fa-f]+))",
+    "BASE16FLOAT": r"\b(?<![0-9A-Fa-f.])(?:[+-]?(?:0x)?(?:(?:[0-9A-Fa-f]+(?:\.[0-9A-Fa-f]*)?)|(?:\.[0-9A-Fa-f]+)))\b",
+    "POSINT": r"\b(?:[1-9][0-9]*)\b",
+    "NONNEGINT": r"\b(?:[0-9]+)\b",
+    "WORD": r"\b\w+\b",
+    "NOTSPACE": r"\S+",
+    "SPACE": r"\s*",
+    "DATA": r".*?",
+    "GREEDYDATA": r".*",
+    "QUOTEDSTRING": r"(?:\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'|`(?:[^`\\]|\\.)*`)",
+    "QS": r"%{QUOTEDSTRING}",
+    "UUID": r"[A-Fa-f0-9]{8}-(?:[A-Fa-f0-9]{4}-){3}[A-Fa-f0-9]{12}",
+    "MAC": r"(?:%{CISCOMAC}|%{WINDOWSMAC}|%{COMMONMAC})",
+    "CISCOMAC": r"(?:(?:[A-Fa-f0-9]{4}\.){2}[A-Fa-f0-9]{4})",
+    "WINDOWSMAC": r"(?:(?:[A-Fa-f0-9]{2}-){5}[A-Fa-f0-9]{2})",
+    "COMMONMAC": r"(?:(?:[A-Fa-f0-9]{2}:){5}[A-Fa-f0-9]{2})",
+    "IPV6": r"(?:(?:[0-9A-Fa-f]{1,4}:){7}[0-9A-Fa-f]{1,4}|(?:[0-9A-Fa-f]{1,4}:){1,7}:|(?:[0-9A-Fa-f]{1,4}:){1,6}:[0-9A-Fa-f]{1,4}|(?:[0-9A-Fa-f]{1,4}:){1,5}(?::[0-9A-Fa-f]{1,4}){1,2}|(?:[0-9A-Fa-f]{1,4}:){1,4}(?::[0-9A-Fa-f]{1,4}){1,3}|(?:[0-9A-Fa-f]{1,4}:){1,3}(?::[0-9A-Fa-f]{1,4}){1,4}|(?:[0-9A-Fa-f]{1,4}:){1,2}(?::[0-9A-Fa-f]{1,4}){1,5}|[0-9A-Fa-f]{1,4}:(?::[0-9A-Fa-f]{1,4}){1,6}|:(?::[0-9A-Fa-f]{1,4}){1,7}|::)",
+    "IPV4": r"(?<![0-9])(?:(?:25[0-5]|2[0-4][0-9]|[0-1]?[0-9]{1,2})\.){3}(?:25[0-5]|2[0-4][0-9]|[0-1]?[0-9]{1,2})(?![0-9])",
+    "IP": r"(?:%{IPV6}|%{IPV4})",
+    "HOSTNAME": r"\b(?:[0-9A-Za-z][0-9A-Za-z-]{0,62})(?:\.(?:[0-9A-Za-z][0-9A-Za-z-]{0,62}))*(?:\.?|\b)",
+    "IPORHOST": r"(?:%{IP}|%{HOSTNAME})",
+    "HOSTPORT": r"%{IPORHOST}:%{POSINT}",
+    "UNIXPATH": r"(?:/[\w_%!$@:.,+~-]*)+",
+    "WINPATH": r"(?:[A-Za-z]+:|\\)(?:\\[^\\?*]*)+",
+    "PATH": r"(?:%{UNIXPATH}|%{WINPATH})",
+    "URIPROTO": r"[A-Za-z](?:[A-Za-z0-9+\-.]+)+",
+    "URIHOST": r"%{IPORHOST}(?::%{POSINT})?",
+    "URIPATH": r"(?:/[A-Za-z0-9$.+!*'(){},~:;=@#%&_\-]*)+",
+    "URIPARAM": r"\?[A-Za-z0-9$.+!*'|(){},~@#%&/=:;_?\-\[\]<>]*",
+    "URIPATHPARAM": r"%{URIPATH}(?:%{URIPARAM})?",
+    "URI": r"%{URIPROTO}://(?:%{USER}(?::[^@]*)?@)?(?:%{URIHOST})?(?:%{URIPATHPARAM})?",
+    "MONTH": r"\b(?:[Jj]an(?:uary)?|[Ff]eb(?:ruary)?|[Mm]ar(?:ch)?|[Aa]pr(?:il)?|[Mm]ay|[Jj]un(?:e)?|[Jj]ul(?:y)?|[Aa]ug(?:ust)?|[Ss]ep(?:tember)?|[Oo]ct(?:ober)?|[Nn]ov(?:ember)?|[Dd]ec(?:ember)?)\b",
+    "MONTHNUM": r"(?:0?[1-9]|1[0-2])",
+    "MONTHNUM2": r"(?:0[1-9]|1[0-2])",
+    "MONTHDAY": r"(?:(?:0[1-9])|(?:[12][0-9])|(?:3[01])|[1-9])",
+    "DAY": r"(?:Mon(?:day)?|Tue(?:sday)?|Wed(?:nesday)?|Thu(?:rsday)?|Fri(?:day)?|Sat(?:urday)?|Sun(?:day)?)",
+    "YEAR": r"(?:\d\d){1,2}",
+    "HOUR": r"(?:2[0123]|[01]?[0-9])",
+    "MINUTE": r"(?:[0-5][0-9])",
+    "SECOND": r"(?:(?:[0-5]?[0-9]|60)(?:[:.,][0-9]+)?)",
+    "TIME": r"(?<![0-9])%{HOUR}:%{MINUTE}(?::%{SECOND})(?![0-9])",
+    "DATE_US": r"%{MONTHNUM}[/-]%{MONTHDAY}[/-]%{YEAR}",
+    "DATE_EU": r"%{MONTHDAY}[./-]%{MONTHNUM}[./-]%{YEAR}",
+    "DATE_YMD": r"%{YEAR}[/-]%{MONTHNUM}[/-]%{MONTHDAY}",
+    "ISO8601_TIMEZONE": r"(?:Z|[+-]%{HOUR}(?::?%{MINUTE}))",
+    "ISO8601_SECOND": r"%{SECOND}",
+    "TIMESTAMP_ISO8601": r"%{YEAR}-%{MONTHNUM}-%{MONTHDAY}[T ]%{HOUR}:?%{MINUTE}(?::?%{SECOND})?%{ISO8601_TIMEZONE}?",
+    "DATE": r"(?:%{DATE_US}|%{DATE_EU})",
+    "DATESTAMP": r"%{DATE}[- ]%{TIME}",
+    "TZ": r"(?:[APMCE][SD]T|UTC)",
+    "HTTPDATE": r"%{MONTHDAY}/%{MONTH}/%{YEAR}:%{TIME} %{INT}",
+    "SYSLOGTIMESTAMP": r"%{MONTH} +%{MONTHDAY} %{TIME}",
+    "PROG": r"[\x21-\x5a\x5c\x5e-\x7e]+",
+    "SYSLOGPROG": r"%{PROG:program}(?:\[%{POSINT:pid}\])?",
+    "SYSLOGHOST": r"%{IPORHOST}",
+    "SYSLOGFACILITY": r"<%{NONNEGINT:facility}.%{NONNEGINT:priority}>",
+    "SYSLOGBASE": r"%{SYSLOGTIMESTAMP:timestamp} (?:%{SYSLOGFACILITY} )?%{SYSLOGHOST:logsource} %{SYSLOGPROG}:",
+    "LOGLEVEL": r"(?:[Aa]lert|ALERT|[Tt]race|TRACE|[Dd]ebug|DEBUG|[Nn]otice|NOTICE|[Ii]nfo(?:rmation)?|INFO(?:RMATION)?|[Ww]arn(?:ing)?|WARN(?:ING)?|[Ee]rr(?:or)?|ERR(?:OR)?|[Cc]rit(?:ical)?|CRIT(?:ICAL)?|[Ff]atal|FATAL|[Ss]evere|SEVERE|EMERG(?:ENCY)?|[Ee]merg(?:ency)?)",
+}
+
+_GROK_REFERENCE = re.compile(r"%\{(?P<syntax>[A-Za-z0-9_]+)(?::(?P<semantic>[^:}]+))?(?::(?P<type>[A-Za-z]+))?\}")
+_INLINE_NAMED_GROUP = re.compile(r"\(\?<(?P<name>[A-Za-z_][A-Za-z0-9_@\[\]]*)>")
+
+_CONVERTERS = {
+    "int": int,
+    "integer": int,
+    "long": int,
+    "float": float,
+    "double": float,
+    "string": str,
+    "str": str,
+}
+
+
+class GrokError(ValueError):
+    """
+    Raised when a Grok pattern cannot be compiled.
+    """
+
+
+class GrokPattern:
+    """
+    A Grok pattern compiled into a single Python regular expression.
+    Every %{SYNTAX:semantic[:type]} capture becomes a named group, and typed
+    captures are converted when a line is matched.
+    """
+
+    def __init__(self, pattern: str, custom_patterns: dict = None):
+        self.pattern = pattern
+        self._library = dict(BASE_PATTERNS)
+        if custom_patterns:
+            self._library.update(custom_patterns)
+        self._fields = []
+        self._expanded = {}
+        try:
+            self.regex = re.compile(self._expand(pattern, ()))
+        except re.error as e:
+            raise GrokError(f"Invalid Grok pattern {pattern!r}: {e}") from e
+
+    @property
+    def field_names(self) -> list[str]:
+        return [name for _, name, _ in self._fields]
+
+    def _add_field(self, semantic: str, type_name: str = None) -> str:
+        converter = None
+        if type_name:
+            converter = _CONVERTERS.get(type_name.lower())
+            if converter is None:
+                raise GrokError(f"Unsupported Grok type {type_name!r} in pattern {self.pattern!r}")
+        group = f"g{len(self._fields)}"
+        self._fields.append((group, semantic, converter))
+        return group
+
+    def _expand(self, pattern: str, seen: tuple) -> str:
+        def replace_reference(match):
+            syntax = match.group("syntax")
+            if syntax not in self._library:
+                raise GrokError(f"Unknown Grok pattern %{{{syntax}}} in {self.pattern!r}")
+            if syntax in seen:
+                raise GrokError(f"Recursive Grok pattern %{{{syntax}}} in {self.pattern!r}")
+            body = self._expanded.get(syntax)
+            if body is None:
+                field_count = len(self._fields)
+                body = self._expand(self._library[syntax], seen + (syntax,))
+                # Bodies that add captures need fresh group names on every use.
+                if len(self._fields) == field_count:
+                    self._expanded[syntax] = body
+            semantic = match.group("semantic")
+            if semantic is None:
+                return f"(?:{body})"
+            return f"(?P<{self._add_field(semantic, match.group('type'))}>{body})"
+
+        def replace_inline(match):
+            return f"(?P<{self._add_field(match.group('name'))}>"
+
+        pattern = _INLINE_NAMED_GROUP.sub(replace_inline, pattern)
+        return _GROK_REFERENCE.sub(replace_reference, pattern)
+
+    def match(self, text: str):
+        """
+        Returns a dictionary of the captured fields if the pattern matches the
+        whole text, or None otherwise. Semantics such as [source][ip] produce
+        nested dictionaries.
+        """
+        match = self.regex.fullmatch(text)
+        if match is None:
+            return None
+        result = {}
+        for group, semantic, converter in self._fields:
+            value = match.group(group)
+            if value is None:
+                continue
+            if converter is not None:
+                try:
+                    value = converter(value)
+                except ValueError:
+                    pass
+            _assign(result, semantic, value)
+        return result
+
+
+def _assign(result: dict, semantic: str, value):
+    if semantic.startswith("["):
+        path = [part for part in re.split(r"[\[\]]+", semantic) if part]
+    else:
+        path = [semantic]
+    target = result
+    for key in path[:-1]:
+        existing = target.get(key)
+        if not isinstance(existing, dict):
+            existing = target[key] = {}
+        target = existing
+    target[path[-1]] = value
+
+
+def clean_pattern(text: str) -> str:
+    """
+    Strips markdown fences, quotes and labels that Claude sometimes wraps
+    around a Grok pattern.
+    """
+    text = text.strip()
+    fenced = re.search(r"```(?:\w+)?\n?(.*?)```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if lines:
+        text = next((line for line in lines if "%{" in line), lines[0])
+    if text.lower().startswith("grok pattern:"):
+        text = text[len("grok pattern:"):].strip()
+    if len(text) > 1 and text[0] == text[-1] and text[0] in "`'\"":
+        text = text[1:-1]
+    return text
+
+
+class GrokPatternStore:
+    """
+    An ordered collection of learned Grok patterns that can be matched against
+    log lines and persisted to a JSON file. Patterns that match most often are
+    tried first.
+    """
+
+    def __init__(self, path: str = None, custom_patterns: dict = None):
+        self.path = path
+        self.custom_patterns = custom_patterns
+        self._patterns = []
+        self._hits = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def __iter__(self):
+        return iter(list(self._patterns))
+
+    def add(self, pattern, sample: str = None):
+        """
+        Compiles and adds a pattern. If a sample line is given, the pattern is
+        only added when it matches that sample. Returns the compiled pattern,
+        or None if it was rejected.
+        """
+        if not isinstance(pattern, GrokPattern):
+            pattern = GrokPattern(pattern, self.custom_patterns)
+        if sample is not None and pattern.match(sample) is None:
+            return None
+        with self._lock:
+            if any(existing.pattern == pattern.pattern for existing in self._patterns):
+                return pattern
+            self._patterns.append(pattern)
+            self._hits.setdefault(pattern.pattern, 0)
+        return pattern
+
+    def match(self, text: str):
+        """
+        Returns the fields extracted by the first matching pattern, or None.
+        """
+        patterns = self._patterns
+        for index, pattern in enumerate(patterns):
+            result = pattern.match(text)
+            if result is not None:
+                self._record_hit(index, pattern)
+                return result
+        return None
+
+    def _record_hit(self, index: int, pattern: GrokPattern):
+        with self._lock:
+            hits = self._hits[pattern.pattern] = self._hits.get(pattern.pattern, 0) + 1
+            if index and index < len(self._patterns) and self._patterns[index] is pattern:
+                previous = self._patterns[index - 1]
+                if hits > self._hits.get(previous.pattern, 0):
+                    # Copy-on-write so concurrent readers never see a half-updated list.
+                    patterns = list(self._patterns)
+                    patterns[index - 1], patterns[index] = pattern, previous
+                    self._patterns = patterns
+
+    def load(self):
+        """
+        Loads patterns from the store's JSON file. Patterns that no longer
+        compile are skipped with a warning.
+        """
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data.get("patterns", []):
+            try:
+                compiled = self.add(item["pattern"])
+            except GrokError as e:
+                logger.warning("Skipping stored Grok pattern: %s", e)
+                continue
+            self._hits[compiled.pattern] = item.get("hits", 0)
+
+    def save(self):
+        """
+        Writes the patterns to the store's JSON file atomically.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                "version": 1,
+                "patterns": [
+                    {"pattern": pattern.pattern, "hits": self._hits.get(pattern.pattern, 0)}
+                    for pattern in self._patterns
+                ],
+            }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
@@ -1,58 +1,254 @@
+import logging
 import os
-from scapy.all import PcapReader, Packet
 import string
 import json
+from .compression import COMPRESSED_EXTENSIONS, detect_codec, open_decompressed
+from .instrumentation import metrics
+from .pcap_reader import iter_pcap_payloads
+
+logger = logging.getLogger(__name__)
+
+LOG_FILE_EXTENSIONS = ('.log', '.txt', '.json', '.csv')
+
+
+def _load_scapy_reader():
+    # Importing scapy takes hundreds of milliseconds, so it is only loaded for the "scapy" engine.
+    try:
+        from scapy.all import PcapReader
+    except ImportError as e:
+        raise ImportError("The scapy pcap engine requires scapy: pip install log_parser_sdk[scapy]") from e
+    return PcapReader
+
+
+class LineSegmenter:
+    """
+    Incrementally splits lines into log entries. A line that opens more braces
+    than it closes starts a JSON block, which continues until its braces
+    balance; every other non-empty line is an entry on its own.
+    """
+
+    def __init__(self):
+        self._block = []
+        self._block_start = 0
+        self._block_end = 0
+        self._brace_count = 0
+
+    @property
+    def pending(self) -> bool:
+        """
+        True while an unterminated JSON block is buffered.
+        """
+        return bool(self._block)
+
+    def push(self, raw_line: bytes, line_start: int, line_end: int) -> list:
+        """
+        Adds one raw line and returns the (start, end, entry) tuples it completes.
+        """
+        stripped_line = raw_line.strip()
+        if not stripped_line:
+            return []
+
+        depth = stripped_line.count(b'{') - stripped_line.count(b'}')
+        if self._block:
+            self._block.append(stripped_line)
+            self._block_end = line_end
+            self._brace_count += depth
+            if self._brace_count <= 0:
+                return self.flush()
+            return []
+        if depth > 0:
+            self._block = [stripped_line]
+            self._block_start = line_start
+            self._block_end = line_end
+            self._brace_count = depth
+            return []
+        return [(line_start, line_end, stripped_line.decode('utf-8', errors='ignore'))]
+
+    def flush(self) -> list:
+        """
+        Returns the buffered JSON block as an entry, even if it is unterminated.
+        """
+        if not self._block:
+            return []
+        entry = (self._block_start, self._block_end, b"\n".join(self._block).decode('utf-8', errors='ignore'))
+        self._block = []
+        self._brace_count = 0
+        return [entry]
+
+
+def _decode_entry(raw) -> str:
+    # The text of an entry's raw lines, stripped like LineSegmenter output.
+    text = str(raw, 'utf-8', 'ignore').strip()
+    if "\n" not in text:
+        return text
+    return "\n".join(line.strip() for line in text.split("\n") if line.strip())
+
+
+class BufferedLogFile:
+    """
+    Segments a log file on the raw bytes, with the same entry boundaries as
+    LineSegmenter, through buffered reads of block_size bytes, so a file
+    that is truncated or rotated with copytruncate while it is read simply
+    ends early. Lines are located with bytes.find in a sliding window, and
+    brace counting only touches lines that contain a brace.
+    """
+
+    _WHITESPACE = b" \t\r\n\x0b\x0c"
+
+    def __init__(self, file_path: str, block_size: int = 1024 * 1024):
+        self.file_path = file_path
+        self.block_size = block_size
+        self._file = open(file_path, 'rb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def iter_entries(self, start: int = 0, end: int = None):
+        """
+        Yields (start, end, entry) tuples for the entries that begin within
+        [start, end). start must be the start of a line, and end offsets cover
+        whole raw lines, including their newlines.
+        """
+        return self._iter_segments(start, end, True)
+
+    def iter_spans(self, start: int = 0, end: int = None):
+        """
+        Yields the (start, end) byte spans of the same entries without
+        decoding them.
+        """
+        return ((entry_start, entry_end) for entry_start, entry_end, _ in self._iter_segments(start, end, False))
+
+    def _iter_segments(self, start: int, end: int, decode: bool):
+        read = self._file.read
+        block_size = self.block_size
+        whitespace = self._WHITESPACE
+        self._file.seek(start)
+        buffer = b""
+        base = start  # File offset of buffer[0].
+        position = 0
+        at_eof = False
+        block_start = None
+        brace_count = 0
+        next_open = next_close = -1
+        while True:
+            newline = buffer.find(b"\n", position)
+            if newline == -1 and not at_eof:
+                # Drop what has been consumed, except an open JSON block, and read the next block.
+                keep = position if block_start is None else block_start - base
+                data = read(block_size)
+                at_eof = not data
+                buffer = buffer[keep:] + data
+                base += keep
+                position -= keep
+                next_open = buffer.find(b"{", position)
+                next_close = buffer.find(b"}", position)
+                continue
+            if position >= len(buffer):
+                break
+            if block_start is None and end is not None and base + position >= end:
+                return
+            line_end = len(buffer) if newline == -1 else newline + 1
+            if buffer[position] in whitespace and not buffer[position:line_end].strip():
+                position = line_end
+                continue
+            if (next_open == -1 or next_open >= line_end) and (next_close == -1 or next_close >= line_end):
+                depth = 0
+            else:
+                depth = buffer.count(b"{", position, line_end) - buffer.count(b"}", position, line_end)
+                if next_open != -1 and next_open < line_end:
+                    next_open = buffer.find(b"{", line_end)
+                if next_close != -1 and next_close < line_end:
+                    next_close = buffer.find(b"}", line_end)
+            if block_start is not None:
+                brace_count += depth
+                if brace_count <= 0:
+                    yield (block_start, base + line_end,
+                           _decode_entry(buffer[block_start - base:line_end]) if decode else None)
+                    block_start = None
+            elif depth > 0:
+                block_start = base + position
+                brace_count = depth
+            else:
+                yield base + position, base + line_end, _decode_entry(buffer[position:line_end]) if decode else None
+            position = line_end
+        if block_start is not None:
+            yield block_start, base + len(buffer), _decode_entry(buffer[block_start - base:]) if decode else None
+
+    def __iter__(self):
+        return self.iter_entries()
+
 
 class InputHandler:
+    """
+    Reads log entries from files, directories and pcaps. Files compressed
+    with gzip, bz2, xz or zstd are recognized by their magic bytes and
+    decompressed as they are read; `decompress_workers` threads (default:
+    one per CPU, up to 4) decompress multi-member gzip and multi-frame zstd
+    files.
+    Offsets into compressed files count decompressed bytes.
+    """
+
+    def __init__(self, decompress_workers: int = None):
+        self.decompress_workers = decompress_workers
+
     def read_log_file(self, file_path: str) -> list[str]:
         """
         Reads a file containing multiple log entries, one per line.
+        Multi-line JSON objects are kept together as a single entry.
+        """
+        return list(self.iter_log_file(file_path))
+
+    def iter_log_file(self, file_path: str, start_offset: int = 0):
+        """
+        Yields the log entries of a file one at a time, reading it incrementally
+        so memory use does not grow with the file size.
+        """
+        return (entry for _, _, entry in self.iter_log_file_with_offsets(file_path, start_offset))
+
+    def iter_log_file_with_offsets(self, file_path: str, start_offset: int = 0):
+        """
+        Yields (start, end, entry) tuples for the log entries of a file, where
+        start and end are byte offsets into the file. Reading can resume from
+        any entry's end offset.
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
-        with open(file_path, 'r') as f:
-            content = f.read()
-            
-            potential_json_entries = []
-            current_json_block = []
-            brace_count = 0
-            in_json_block = False
-
-            for line in content.splitlines():
-                stripped_line = line.strip()
-                if not stripped_line:
-                    if in_json_block and brace_count == 0 and current_json_block:
-                        entry = "\n".join(current_json_block)
-                        potential_json_entries.append(entry)
-                        current_json_block = []
-                        in_json_block = False
-                    continue
-
-                for char in stripped_line:
-                    if char == '{':
-                        brace_count += 1
-                        in_json_block = True
-                    elif char == '}':
-                        brace_count -= 1
-                
-                current_json_block.append(stripped_line)
-
-                if in_json_block and brace_count == 0 and current_json_block:
-                    entry = "\n".join(current_json_block)
-                    potential_json_entries.append(entry)
-                    current_json_block = []
-                    in_json_block = False
-            
-            if current_json_block:
-                entry = "\n".join(current_json_block)
-                potential_json_entries.append(entry)
-
-            if potential_json_entries:
-                return potential_json_entries
-            else:
-                f.seek(0) # Reset file pointer
-                lines = [line.strip() for line in f if line.strip()]
-                return lines
+        return self._iter_file_segments(file_path, start_offset)
+
+    def _iter_file_segments(self, file_path: str, start_offset: int):
+        if detect_codec(file_path) is not None:
+            # Decompression happens as lines are pulled, so it is all timed as "read".
+            yield from metrics.timed_iter("read", self._iter_compressed_segments(file_path, start_offset))
+            return
+        # "read" times the open, "segment" the reads and the scan for each entry.
+        started = metrics.start()
+        with BufferedLogFile(file_path) as log_file:
+            metrics.stop("read", started)
+            yield from metrics.timed_iter("segment", log_file.iter_entries(start_offset))
+
+    def _iter_compressed_segments(self, file_path: str, start_offset: int):
+        with open_decompressed(file_path, self.decompress_workers) as stream:
+            skipped = 0
+            while skipped < start_offset:
+                data = stream.read(min(start_offset - skipped, 1024 * 1024))
+                if not data:
+                    return
+                skipped += len(data)
+            yield from self._segment_stream(stream, start_offset)
+
+    def _segment_stream(self, stream, offset: int = 0):
+        segmenter = LineSegmenter()
+        for raw_line in stream:
+            line_start = offset
+            offset += len(raw_line)
+            yield from segmenter.push(raw_line, line_start, offset)
+        yield from segmenter.flush()
 
     def read_log_entry(self, log_entry: str) -> str:
         """
@@ -62,7 +258,7 @@ class InputHandler:
             raise TypeError("Log entry must be a string.")
         return log_entry
 
-    def _extract_printable_payload(self, packet: Packet) -> str:
+    def _extract_printable_payload(self, packet) -> str:
         """
         Recursively extracts printable strings from all layers of a packet.
         """
@@ -82,51 +278,127 @@ class InputHandler:
                     extracted_text.append(decoded_payload.strip())
         return '\n'.join(extracted_text)
 
-    def read_pcap_file(self, file_path: str, max_packets: int = None) -> list[str]:
+    def read_pcap_file(self, file_path: str, max_packets: int = None, engine: str = "native", protocols=None,
+                       ports=None, reassemble_tcp: bool = True) -> list[str]:
         """
         Reads a .pcap file and extracts relevant text data from packet payloads.
         This method will attempt to decode common protocols to get text-based logs.
-        Optionally, limits the number of packets read.
+        Optionally, limits the number of packets read. See iter_pcap_file for
+        the other options.
+        """
+        return list(self.iter_pcap_file(file_path, max_packets, engine, protocols, ports, reassemble_tcp))
+
+    def iter_pcap_file(self, file_path: str, max_packets: int = None, engine: str = "native", protocols=None,
+                       ports=None, reassemble_tcp: bool = True):
+        """
+        Yields the text payloads of a pcap or pcapng file one at a time.
+
+        The "native" engine reads records directly and filters on protocols
+        (e.g. ["udp"]) and ports (e.g. [514]) from the packet headers before
+        touching the payload. Only the innermost TCP/UDP payload is decoded,
+        and TCP streams are reassembled into newline- or octet-count-framed
+        messages unless reassemble_tcp is False. The "scapy" engine dissects
+        every packet with scapy and returns the printable payload of every
+        layer; it ignores the filters.
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
-        
-        logs = []
+        if engine == "native":
+            return metrics.timed_iter("read", self._iter_pcap_native(file_path, max_packets, protocols, ports,
+                                                                     reassemble_tcp))
+        if engine == "scapy":
+            return metrics.timed_iter("read", self._iter_pcap_scapy(_load_scapy_reader(), file_path, max_packets))
+        raise ValueError(f"Unknown pcap engine: {engine}")
+
+    def _iter_pcap_native(self, file_path: str, max_packets: int, protocols, ports, reassemble_tcp: bool):
+        try:
+            with open(file_path, 'rb') as f:
+                yield from iter_pcap_payloads(f, protocols, ports, reassemble_tcp, max_packets)
+        except Exception as e:
+            logger.error("Error reading pcap file %s: %s", file_path, e)
+
+    def _iter_pcap_scapy(self, reader_class, file_path: str, max_packets: int):
         packet_count = 0
         try:
-            with PcapReader(file_path) as pcap_reader:
+            with reader_class(file_path) as pcap_reader:
                 for packet in pcap_reader:
                     if max_packets and packet_count >= max_packets:
                         break
 
                     extracted_data = self._extract_printable_payload(packet)
                     if extracted_data:
-                        logs.append(extracted_data)
-                    
+                        yield extracted_data
+
                     packet_count += 1
 
         except Exception as e:
-            print(f"Error reading pcap file {file_path}: {e}")
-        return [log for log in logs if log] # Filter out empty strings
+            logger.error("Error reading pcap file %s: %s", file_path, e)
 
     def read_logs_from_directory(self, directory_path: str) -> dict[str, list[str]]:
         """
         Reads all text-based log files from a given directory and returns a dictionary
-        mapping file paths to lists of log entries from those files.
+        mapping file paths to lists of log entries from those files. Files are
+        segmented like read_log_file, so multi-line JSON objects stay whole.
         """
         if not os.path.isdir(directory_path):
             raise NotADirectoryError(f"Directory not found: {directory_path}")
         
         all_logs_by_file = {}
-        for root, _, files in os.walk(directory_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    if file.endswith(('.log', '.txt', '.json', '.csv')):
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            all_logs_by_file[file_path] = [line.strip() for line in f if line.strip()]
-                except Exception as e:
-                    print(f"Error reading file {file_path}: {e}")
+        for file_path in self.list_log_files(directory_path):
+            try:
+                all_logs_by_file[file_path] = self.read_log_file(file_path)
+            except Exception as e:
+                logger.error("Error reading file %s: %s", file_path, e)
         return all_logs_by_file
 
+    def list_log_files(self, directory_path: str) -> list[str]:
+        """
+        Returns the paths of all log files under a directory, including
+        compressed ones such as rotated messages.1.gz, sorted so that every
+        run visits them in the same order.
+        """
+        if not os.path.isdir(directory_path):
+            raise NotADirectoryError(f"Directory not found: {directory_path}")
+        file_paths = []
+        for root, _, files in os.walk(directory_path):
+            file_paths.extend(os.path.join(root, file) for file in files if file.endswith(LOG_FILE_EXTENSIONS + COMPRESSED_EXTENSIONS))
+        return sorted(file_paths)
+
+    def shard_log_files(self, file_paths: list[str], shard_bytes: int = 32 * 1024 * 1024) -> list[tuple[str, int, int]]:
+        """
+        Splits files into (file_path, start, end) byte ranges of roughly
+        shard_bytes each (see iter_shards).
+        """
+        return list(self.iter_shards(file_paths, shard_bytes))
 
+    def iter_shards(self, file_paths, shard_bytes: int = 32 * 1024 * 1024):
+        """
+        Yields (file_path, start, end) byte ranges of roughly shard_bytes each,
+        as a file is scanned, so shards can be parsed before the scan is done.
+        Small files become one shard. Large files are segmented like
+        read_log_file, without decoding, and cut only where an entry ends, so
+        no JSON block is open at a cut and each shard segments exactly as the
+        whole file does. Compressed files are never cut.
+        """
+        for file_path in file_paths:
+            size = os.path.getsize(file_path)
+            start = 0
+            if size > shard_bytes and detect_codec(file_path) is None:
+                with BufferedLogFile(file_path) as log_file:
+                    for _, entry_end in log_file.iter_spans():
+                        if entry_end - start >= shard_bytes and entry_end < size:
+                            yield file_path, start, entry_end
+                            start = entry_end
+            yield file_path, start, size
+
+    def iter_log_range(self, file_path: str, start: int, end: int):
+        """
+        Yields (start, end, entry) tuples for the entries that begin within the
+        byte range [start, end). start must be the start of a line. A
+        compressed file is read whole, as shard_log_files never cuts one.
+        """
+        if detect_codec(file_path) is not None:
+            yield from self._iter_compressed_segments(file_path, 0)
+            return
+        with BufferedLogFile(file_path) as log_file:
+            yield from log_file.iter_entries(start, end)
@@ -0,0 +1,239 @@
+from __future__ import annotations
+import json
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+# The stages timed by the SDK components.
+STAGES = ("read", "segment", "classify", "cache_lookup", "rate_limit_wait", "network_wait", "json_extract", "format")
+# Histogram bucket upper bounds, in seconds.
+DEFAULT_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _StageHistogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # One count per bucket plus one for values above the last bound.
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float | None:
+        # Upper bound of the bucket holding the q-th observation.
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _StageTimer:
+    def __init__(self, instrumentation, stage: str):
+        self.instrumentation = instrumentation
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.observe(self.stage, perf_counter() - self.started)
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Instrumentation:
+    """
+    Per-stage timing histograms and labelled counters for the SDK's hot paths.
+
+    Disabled by default. While disabled every hook returns after a single
+    attribute check: start() returns None, stop() ignores it, timer()
+    returns a shared no-op context manager and timed_iter() returns its
+    iterable untouched, so nothing is timed or locked. Enable it with
+    enable() (the SDK components share the module-level `metrics` instance)
+    and read the data with snapshot() or to_prometheus(), or serve both
+    over HTTP with serve().
+
+    Worker processes of a parallel directory parse have their own instance,
+    so only the work done in the calling process is recorded.
+    """
+
+    def __init__(self, enabled: bool = False, buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+                 namespace: str = "log_parser"):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._counters = {}
+
+    def start(self) -> float | None:
+        """
+        Returns a start time to pass to stop(), or None while disabled.
+        """
+        return perf_counter() if self.enabled else None
+
+    def stop(self, stage: str, started: float | None):
+        if started is not None:
+            self.observe(stage, perf_counter() - started)
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = _StageHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    def timer(self, stage: str):
+        """
+        Context manager that records the time spent in its block under stage.
+        """
+        return _StageTimer(self, stage) if self.enabled else _NULL_TIMER
+
+    def timed_iter(self, stage: str, iterable):
+        """
+        Wraps an iterator so the time spent producing each item is recorded
+        under stage. Returns the iterable itself while disabled.
+        """
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(stage, iter(iterable))
+
+    def _timed_iter(self, stage: str, iterator):
+        while True:
+            started = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(stage, perf_counter() - started)
+            yield item
+
+    def increment(self, name: str, amount: int = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        """
+        Returns the counters and per-stage statistics as a JSON-serializable
+        dict. Quantiles are bucket upper bounds, in milliseconds.
+        """
+        with self._lock:
+            stages = {}
+            for stage, histogram in sorted(self._stages.items()):
+                p50, p99 = histogram.quantile(0.5), histogram.quantile(0.99)
+                stages[stage] = {
+                    "count": histogram.count,
+                    "total_seconds": histogram.sum,
+                    "mean_ms": 1000 * histogram.sum / histogram.count,
+                    "p50_ms": None if p50 is None or p50 == float("inf") else 1000 * p50,
+                    "p99_ms": None if p99 is None or p99 == float("inf") else 1000 * p99,
+                }
+            counters = {name + _format_labels(labels): value
+                        for (name, labels), value in sorted(self._counters.items())}
+        return {"enabled": self.enabled, "stages": stages, "counters": counters}
+
+    def to_prometheus(self) -> str:
+        """
+        Renders the data in the Prometheus text exposition format: one
+        <namespace>_stage_seconds histogram labelled by stage, and one
+        <namespace>_<name>_total counter per counter name.
+        """
+        histogram_name = f"{self.namespace}_stage_seconds"
+        lines = [f"# HELP {histogram_name} Time spent in each processing stage.",
+                 f"# TYPE {histogram_name} histogram"]
+        with self._lock:
+            for stage, histogram in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{histogram_name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{histogram_name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{histogram_name}_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'{histogram_name}_count{{stage="{stage}"}} {histogram.count}')
+            declared = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                counter_name = f"{self.namespace}_{name}_total"
+                if counter_name not in declared:
+                    declared.add(counter_name)
+                    lines.append(f"# TYPE {counter_name} counter")
+                lines.append(f"{counter_name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1"):
+        """
+        Serves /metrics (Prometheus text) and /metrics.json (the snapshot) on
+        a daemon thread. Returns the ThreadingHTTPServer; call shutdown() to
+        stop it.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        instrumentation = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = instrumentation.to_prometheus().encode()
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(instrumentation.snapshot()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# Shared by InputHandler, ClaudeClient, LogParsingSDK and OutputFormatter.
+metrics = Instrumentation()
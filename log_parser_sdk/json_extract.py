@@ -0,0 +1,94 @@
+from __future__ import annotations
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # Optional fast path: pip install orjson
+    orjson = None
+
+_decoder = json.JSONDecoder()
+_VALUE_START = re.compile(r"[\[{]")
+_FENCE = re.compile(r"```(?:json)?[ \t]*\n")
+
+
+def loads(text: str | bytes):
+    """
+    Decodes a JSON document, with orjson when it is installed. Documents
+    orjson rejects but the standard library accepts (NaN, integers wider than
+    64 bits) fall back to json.loads.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def iter_json_values(text: str, start: int = 0):
+    """
+    Yields every top-level JSON object or array found in text, in order,
+    skipping prose and markdown between them. Each value is decoded once with
+    JSONDecoder.raw_decode and scanning resumes where it ended. If an opening
+    bracket does not start a valid value (e.g. a truncated array), scanning
+    resumes just after it, so complete values nested inside are still found.
+    """
+    position = start
+    while True:
+        match = _VALUE_START.search(text, position)
+        if match is None:
+            return
+        try:
+            value, position = _decoder.raw_decode(text, match.start())
+        except ValueError:
+            position = match.start() + 1
+            continue
+        yield value
+
+
+def extract_json_value(text: str, default=None):
+    """
+    Returns the first JSON object or array in a model response, decoded: the
+    whole response when it is plain JSON, otherwise the first value inside a
+    ```json fence, otherwise the first value anywhere in the text. Returns
+    `default` if there is none.
+    """
+    stripped = text.strip()
+    if stripped[:1] in ("{", "["):
+        try:
+            return loads(stripped)
+        except ValueError:
+            pass
+    fence = _FENCE.search(text)
+    if fence is not None:
+        for value in iter_json_values(text, fence.end()):
+            return value
+    for value in iter_json_values(text):
+        return value
+    return default
+
+
+def sniff_json(entry: str) -> bool:
+    """
+    True if the first non-whitespace character of a log entry opens a JSON
+    object or array. Usually only the first character is looked at.
+    """
+    first = entry[:1]
+    if first.isspace():
+        first = entry.lstrip()[:1]
+    return first in ("{", "[")
+
+
+def decode_json_entry(entry: str):
+    """
+    Decodes a log entry that is a JSON object or array, or returns None for
+    anything else. Entries that do not look like JSON are never handed to the
+    decoder, and JSON entries are decoded exactly once.
+    """
+    if not sniff_json(entry):
+        return None
+    try:
+        return loads(entry)
+    except ValueError:
+        return None
@@ -0,0 +1,266 @@
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import sys
+import tempfile
+import time
+from .input_handler import LineSegmenter
+
+logger = logging.getLogger(__name__)
+
+_IN_MODIFY = 0x00000002
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+
+class _PollingWaiter:
+    """
+    Waits by sleeping; used where inotify is unavailable.
+    """
+
+    def wait(self, timeout: float):
+        time.sleep(timeout)
+
+    def close(self):
+        pass
+
+
+class _InotifyWaiter:
+    """
+    Waits for changes in the directory of the followed file using Linux
+    inotify, falling back to the timeout as a safety net.
+    """
+
+    def __init__(self, file_path: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        directory = os.path.dirname(os.path.abspath(file_path))
+        mask = _IN_MODIFY | _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout: float):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if readable:
+            try:
+                while os.read(self._fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self._fd)
+
+
+def _make_waiter(file_path: str, use_inotify: bool):
+    if use_inotify and sys.platform.startswith("linux"):
+        try:
+            return _InotifyWaiter(file_path)
+        except (OSError, AttributeError):
+            pass
+    return _PollingWaiter()
+
+
+class LogFollower:
+    """
+    Tails a growing log file from a persisted byte offset.
+
+    Rotation is detected by a change of inode at the followed path, in which
+    case the rest of the old file is read before switching to the new one.
+    Truncation is detected by the file shrinking below the read offset, in
+    which case reading restarts at the beginning. While idle the follower
+    blocks on inotify where available and polls otherwise.
+    """
+
+    def __init__(self, file_path: str, checkpoint_path: str = None, poll_interval: float = 1.0,
+                 start_at_end: bool = False, use_inotify: bool = True, read_size: int = 65536):
+        self.file_path = file_path
+        self.checkpoint_path = checkpoint_path
+        self.poll_interval = poll_interval
+        self.read_size = read_size
+        self._waiter = _make_waiter(file_path, use_inotify)
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._partial = b""
+        self._segmenter = LineSegmenter()
+
+        checkpoint = self._load_checkpoint()
+        if checkpoint is not None:
+            self._inode, self._offset = checkpoint["inode"], checkpoint["offset"]
+        elif start_at_end and os.path.exists(file_path):
+            stat = os.stat(file_path)
+            self._inode, self._offset = stat.st_ino, stat.st_size
+
+    @property
+    def offset(self) -> int:
+        """
+        Byte offset just past the last complete line that has been read.
+        """
+        return self._offset - len(self._partial)
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("path") != os.path.abspath(self.file_path):
+            return None
+        return data
+
+    def checkpoint(self):
+        """
+        Persists the current inode and offset. Call this once every entry
+        returned so far has been processed.
+        """
+        if not self.checkpoint_path or self._inode is None or self._segmenter.pending:
+            return
+        data = {"path": os.path.abspath(self.file_path), "inode": self._inode, "offset": self.offset}
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _open(self):
+        try:
+            f = open(self.file_path, "rb")
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(f.fileno())
+        if stat.st_ino != self._inode:
+            # A different file than the checkpoint refers to: start at the top.
+            self._inode = stat.st_ino
+            self._offset = 0
+        elif stat.st_size < self._offset:
+            self._offset = 0
+        f.seek(self._offset)
+        self._file = f
+        self._partial = b""
+        return True
+
+    def _read_chunk(self):
+        """
+        Reads the next block of the current file. Returns the number of bytes
+        read and the entries completed by them.
+        """
+        data = self._file.read(self.read_size)
+        if not data:
+            return 0, []
+        line_start = self.offset
+        self._offset += len(data)
+        data = self._partial + data
+        entries = []
+        position = 0
+        while True:
+            newline = data.find(b"\n", position)
+            if newline == -1:
+                break
+            line_end = line_start + newline + 1 - position
+            entries.extend(self._segmenter.push(data[position:newline + 1], line_start, line_end))
+            line_start = line_end
+            position = newline + 1
+        self._partial = data[position:]
+        return len(data), entries
+
+    def _finish_rotated_file(self) -> list:
+        """
+        Closes a file that has been rotated away and returns its last entries,
+        including a final line without a trailing newline.
+        """
+        entries = []
+        if self._partial:
+            entries.extend(self._segmenter.push(self._partial, self.offset, self._offset))
+            self._partial = b""
+        entries.extend(self._segmenter.flush())
+        self._file.close()
+        self._file = None
+        return entries
+
+    def _rotation_state(self) -> str:
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return "unchanged"
+        if stat.st_ino != self._inode:
+            return "rotated"
+        if stat.st_size < self._offset:
+            return "truncated"
+        return "unchanged"
+
+    def read_available(self, max_entries: int = None) -> list:
+        """
+        Returns (start, end, entry) tuples for complete entries written since
+        the last call, without blocking. Offsets refer to the file the entry
+        was read from.
+        """
+        if self._file is None and not self._open():
+            return []
+        entries = []
+        while max_entries is None or len(entries) < max_entries:
+            read, chunk = self._read_chunk()
+            entries.extend(chunk)
+            if read:
+                continue
+            if entries:
+                break
+            state = self._rotation_state()
+            if state == "rotated":
+                entries.extend(self._finish_rotated_file())
+                self._inode = None
+            elif state == "truncated":
+                logger.warning("%s was truncated. Reading from the beginning.", self.file_path)
+                self._file.close()
+                self._file = None
+                self._partial = b""
+                self._segmenter = LineSegmenter()
+            else:
+                break
+            if not self._open():
+                break
+        return entries
+
+    def wait(self, timeout: float = None):
+        """
+        Blocks until the watched directory changes or the timeout elapses.
+        """
+        self._waiter.wait(self.poll_interval if timeout is None else timeout)
+
+    def follow(self, stop_event=None, idle_timeout: float = None):
+        """
+        Yields (start, end, entry) tuples as lines are appended, until
+        stop_event is set or no data has arrived for idle_timeout seconds.
+        """
+        idle_since = time.monotonic()
+        while stop_event is None or not stop_event.is_set():
+            entries = self.read_available()
+            if entries:
+                idle_since = time.monotonic()
+                yield from entries
+                continue
+            if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                return
+            self.wait()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._waiter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,119 +1,472 @@
 from .input_handler import InputHandler
-from .claude_client import ClaudeClient
 from .output_formatter import OutputFormatter
 from .error_handler import ErrorHandler
+from .parse_cache import ParseCache
+from .grok import GrokError, GrokPatternStore
+from .rate_limiter import RateLimiter
+from .prompts import PROMPT_VERSION
+from .native_parsers import NativeParserRegistry
+from .compact_records import RecordCompactor
+from .compression import detect_codec
+from .json_extract import decode_json_entry
+from .instrumentation import metrics
+from itertools import islice
 import json
+import logging
 import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 class LogParsingSDK:
-    def __init__(self, claude_api_key):
+    def __init__(self, claude_api_key, parse_cache_size=1024, grok_patterns_path=None, learn_grok_patterns=False,
+                 max_workers=1, requests_per_minute=None, tokens_per_minute=None, max_batch_tokens=4000,
+                 result_store_path=None, native_parsers=True, compact_records=False):
         self.input_handler = InputHandler()
-        self.claude_client = ClaudeClient(claude_api_key)
+        rate_limiter = None
+        if requests_per_minute or tokens_per_minute:
+            rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        # A result store makes reruns skip entries Claude has already parsed and
+        # lets iter_parse_log_file resume from a checkpoint.
+        self.result_store = None
+        if result_store_path:
+            from .result_store import ResultStore
+            self.result_store = ResultStore(result_store_path, PROMPT_VERSION)
+        # The Claude client, and the HTTP stack behind it, is created on first use.
+        self._claude_api_key = claude_api_key
+        self._rate_limiter = rate_limiter
+        self._claude_client = None
+        self._claude_client_lock = threading.Lock()
         self.output_formatter = OutputFormatter()
         self.error_handler = ErrorHandler()
+        # Set parse_cache_size to 0 to send every non-JSON entry to Claude.
+        self.parse_cache = ParseCache(parse_cache_size) if parse_cache_size else None
+        # Built-in parsers for well-known formats (PAN-OS, syslog) run before anything
+        # else. Pass a NativeParserRegistry to customize them or False to disable them.
+        if isinstance(native_parsers, NativeParserRegistry):
+            self.native_parsers = native_parsers
+        else:
+            self.native_parsers = NativeParserRegistry() if native_parsers else None
+        # Learned Grok patterns are tried before Claude and persisted to grok_patterns_path.
+        self.grok_patterns = GrokPatternStore(grok_patterns_path)
+        self.learn_grok_patterns = learn_grok_patterns
+        # With max_workers > 1, Claude requests for file, directory and PCAP entries
+        # run on a thread pool and per-entry failures are reported inline.
+        self.max_workers = max_workers
+        # Entries bound for Claude are packed into prompts of up to max_batch_tokens;
+        # 0 sends one request per entry.
+        self.max_batch_tokens = max_batch_tokens
+        # With compact_records, parsed records are returned as read-only CompactRecords
+        # that share one schema per field layout. Pass a RecordCompactor to share it.
+        if isinstance(compact_records, RecordCompactor):
+            self.record_compactor = compact_records
+        else:
+            self.record_compactor = RecordCompactor() if compact_records else None
+        # Per-stage timings and counters, shared with the other components.
+        # Disabled until metrics.enable() is called.
+        self.metrics = metrics
+
+    @property
+    def claude_client(self):
+        if self._claude_client is None:
+            with self._claude_client_lock:
+                if self._claude_client is None:
+                    self._claude_client = self._make_claude_client(self._claude_api_key, self._rate_limiter,
+                                                                   self.max_workers)
+        return self._claude_client
+
+    @claude_client.setter
+    def claude_client(self, client):
+        self._claude_client = client
+
+    def _make_claude_client(self, claude_api_key, rate_limiter, max_workers):
+        from .claude_client import ClaudeClient
+        from .transport import PooledTransport
+
+        # Size the connection pool so every worker thread can keep its connection alive.
+        transport = PooledTransport(pool_maxsize=max(max_workers, 16))
+        return ClaudeClient(claude_api_key, rate_limiter=rate_limiter, result_store=self.result_store,
+                            transport=transport)
+
+    def _parse_locally(self, log_entry):
+        """
+        The local dispatch stage. Entries whose first non-space character opens
+        a JSON object or array are decoded once and returned; other entries go
+        to the native parsers, learned Grok patterns and the template cache in
+        that order. Returns None if the entry has to be sent to Claude.
+        """
+        if metrics.enabled:
+            return self._parse_locally_timed(log_entry)
+        json_result = decode_json_entry(log_entry)
+        if json_result is not None:
+            return json_result
+        if self.native_parsers is not None:
+            native_result = self.native_parsers.parse(log_entry)
+            if native_result is not None:
+                return native_result
+        grok_result = self.grok_patterns.match(log_entry)
+        if grok_result is not None:
+            return grok_result
+        if self.parse_cache is not None:
+            return self.parse_cache.lookup(log_entry)
+        return None
+
+    def _parse_locally_timed(self, log_entry):
+        # _parse_locally with classify and cache_lookup timings and a dispatch
+        # counter per route, kept separate so the disabled path stays untouched.
+        started = metrics.start()
+        result = decode_json_entry(log_entry)
+        route = "json"
+        if result is None and self.native_parsers is not None:
+            result = self.native_parsers.parse(log_entry)
+            route = "native"
+        if result is None:
+            result = self.grok_patterns.match(log_entry)
+            route = "grok"
+        metrics.stop("classify", started)
+        if result is None and self.parse_cache is not None:
+            started = metrics.start()
+            result = self.parse_cache.lookup(log_entry)
+            metrics.stop("cache_lookup", started)
+            route = "cache"
+        metrics.increment("dispatch", route=route if result is not None else "claude")
+        return result
+
+    def _cache_claude_output(self, log_entry, parsed_data):
+        if self.parse_cache is not None:
+            self.parse_cache.store(log_entry, parsed_data)
+        return parsed_data
+
+    def _parse_with_claude(self, log_entry):
+        """
+        Parses a single entry. The local dispatch stage is tried first (JSON,
+        native parsers, learned Grok patterns, the template cache); Claude is
+        only called for entries none of them can handle.
+        """
+        parsed_data = self._parse_locally(log_entry)
+        if parsed_data is not None:
+            return parsed_data
+
+        if self.learn_grok_patterns:
+            pattern = self.learn_grok_pattern(log_entry)
+            if pattern is not None:
+                return pattern.match(log_entry)
+
+        return self._cache_claude_output(log_entry, self.claude_client.parse_log(log_entry))
+
+    def _parse_entries(self, log_entries):
+        """
+        Parses a sequence of entries and returns the results in input order.
+        JSON entries, learned Grok formats and cached templates are handled
+        locally. Only the first entry of each unseen template goes to Claude,
+        packed into multi-entry batches, and the rest are then rebuilt from
+        the cache where possible. Entries of a template whose result could
+        not be cached are all sent in the next round.
+        """
+        log_entries = list(log_entries)
+        results = [None] * len(log_entries)
+        pending = self._dispatch_locally(log_entries, range(len(log_entries)), results)
+        sent_per_template = {}
+        while pending:
+            representatives, deferred = self._pick_representatives(log_entries, pending, sent_per_template)
+            self._resolve_with_claude(log_entries, representatives, results)
+            pending = self._dispatch_locally(log_entries, deferred, results)
+        return self._compact(results)
+
+    def _compact(self, results):
+        if self.record_compactor is None:
+            return results
+        return self.record_compactor.compact_all(results)
 
-    def _is_json(self, text):
+    def _dispatch_locally(self, log_entries, indices, results):
+        """
+        Fills in results for the entries the local dispatch stage can parse and
+        returns the indices of the others.
+        """
+        pending = []
+        for index in indices:
+            parsed_data = self._parse_locally(log_entries[index])
+            if parsed_data is None:
+                pending.append(index)
+            else:
+                results[index] = parsed_data
+        return pending
+
+    def _pick_representatives(self, log_entries, pending, sent_per_template=None):
+        """
+        Splits pending entries into (representatives, deferred): the first
+        entry of each template goes to Claude, the rest wait for the cache.
+
+        sent_per_template counts the representatives sent in earlier rounds
+        and is updated. A template that is still pending after one was sent
+        gets a second one while the cache waits to confirm its inferred
+        labels; otherwise its result could not be cached, and all of its
+        entries are sent at once instead of one per round.
+        """
+        sent_per_template = {} if sent_per_template is None else sent_per_template
+        representatives = []
+        deferred = []
+        picked_templates = set()
+        for index in pending:
+            template = self.parse_cache.template_of(log_entries[index]) if self.parse_cache is not None else None
+            sent = sent_per_template.get(template, 0)
+            if template is None or (sent and not (sent == 1 and self.parse_cache.awaiting_confirmation(template))):
+                representatives.append(index)
+            elif template in picked_templates:
+                deferred.append(index)
+            else:
+                picked_templates.add(template)
+                representatives.append(index)
+        for template in picked_templates:
+            sent_per_template[template] = sent_per_template.get(template, 0) + 1
+        return representatives, deferred
+
+    def _claude_batches(self, log_entries, indices):
+        if self.max_batch_tokens:
+            packed = self.claude_client.pack_batches([log_entries[i] for i in indices], self.max_batch_tokens)
+            return [[indices[i] for i in batch] for batch in packed]
+        return [[index] for index in indices]
+
+    def _resolve_with_claude(self, log_entries, indices, results):
+        if self.learn_grok_patterns:
+            unmatched = []
+            for index in indices:
+                pattern = self.learn_grok_pattern(log_entries[index])
+                if pattern is None:
+                    unmatched.append(index)
+                else:
+                    results[index] = pattern.match(log_entries[index])
+            indices = unmatched
+
+        batches = self._claude_batches(log_entries, indices)
+        if self.max_workers <= 1:
+            for batch in batches:
+                self._store_batch_results(log_entries, batch, results, self._parse_claude_batch, log_entries, batch)
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._parse_claude_batch, log_entries, batch) for batch in batches]
+            for batch, future in zip(batches, futures):
+                self._store_batch_results(log_entries, batch, results, future.result)
+
+    def _store_batch_results(self, log_entries, batch, results, parse, *args):
+        # A failed batch becomes inline error records, whether it ran serially or on a worker thread.
         try:
-            json.loads(text)
-            return True
-        except ValueError:
-            return False
+            parsed_batch = parse(*args)
+        except Exception as e:
+            logger.error("Error parsing batch of %d log entries: %s", len(batch), e)
+            parsed_batch = [{"parsing_error": str(e), "raw_log": log_entries[index]} for index in batch]
+        for index, parsed_data in zip(batch, parsed_batch):
+            results[index] = parsed_data
+
+    def _parse_claude_batch(self, log_entries, batch):
+        entries = [log_entries[index] for index in batch]
+        if len(entries) == 1:
+            outputs = [self.claude_client.parse_log(entries[0])]
+        else:
+            outputs = self.claude_client.parse_logs(entries, max_batch_tokens=self.max_batch_tokens)
+        return [self._cache_claude_output(entry, output) for entry, output in zip(entries, outputs)]
 
     def parse_log_entry(self, log_entry):
         try:
-            if self._is_json(log_entry):
-                parsed_data = json.loads(log_entry)
-            else:
-                parsed_data_str = self.claude_client.parse_log_with_claude(log_entry)
-                if not parsed_data_str.strip().startswith(("{", "[")):
-                    parsed_data_str = json.dumps({"raw_output": parsed_data_str})
-                parsed_data = json.loads(parsed_data_str)
+            parsed_data = self._parse_with_claude(log_entry)
+            if self.record_compactor is not None:
+                return self.record_compactor.compact(parsed_data)
             return parsed_data
         except Exception as e:
             self.error_handler.handle_error(e, f"Error parsing single log entry: {log_entry}")
 
-    def parse_log_file(self, file_path):
+    def parse_log_file(self, file_path, since_offset=None, resume=False):
         parsed_results = []
         try:
-            log_entries = self.input_handler.read_log_file(file_path)
-            for entry in log_entries:
-                try:
-                    if self._is_json(entry):
-                        parsed_results.append(json.loads(entry))
-                    else:
-                        parsed_data_str = self.claude_client.parse_log_with_claude(entry)
-                        
-                        if not parsed_data_str.strip().startswith(("{", "[")):
-                            parsed_data_str = json.dumps({"raw_output": parsed_data_str})
-
-                        parsed_results.append(json.loads(parsed_data_str))
-                except json.JSONDecodeError as e:
-                    print(f"JSONDecodeError for entry: {entry}")
-                    print(f"Problematic string: {parsed_data_str}")
-                    self.error_handler.handle_error(e, f"Error decoding JSON for entry: {entry}")
-                except Exception as e:
-                    self.error_handler.handle_error(e, f"Error parsing log entry from file: {entry}")
+            parsed_results = list(self.iter_parse_log_file(file_path, since_offset=since_offset, resume=resume))
+        except json.JSONDecodeError as e:
+            logger.error("Problematic string: %s", e.doc)
+            self.error_handler.handle_error(e, f"Error decoding JSON for entry from file: {file_path}")
         except Exception as e:
             self.error_handler.handle_error(e, f"Error processing log file: {file_path}")
         return parsed_results
 
-    def parse_logs_from_directory(self, directory_path):
+    def iter_parse_log_file(self, file_path, chunk_size=500, since_offset=None, resume=False):
+        """
+        Generator version of parse_log_file. The file is read, parsed and
+        yielded chunk_size entries at a time, so memory stays bounded no matter
+        how large the file is. Combine with OutputFormatter.write_json_lines or
+        write_csv_stream to stream results straight to disk.
+
+        since_offset starts reading at a byte offset, which should be the end
+        of a previously read entry (e.g. the old size of an appended file).
+        With resume=True and a
+        result store, reading starts at the checkpoint saved by the previous
+        run, and a checkpoint is saved after every chunk that has been yielded.
+        """
+        try:
+            start_offset = self._start_offset(file_path, since_offset, resume)
+            segments = self.input_handler.iter_log_file_with_offsets(file_path, start_offset)
+            while True:
+                chunk = list(islice(segments, chunk_size))
+                if not chunk:
+                    return
+                yield from self._parse_entries(entry for _, _, entry in chunk)
+                if resume and self.result_store is not None:
+                    self.result_store.set_checkpoint(file_path, chunk[-1][1])
+        except json.JSONDecodeError as e:
+            logger.error("Problematic string: %s", e.doc)
+            self.error_handler.handle_error(e, f"Error decoding JSON for entry from file: {file_path}")
+        except Exception as e:
+            self.error_handler.handle_error(e, f"Error processing log file: {file_path}")
+
+    def _start_offset(self, file_path, since_offset, resume):
+        if not resume or self.result_store is None or since_offset is not None:
+            return since_offset or 0
+        checkpoint = self.result_store.get_checkpoint(file_path)
+        # Checkpoints in compressed files count decompressed bytes, so they can exceed the file size.
+        if checkpoint is not None and (checkpoint <= os.path.getsize(file_path) or detect_codec(file_path)):
+            return checkpoint
+        if checkpoint is not None:
+            logger.warning("%s is smaller than its checkpoint; it was truncated or replaced. "
+                           "Starting from the beginning.", file_path)
+        return 0
+
+    def follow_log_file(self, file_path, checkpoint_path=None, batch_size=100, max_batch_delay=0.5,
+                        poll_interval=1.0, start_at_end=False, stop_event=None, idle_timeout=None):
+        """
+        Tails a growing log file and yields parsed entries as lines are
+        appended, surviving rotation and truncation.
+
+        New entries are buffered and parsed together once batch_size entries
+        have arrived, max_batch_delay seconds have passed since the first one,
+        or the file goes quiet. When checkpoint_path is given, the byte offset
+        is saved after every yielded batch and the next call resumes from it.
+        Stops when stop_event is set or after idle_timeout seconds without new
+        data; by default it runs forever.
+        """
+        from .log_follower import LogFollower
+
+        with LogFollower(file_path, checkpoint_path=checkpoint_path, poll_interval=poll_interval,
+                         start_at_end=start_at_end) as follower:
+            buffer = []
+            first_buffered = None
+            idle_since = time.monotonic()
+            while True:
+                entries = follower.read_available(max_entries=batch_size - len(buffer))
+                now = time.monotonic()
+                if entries:
+                    if not buffer:
+                        first_buffered = now
+                    buffer.extend(entry for _, _, entry in entries)
+                    idle_since = now
+                if buffer and (not entries or len(buffer) >= batch_size or now - first_buffered >= max_batch_delay):
+                    yield from self._parse_entries(buffer)
+                    follower.checkpoint()
+                    buffer = []
+                    continue
+                if entries:
+                    continue
+                if stop_event is not None and stop_event.is_set():
+                    return
+                if idle_timeout is not None and now - idle_since >= idle_timeout:
+                    return
+                follower.wait()
+
+    def parse_logs_from_directory(self, directory_path, processes=None, shard_bytes=32 * 1024 * 1024):
+        """
+        Parses every log file in a directory. With processes set, files are
+        sharded across a process pool (see iter_parse_logs_from_directory).
+        """
+        if processes:
+            return list(self.iter_parse_logs_from_directory(directory_path, processes, shard_bytes))
         parsed_results = []
         try:
-            print(f"[DEBUG] LogParsingSDK: Starting directory parsing for: {directory_path}")
+            logger.debug("Starting directory parsing for: %s", directory_path)
             log_entries_map = self.input_handler.read_logs_from_directory(directory_path)
-            print(f"[DEBUG] LogParsingSDK: InputHandler returned {len(log_entries_map)} files for directory parsing.")
-            for file_path, entries in log_entries_map.items():
-                print(f"[DEBUG] LogParsingSDK: Processing file: {file_path} with {len(entries)} entries.")
-                for i, entry in enumerate(entries):
-                    print(f"[DEBUG] LogParsingSDK: Processing entry {i+1}/{len(entries)} from {file_path}: {entry[:100]}...")
-                    try:
-                        if self._is_json(entry):
-                            parsed_results.append(json.loads(entry))
-                            print(f"[DEBUG] LogParsingSDK: Parsed pre-formatted JSON for entry {i+1} from {file_path}.")
-                        else:
-                            print(f"[DEBUG] LogParsingSDK: Sending entry {i+1} from {file_path} to Claude for parsing.")
-                            parsed_data_str = self.claude_client.parse_log_with_claude(entry)
-                            print(f"[DEBUG] LogParsingSDK: Received from Claude for entry {i+1} from {file_path}: {parsed_data_str[:100]}...")
-                            if not parsed_data_str.strip().startswith(("{", "[")):
-                                parsed_data_str = json.dumps({"raw_output": parsed_data_str})
-
-                            parsed_results.append(json.loads(parsed_data_str))
-                            print(f"[DEBUG] LogParsingSDK: Successfully parsed Claude output for entry {i+1} from {file_path}.")
-                    except json.JSONDecodeError as e:
-                        print(f"JSONDecodeError for entry: {entry}")
-                        print(f"Problematic string: {parsed_data_str}")
-                        self.error_handler.handle_error(e, f"Error decoding JSON for entry from file {file_path}: {entry}")
-                    except Exception as e:
-                        self.error_handler.handle_error(e, f"Error parsing log entry from directory {file_path}: {entry}")
+            logger.debug("InputHandler returned %d files for directory parsing.", len(log_entries_map))
+            if logger.isEnabledFor(logging.DEBUG):
+                for file_path, entries in log_entries_map.items():
+                    logger.debug("Queued file: %s with %d entries.", file_path, len(entries))
+            parsed_results = self._parse_entries(
+                entry for entries in log_entries_map.values() for entry in entries
+            )
+            logger.debug("Parsed %d entries from %s.", len(parsed_results), directory_path)
+        except json.JSONDecodeError as e:
+            logger.error("Problematic string: %s", e.doc)
+            self.error_handler.handle_error(e, f"Error decoding JSON for entry from directory: {directory_path}")
         except Exception as e:
             self.error_handler.handle_error(e, f"Error processing directory: {directory_path}")
         return parsed_results
 
-    def parse_pcap_file(self, file_path, max_packets=None):
+    def iter_parse_logs_from_directory(self, directory_path, processes=None, shard_bytes=32 * 1024 * 1024,
+                                       max_in_flight=None):
+        """
+        Parses a directory on a pool of `processes` worker processes (default:
+        one per CPU) and yields the records in file and offset order.
+
+        Files, and byte ranges of up to shard_bytes of large files, are parsed
+        by the workers with the JSON, native and learned Grok parsers; entries
+        that need Claude are sent from this process, batched and deduplicated
+        as usual. At most max_in_flight shards (default: twice the number of
+        processes) are queued or buffered at once.
+        """
+        from .parallel_ingest import ParallelIngestor
+
+        try:
+            ingestor = ParallelIngestor(self, processes, shard_bytes, max_in_flight)
+            yield from ingestor.iter_parse(directory_path)
+        except Exception as e:
+            self.error_handler.handle_error(e, f"Error processing directory: {directory_path}")
+
+    def write_logs_from_directory(self, directory_path, output, processes=None, shard_bytes=32 * 1024 * 1024,
+                                  max_in_flight=None) -> int:
+        """
+        Parses a directory like iter_parse_logs_from_directory and writes the
+        records to a path or text file handle as JSON Lines. The worker
+        processes serialize the records they parse, so this process only
+        handles the entries that need Claude. Returns the number of records
+        written.
+        """
+        from .parallel_ingest import ParallelIngestor
+
+        try:
+            ingestor = ParallelIngestor(self, processes, shard_bytes, max_in_flight)
+            return self.output_formatter.write_serialized_json_lines(ingestor.iter_json_lines(directory_path),
+                                                                     output)
+        except Exception as e:
+            self.error_handler.handle_error(e, f"Error processing directory: {directory_path}")
+
+    def parse_pcap_file(self, file_path, max_packets=None, engine="native", protocols=None, ports=None,
+                        reassemble_tcp=True):
         parsed_results = []
         try:
-            pcap_data = self.input_handler.read_pcap_file(file_path, max_packets)
-            for entry in pcap_data:
-                try:
-                    if self._is_json(entry):
-                        parsed_results.append(json.loads(entry))
-                    else:
-                        parsed_data_str = self.claude_client.parse_log_with_claude(entry)
-                        if not parsed_data_str.strip().startswith(("{", "[")):
-                            parsed_data_str = json.dumps({"raw_output": parsed_data_str})
-
-                        parsed_results.append(json.loads(parsed_data_str))
-                except json.JSONDecodeError as e:
-                    print(f"JSONDecodeError for PCAP entry: {entry}")
-                    print(f"Problematic string: {parsed_data_str}")
-                    self.error_handler.handle_error(e, f"Error decoding JSON for PCAP entry: {entry}")
-                except Exception as e:
-                    self.error_handler.handle_error(e, f"Error parsing PCAP entry: {entry}")
+            pcap_data = self.input_handler.iter_pcap_file(file_path, max_packets, engine, protocols, ports,
+                                                          reassemble_tcp)
+            parsed_results = self._parse_entries(pcap_data)
+        except json.JSONDecodeError as e:
+            logger.error("Problematic string: %s", e.doc)
+            self.error_handler.handle_error(e, f"Error decoding JSON for PCAP entry from: {file_path}")
         except Exception as e:
             self.error_handler.handle_error(e, f"Error processing PCAP file: {file_path}")
         return parsed_results
 
+    def iter_parse_pcap_file(self, file_path, chunk_size=500, max_packets=None, engine="native", protocols=None,
+                             ports=None, reassemble_tcp=True):
+        """
+        Generator version of parse_pcap_file that reads, parses and yields
+        payloads chunk_size at a time, for captures too large to hold in memory.
+        """
+        try:
+            payloads = self.input_handler.iter_pcap_file(file_path, max_packets, engine, protocols, ports,
+                                                         reassemble_tcp)
+            while True:
+                chunk = list(islice(payloads, chunk_size))
+                if not chunk:
+                    return
+                yield from self._parse_entries(chunk)
+        except Exception as e:
+            self.error_handler.handle_error(e, f"Error processing PCAP file: {file_path}")
+
     def generate_grok_pattern(self, log_entry):
         try:
             grok_pattern = self.claude_client.generate_grok_pattern_with_claude(log_entry)
@@ -121,6 +474,28 @@ class LogParsingSDK:
         except Exception as e:
             self.error_handler.handle_error(e, f"Error generating Grok pattern for log entry: {log_entry}")
 
+    def learn_grok_pattern(self, log_entry):
+        """
+        Asks Claude for a Grok pattern for a log entry and adds it to the learned
+        patterns if it compiles and matches the entry. Returns the compiled
+        pattern, or None if Claude's pattern was unusable.
+        """
+        return self._register_grok_pattern(self.generate_grok_pattern(log_entry), log_entry)
+
+    def _register_grok_pattern(self, grok_pattern, log_entry):
+        if not grok_pattern:
+            return None
+        try:
+            pattern = self.grok_patterns.add(grok_pattern, sample=log_entry)
+        except GrokError as e:
+            logger.warning("Could not compile Grok pattern from Claude: %s", e)
+            return None
+        if pattern is None:
+            logger.warning("Grok pattern from Claude does not match its sample entry: %s", grok_pattern)
+            return None
+        self.grok_patterns.save()
+        return pattern
+
     def format_to_csv(self, parsed_data):
         try:
             return self.output_formatter.format_to_csv(parsed_data)
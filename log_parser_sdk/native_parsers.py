@@ -0,0 +1,268 @@
+from __future__ import annotations
+import csv
+import re
+
+# Field order of PAN-OS 10.x syslog formats. "FUTURE_USE" columns are dropped.
+PANOS_TRAFFIC_FIELDS = [
+    "FUTURE_USE", "receive_time", "serial", "type", "subtype", "FUTURE_USE", "time_generated",
+    "src", "dst", "natsrc", "natdst", "rule", "srcuser", "dstuser", "app", "vsys", "from", "to",
+    "inbound_if", "outbound_if", "logset", "FUTURE_USE", "sessionid", "repeatcnt", "sport", "dport",
+    "natsport", "natdport", "flags", "proto", "action", "bytes", "bytes_sent", "bytes_received",
+    "packets", "start", "elapsed", "category", "FUTURE_USE", "seqno", "actionflags", "srcloc",
+    "dstloc", "FUTURE_USE", "pkts_sent", "pkts_received", "session_end_reason", "dg_hier_level_1",
+    "dg_hier_level_2", "dg_hier_level_3", "dg_hier_level_4", "vsys_name", "device_name",
+    "action_source", "src_uuid", "dst_uuid", "tunnelid", "monitortag", "parent_session_id",
+    "parent_start_time", "tunnel", "assoc_id", "chunks", "chunks_sent", "chunks_received",
+    "rule_uuid", "http2_connection", "link_change_count", "policy_id", "link_switches",
+    "sdwan_cluster", "sdwan_device_type", "sdwan_cluster_type", "sdwan_site", "dynusergroup_name",
+    "xff_ip", "src_category", "src_profile", "src_model", "src_vendor", "src_osfamily",
+    "src_osversion", "src_host", "src_mac", "dst_category", "dst_profile", "dst_model",
+    "dst_vendor", "dst_osfamily", "dst_osversion", "dst_host", "dst_mac", "container_id",
+    "pod_namespace", "pod_name", "src_edl", "dst_edl", "hostid", "serialnumber", "src_dag",
+    "dst_dag", "session_owner", "high_res_timestamp", "nssai_sst", "nssai_sd",
+    "subcategory_of_app", "category_of_app", "technology_of_app", "risk_of_app",
+    "characteristic_of_app", "container_of_app", "tunneled_app", "is_saas_of_app",
+    "sanctioned_state_of_app", "offloaded",
+]
+
+PANOS_THREAT_FIELDS = [
+    "FUTURE_USE", "receive_time", "serial", "type", "subtype", "FUTURE_USE", "time_generated",
+    "src", "dst", "natsrc", "natdst", "rule", "srcuser", "dstuser", "app", "vsys", "from", "to",
+    "inbound_if", "outbound_if", "logset", "FUTURE_USE", "sessionid", "repeatcnt", "sport", "dport",
+    "natsport", "natdport", "flags", "proto", "action", "misc", "threatid", "category", "severity",
+    "direction", "seqno", "actionflags", "srcloc", "dstloc", "FUTURE_USE", "contenttype",
+    "pcap_id", "filedigest", "cloud", "url_idx", "user_agent", "filetype", "xff", "referer",
+    "sender", "subject", "recipient", "reportid", "dg_hier_level_1", "dg_hier_level_2",
+    "dg_hier_level_3", "dg_hier_level_4", "vsys_name", "device_name", "FUTURE_USE", "src_uuid",
+    "dst_uuid", "http_method", "tunnel_id", "monitortag", "parent_session_id",
+    "parent_start_time", "tunnel", "thr_category", "contentver", "FUTURE_USE", "assoc_id", "ppid",
+    "http_headers", "url_category_list", "rule_uuid", "http2_connection", "dynusergroup_name",
+    "xff_ip", "src_category", "src_profile", "src_model", "src_vendor", "src_osfamily",
+    "src_osversion", "src_host", "src_mac", "dst_category", "dst_profile", "dst_model",
+    "dst_vendor", "dst_osfamily", "dst_osversion", "dst_host", "dst_mac", "container_id",
+    "pod_namespace", "pod_name", "src_edl", "dst_edl", "hostid", "serialnumber", "domain_edl",
+    "src_dag", "dst_dag", "partial_hash", "high_res_timestamp", "reason", "justification",
+    "nssai_sst", "subcategory_of_app", "category_of_app", "technology_of_app", "risk_of_app",
+    "characteristic_of_app", "container_of_app", "tunneled_app", "is_saas_of_app",
+    "sanctioned_state_of_app",
+]
+
+PANOS_SYSTEM_FIELDS = [
+    "FUTURE_USE", "receive_time", "serial", "type", "subtype", "FUTURE_USE", "time_generated",
+    "vsys", "eventid", "object", "FUTURE_USE", "FUTURE_USE", "module", "severity", "opaque",
+    "seqno", "actionflags", "dg_hier_level_1", "dg_hier_level_2", "dg_hier_level_3",
+    "dg_hier_level_4", "vsys_name", "device_name", "FUTURE_USE", "FUTURE_USE",
+    "high_res_timestamp",
+]
+
+PANOS_FIELD_MAPS = {
+    "TRAFFIC": PANOS_TRAFFIC_FIELDS,
+    "THREAT": PANOS_THREAT_FIELDS,
+    "SYSTEM": PANOS_SYSTEM_FIELDS,
+}
+
+_PANOS_INT_FIELDS = {
+    "sessionid", "repeatcnt", "sport", "dport", "natsport", "natdport", "bytes", "bytes_sent",
+    "bytes_received", "packets", "elapsed", "seqno", "pkts_sent", "pkts_received", "url_idx",
+    "reportid", "pcap_id", "parent_session_id", "assoc_id", "chunks", "chunks_sent",
+    "chunks_received",
+}
+
+_PANOS_START = re.compile(
+    r"(?:^|\s)(\d+,\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2},[^,]*,([A-Z]+),)"
+)
+
+_RFC5424 = re.compile(
+    r"<(?P<priority>\d{1,3})>(?P<version>\d{1,2}) (?P<timestamp>\S+) (?P<hostname>\S+) "
+    r"(?P<appname>\S+) (?P<procid>\S+) (?P<msgid>\S+) "
+    r"(?P<structured_data>-|(?:\[(?:[^\]\\]|\\.)*\])+)(?: (?P<message>.*))?$",
+    re.DOTALL,
+)
+
+_RFC3164 = re.compile(
+    r"(?:<(?P<priority>\d{1,3})>)?"
+    r"(?P<timestamp>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) (?P<hostname>\S+)"
+    r"(?: (?P<appname>[^\s:\[]+)(?:\[(?P<procid>\d+)\])?:(?= |$))?"
+    r"(?: (?P<message>.*))?$",
+    re.DOTALL,
+)
+
+_NIL = "-"
+
+
+def _with_priority(fields: dict) -> dict:
+    priority = fields.pop("priority", None)
+    if priority is not None:
+        priority = int(priority)
+        fields["priority"] = priority
+        fields["facility"] = priority // 8
+        fields["severity"] = priority % 8
+    return fields
+
+
+def parse_syslog_header(log_entry: str) -> dict | None:
+    """
+    Parses an RFC 5424 or RFC 3164 syslog line into its header fields and
+    message. Returns None if the entry is not syslog.
+    """
+    match = _RFC5424.match(log_entry)
+    if match is not None:
+        fields = {key: value for key, value in match.groupdict().items() if value not in (None, _NIL)}
+        fields["version"] = int(fields["version"])
+        return _with_priority(fields)
+    match = _RFC3164.match(log_entry)
+    if match is not None:
+        fields = {key: value for key, value in match.groupdict().items() if value is not None}
+        if "procid" in fields:
+            fields["procid"] = int(fields["procid"])
+        return _with_priority(fields)
+    return None
+
+
+class NativeParser:
+    """
+    Base class for deterministic parsers of well-known log formats.
+
+    `matches` must be cheap (a prefix or substring check) since it runs for
+    every entry; `parse` does the real work and may still return None.
+    """
+
+    name = "native"
+
+    def matches(self, log_entry: str) -> bool:
+        raise NotImplementedError
+
+    def parse(self, log_entry: str) -> dict | None:
+        raise NotImplementedError
+
+
+class PanOsParser(NativeParser):
+    """
+    Parses Palo Alto Networks PAN-OS CSV logs, with or without a syslog
+    header in front. Log types without a field map are left to other parsers.
+    """
+
+    name = "panos"
+
+    def __init__(self, field_maps: dict = None):
+        self.field_maps = field_maps or PANOS_FIELD_MAPS
+
+    def matches(self, log_entry: str) -> bool:
+        # The type column sits right after the serial number near the start.
+        return "," in log_entry[:256] and any(f",{log_type}," in log_entry[:256] for log_type in self.field_maps)
+
+    def parse(self, log_entry: str) -> dict | None:
+        match = _PANOS_START.search(log_entry, 0, 512)
+        if match is None or match.group(2) not in self.field_maps:
+            return None
+        body = log_entry[match.start(1):]
+        try:
+            row = next(csv.reader([body]))
+        except csv.Error:
+            return None
+
+        result = {}
+        for name, value in zip(self.field_maps[match.group(2)], row):
+            if name == "FUTURE_USE" or value == "":
+                continue
+            if name in _PANOS_INT_FIELDS and value.isdigit():
+                value = int(value)
+            result[name] = value
+
+        header = log_entry[:match.start(1)].strip()
+        if header:
+            syslog = parse_syslog_header(header)
+            result["syslog"] = syslog if syslog is not None else {"header": header}
+        return result
+
+
+class Rfc5424Parser(NativeParser):
+    """
+    Parses RFC 5424 syslog lines: <PRI>VERSION TIMESTAMP HOST APP PROCID MSGID SD MSG.
+    """
+
+    name = "rfc5424"
+
+    def matches(self, log_entry: str) -> bool:
+        return log_entry.startswith("<") and ">" in log_entry[:5]
+
+    def parse(self, log_entry: str) -> dict | None:
+        match = _RFC5424.match(log_entry)
+        if match is None:
+            return None
+        return parse_syslog_header(log_entry)
+
+
+class Rfc3164Parser(NativeParser):
+    """
+    Parses BSD (RFC 3164) syslog lines: optional <PRI>, "Mmm dd hh:mm:ss",
+    host, an optional "tag[pid]:" and the message.
+    """
+
+    name = "rfc3164"
+
+    def matches(self, log_entry: str) -> bool:
+        start = log_entry.find(">") + 1 if log_entry.startswith("<") else 0
+        return (log_entry[start:start + 3].isalpha() and log_entry[start + 3:start + 4] == " "
+                and log_entry[start + 9:start + 10] == ":")
+
+    def parse(self, log_entry: str) -> dict | None:
+        match = _RFC3164.match(log_entry)
+        if match is None:
+            return None
+        return parse_syslog_header(log_entry)
+
+
+class NativeParserRegistry:
+    """
+    An ordered registry of native parsers consulted before Grok patterns and
+    Claude. The first parser whose cheap `matches` check passes and whose
+    `parse` returns a result wins, so more specific formats go first.
+    """
+
+    def __init__(self, parsers: list = None):
+        if parsers is None:
+            parsers = [PanOsParser(), Rfc5424Parser(), Rfc3164Parser()]
+        self._parsers = list(parsers)
+        self.hits = {parser.name: 0 for parser in self._parsers}
+
+    def __len__(self):
+        return len(self._parsers)
+
+    @property
+    def names(self) -> list[str]:
+        return [parser.name for parser in self._parsers]
+
+    def register(self, parser: NativeParser, first: bool = True):
+        """
+        Adds a parser, by default ahead of the built-in ones. A parser with the
+        same name is replaced.
+        """
+        self.unregister(parser.name)
+        if first:
+            self._parsers.insert(0, parser)
+        else:
+            self._parsers.append(parser)
+        self.hits.setdefault(parser.name, 0)
+
+    def unregister(self, name: str):
+        self._parsers = [parser for parser in self._parsers if parser.name != name]
+
+    def classify(self, log_entry: str) -> str | None:
+        """
+        Returns the name of the first parser that claims the entry, or None.
+        """
+        for parser in self._parsers:
+            if parser.matches(log_entry):
+                return parser.name
+        return None
+
+    def parse(self, log_entry: str) -> dict | None:
+        for parser in self._parsers:
+            if not parser.matches(log_entry):
+                continue
+            result = parser.parse(log_entry)
+            if result is not None:
+                self.hits[parser.name] = self.hits.get(parser.name, 0) + 1
+                return result
+        return None
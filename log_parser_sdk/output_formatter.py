@@ -1,19 +1,46 @@
+from __future__ import annotations
 import json
 import csv
+import tempfile
+from contextlib import nullcontext
 from io import StringIO
+from .compact_records import CompactRecord, record_default
+from .instrumentation import metrics
+
+
+def flatten_record(record: dict, separator: str = "_", max_depth: int = None) -> dict:
+    """
+    Flattens nested dictionaries into a single level, joining keys with
+    `separator` (so {"a": {"b": 1}} becomes {"a_b": 1}). Dictionaries nested
+    deeper than `max_depth` levels are kept as values; None flattens fully.
+    Lists are kept as values.
+    """
+    row = {}
+    _flatten_into(row, record, "", separator, max_depth)
+    return row
+
+
+def _flatten_into(row: dict, item: dict, prefix: str, separator: str, depth_left: int | None):
+    for key, value in item.items():
+        name = f"{prefix}{separator}{key}" if prefix else str(key)
+        if isinstance(value, (dict, CompactRecord)) and depth_left != 0:
+            _flatten_into(row, value, name, separator, None if depth_left is None else depth_left - 1)
+        else:
+            row[name] = value
+
 
 class OutputFormatter:
     def format_to_json(self, data: dict) -> str:
         """
         Formats a dictionary into a JSON string.
         """
-        return json.dumps(data, indent=2)
+        return json.dumps(data, indent=2, default=record_default)
 
     def format_list_to_json(self, data_list: list[dict]) -> str:
         """
         Formats a list of dictionaries into a JSON string.
         """
-        return json.dumps(data_list, indent=2)
+        return json.dumps(data_list, indent=2, default=record_default)
 
     def format_to_csv(self, data_list: list[dict], output_file: str = None) -> str | None:
         """
@@ -23,38 +50,132 @@ class OutputFormatter:
         if not data_list:
             return "" if output_file is None else None
 
-        # Collect all unique keys from all dictionaries to use as CSV headers
-        all_keys = set()
-        for item in data_list:
-            for key, value in item.items():
-                if isinstance(value, dict):
-                    # Flatten nested dictionaries
-                    for sub_key in value.keys():
-                        all_keys.add(f"{key}_{sub_key}")
-                else:
-                    all_keys.add(key)
-        
-        fieldnames = sorted(list(all_keys))
-
-        output = StringIO()
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-
-        writer.writeheader()
-        for item in data_list:
-            row = {}
-            for key, value in item.items():
-                if isinstance(value, dict):
-                    for sub_key, sub_value in value.items():
-                        row[f"{key}_{sub_key}"] = sub_value
-                else:
-                    row[key] = value
-            writer.writerow(row)
-
         if output_file:
-            with open(output_file, 'w', newline='') as f:
-                f.write(output.getvalue())
+            self.write_csv_stream(data_list, output_file, max_depth=1, sort_fields=True)
             return None
-        else:
-            return output.getvalue()
+        output = StringIO()
+        self.write_csv_stream(data_list, output, max_depth=1, sort_fields=True)
+        return output.getvalue()
+
+    def _open_output(self, output):
+        if isinstance(output, str):
+            return open(output, 'w', newline='', encoding='utf-8')
+        return nullcontext(output)
+
+    def write_json_lines(self, records, output) -> int:
+        """
+        Writes records to a path or text file handle as JSON Lines, one record
+        at a time. Returns the number of records written.
+        """
+        count = 0
+        with self._open_output(output) as f:
+            for record in records:
+                started = metrics.start()
+                f.write(json.dumps(record, default=record_default))
+                f.write("\n")
+                metrics.stop("format", started)
+                count += 1
+        metrics.increment("records_formatted", count, format="jsonl")
+        return count
+
+    def write_serialized_json_lines(self, chunks, output) -> int:
+        """
+        Writes chunks of already serialized JSON Lines strings, such as those
+        from ParallelIngestor.iter_json_lines, to a path or text file handle.
+        Returns the number of records written.
+        """
+        count = 0
+        with self._open_output(output) as f:
+            for lines in chunks:
+                f.writelines(lines)
+                count += len(lines)
+        metrics.increment("records_formatted", count, format="jsonl")
+        return count
+
+    def write_csv_stream(self, records, output, fieldnames: list[str] = None, separator: str = "_",
+                         max_depth: int = None, sort_fields: bool = False) -> int:
+        """
+        Writes records to a path or text file handle as CSV in constant memory.
+        Nested dictionaries are flattened into columns named with `separator`
+        (up to `max_depth` levels; None flattens fully).
+
+        With `fieldnames` the header is written first and every record goes
+        straight to the output; keys outside the header are dropped. Without
+        it, rows are spilled to a temporary file while the header is collected
+        as the union of all keys (in first-seen order, or sorted with
+        `sort_fields`), then copied to the output behind the header. Returns
+        the number of records written.
+        """
+        if fieldnames is not None:
+            return self._write_declared_csv(records, output, fieldnames, separator, max_depth)
+
+        count = 0
+        columns = {}  # Column name -> position in the spilled rows, in first-seen order.
+        with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as spill:
+            spill_writer = csv.writer(spill)
+            for record in records:
+                started = metrics.start()
+                row = flatten_record(record, separator, max_depth)
+                for name in row:
+                    if name not in columns:
+                        columns[name] = len(columns)
+                values = [None] * len(columns)
+                for name, value in row.items():
+                    values[columns[name]] = value
+                spill_writer.writerow(values)
+                metrics.stop("format", started)
+                count += 1
+            if not count:
+                return 0
+
+            started = metrics.start()
+            header = sorted(columns) if sort_fields else list(columns)
+            order = [columns[name] for name in header]
+            width = len(header)
+            spill.seek(0)
+            with self._open_output(output) as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                for values in csv.reader(spill):
+                    # Rows spilled before a column was first seen are shorter.
+                    values.extend([""] * (width - len(values)))
+                    writer.writerow([values[i] for i in order] if sort_fields else values)
+            metrics.stop("format", started)
+        metrics.increment("records_formatted", count, format="csv")
+        return count
+
+    def _write_declared_csv(self, records, output, fieldnames: list[str], separator: str, max_depth: int | None) -> int:
+        count = 0
+        with self._open_output(output) as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for record in records:
+                started = metrics.start()
+                writer.writerow(flatten_record(record, separator, max_depth))
+                metrics.stop("format", started)
+                count += 1
+        metrics.increment("records_formatted", count, format="csv")
+        return count
 
+    def write_parquet(self, records, output, row_group_size: int = 10000, dictionary_fields: list[str] = None,
+                      separator: str = "_", compression: str = "zstd", typed_columns=None) -> int:
+        """
+        Writes records to a Parquet file (a path or binary file handle) one row
+        group at a time, flattening nested fields and evolving the schema as
+        new fields appear. Requires pyarrow. Returns the number of records
+        written. See ParquetRecordWriter for the type and dictionary rules.
+
+        With a TypedColumnConverter as `typed_columns`, each row group is
+        converted in bulk first, so addresses, timestamps, hex flags and
+        counters are stored as uint32, timestamp and int64 columns.
+        """
+        from .parquet_writer import ParquetRecordWriter
 
+        with ParquetRecordWriter(output, row_group_size=row_group_size, dictionary_fields=dictionary_fields,
+                                 separator=separator, compression=compression) as writer:
+            if typed_columns is None:
+                count = writer.write_records(records)
+            else:
+                count = writer.write_batches(typed_columns.iter_batches(records, row_group_size))
+        metrics.increment("records_formatted", count, format="parquet")
+        return count
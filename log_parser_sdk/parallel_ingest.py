@@ -0,0 +1,124 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from .compact_records import record_default
+from .grok import GrokPatternStore
+from .input_handler import InputHandler
+from .json_extract import decode_json_entry
+
+# Per-process state set up once by _init_worker rather than pickled with every shard.
+_worker = {}
+
+
+def _init_worker(native_parsers, grok_patterns: list[str], custom_patterns: dict = None):
+    store = GrokPatternStore(custom_patterns=custom_patterns)
+    for pattern in grok_patterns:
+        store.add(pattern)
+    # Each process already has a core, so compressed files are not decompressed on extra threads.
+    _worker["input_handler"] = InputHandler(decompress_workers=1)
+    _worker["native_parsers"] = native_parsers
+    _worker["grok_patterns"] = store
+
+
+def _parse_locally(log_entry: str):
+    json_result = decode_json_entry(log_entry)
+    if json_result is not None:
+        return json_result
+    native_parsers = _worker["native_parsers"]
+    if native_parsers is not None:
+        result = native_parsers.parse(log_entry)
+        if result is not None:
+            return result
+    return _worker["grok_patterns"].match(log_entry)
+
+
+def parse_shard(shard: tuple[str, int, int]):
+    """
+    Segments one (file_path, start, end) shard and parses what it can without
+    Claude. Returns the records in file order, with None for entries that need
+    Claude, and a dict mapping those positions to the raw entries.
+    """
+    file_path, start, end = shard
+    records = []
+    unresolved = {}
+    for _, _, entry in _worker["input_handler"].iter_log_range(file_path, start, end):
+        result = _parse_locally(entry)
+        if result is None:
+            unresolved[len(records)] = entry
+        records.append(result)
+    return records, unresolved
+
+
+def _json_line(record) -> str:
+    return json.dumps(record, default=record_default) + "\n"
+
+
+def serialize_shard(shard: tuple[str, int, int]):
+    """
+    parse_shard, with each parsed record returned as a JSON Lines string so
+    that serialization also happens in the worker. Entries that need Claude
+    are still None.
+    """
+    records, unresolved = parse_shard(shard)
+    return [None if record is None else _json_line(record) for record in records], unresolved
+
+
+class ParallelIngestor:
+    """
+    Parses the log files of a directory on a process pool.
+
+    Files are split into shards (whole files, or line-aligned byte ranges of
+    large files) that workers segment and parse with the JSON, native and
+    learned Grok parsers. Entries that still need Claude are handed back and
+    resolved in this process through the SDK's batching and template cache.
+    iter_json_lines also serializes the records in the workers, so that the
+    parent only writes text. Results are yielded in file and offset order,
+    and at most max_in_flight shards are queued or held at once to bound
+    memory.
+    """
+
+    def __init__(self, sdk, processes: int = None, shard_bytes: int = 32 * 1024 * 1024, max_in_flight: int = None):
+        self.sdk = sdk
+        self.processes = processes or os.cpu_count() or 1
+        self.shard_bytes = shard_bytes
+        self.max_in_flight = max_in_flight or 2 * self.processes
+
+    def shards(self, directory_path: str):
+        input_handler = self.sdk.input_handler
+        return input_handler.iter_shards(input_handler.list_log_files(directory_path), self.shard_bytes)
+
+    def _iter_shard_results(self, directory_path: str, work):
+        # Yields work(shard) for each shard in order, with its unresolved entries parsed here as a dict
+        # of position -> record, already compacted by _parse_entries.
+        shards = self.shards(directory_path)
+        grok_store = self.sdk.grok_patterns
+        initargs = (self.sdk.native_parsers, [pattern.pattern for pattern in grok_store], grok_store.custom_patterns)
+        with ProcessPoolExecutor(self.processes, initializer=_init_worker, initargs=initargs) as pool:
+            in_flight = deque(pool.submit(work, shard) for shard in islice(shards, self.max_in_flight))
+            while in_flight:
+                results, unresolved = in_flight.popleft().result()
+                next_shard = next(shards, None)
+                if next_shard is not None:
+                    in_flight.append(pool.submit(work, next_shard))
+                resolved = self.sdk._parse_entries(unresolved.values()) if unresolved else []
+                yield results, dict(zip(unresolved, resolved))
+
+    def iter_parse(self, directory_path: str):
+        for records, resolved in self._iter_shard_results(directory_path, parse_shard):
+            records = self.sdk._compact(records)
+            for index, record in resolved.items():
+                records[index] = record
+            yield from records
+
+    def iter_json_lines(self, directory_path: str):
+        """
+        Yields the records of each shard, in order, as a list of JSON Lines
+        strings. Workers serialize what they parse; only the records of
+        entries resolved by Claude are serialized in this process.
+        """
+        for lines, resolved in self._iter_shard_results(directory_path, serialize_shard):
+            for index, record in resolved.items():
+                lines[index] = _json_line(record)
+            yield lines
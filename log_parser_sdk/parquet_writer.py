@@ -0,0 +1,366 @@
+from __future__ import annotations
+import json
+import os
+import shutil
+import tempfile
+from .instrumentation import metrics
+from .compact_records import CompactRecord, record_default
+from .output_formatter import flatten_record
+from .typed_columns import KIND_METADATA
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: pip install log_parser_sdk[parquet]
+    pa = pc = pq = None
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+_HEX_DIGITS = pa.array(list("0123456789abcdef")) if pa is not None else None
+
+
+def _value_kind(value) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int" if _INT64_MIN <= value <= _INT64_MAX else "string"
+    if isinstance(value, float):
+        return "float"
+    return "string"
+
+
+def _merge_kinds(first: str | None, second: str | None) -> str | None:
+    """
+    Returns the narrowest kind that holds both: integers widen to floats,
+    uint32 columns from typed batches widen to int64, and any other mix
+    (including uint64, and IPv4 or hex columns, with anything else) becomes
+    a string column.
+    """
+    if first is None or first == second:
+        return second
+    if second is None:
+        return first
+    if {first, second} == {"int", "float"}:
+        return "float"
+    if {first, second} == {"int", "uint32"}:
+        return "int"
+    return "string"
+
+
+def _arrow_kind(field) -> str | None:
+    # The kind of a column of a typed record batch. TypedColumnConverter tags converted IPv4 and hex columns.
+    kind = (field.metadata or {}).get(KIND_METADATA)
+    if kind is not None:
+        return kind.decode()
+    arrow_type = field.type
+    if pa.types.is_null(arrow_type):
+        return None
+    if pa.types.is_boolean(arrow_type):
+        return "bool"
+    if pa.types.is_uint32(arrow_type):
+        return "uint32"
+    if pa.types.is_uint64(arrow_type):
+        return "uint64"
+    if pa.types.is_integer(arrow_type):
+        return "int"
+    if pa.types.is_floating(arrow_type):
+        return "float"
+    if pa.types.is_timestamp(arrow_type):
+        return "timestamp"
+    return "string"
+
+
+def _as_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, CompactRecord, list, tuple, bool, int, float)):
+        return json.dumps(value, default=record_default)
+    return str(value)
+
+
+def _ipv4_text(column):
+    octets = [pc.cast(pc.bit_wise_and(pc.shift_right(column, pa.scalar(shift, pa.uint32())),
+                                      pa.scalar(255, pa.uint32())), pa.string()) for shift in (24, 16, 8, 0)]
+    return pc.binary_join_element_wise(*octets, ".")
+
+
+def _hex_text(column):
+    digits = [pc.take(_HEX_DIGITS, pc.bit_wise_and(pc.shift_right(column, pa.scalar(shift, pa.uint64())),
+                                                   pa.scalar(15, pa.uint64()))) for shift in range(60, -4, -4)]
+    # Drop the leading zeros, keeping one digit for 0, as hex() does.
+    return pc.replace_substring_regex(pc.binary_join_element_wise(*digits, ""), pattern=r"^0*(.)",
+                                      replacement=r"0x\1")
+
+
+def _timestamp_text(column):
+    text = pc.strftime(column, format="%Y-%m-%d %H:%M:%S")
+    # Drop the trailing zeros of the microseconds, and the fraction when it is all zeros.
+    return pc.replace_substring_regex(text, pattern=r"(\.\d*[1-9])0+$|\.0+$", replacement=r"\1")
+
+
+# Writes typed values back as text when their column becomes a string column, instead of casting the numbers.
+_TEXT_RENDERERS = {"ipv4": _ipv4_text, "hex": _hex_text, "timestamp": _timestamp_text}
+
+
+def _cast_column(column, arrow_type, kind: str = None):
+    # kind is the column's own kind, from _arrow_kind or the kinds of the segment it was written to.
+    if column.type == arrow_type:
+        return column
+    if pa.types.is_nested(column.type):
+        # Arrow cannot cast lists or structs to text; store them as JSON like record values.
+        column = pa.array([_as_text(value) for value in column.to_pylist()], pa.string())
+    elif kind in _TEXT_RENDERERS and (pa.types.is_string(arrow_type) or pa.types.is_dictionary(arrow_type)):
+        column = _TEXT_RENDERERS[kind](column)
+    if pa.types.is_dictionary(arrow_type):
+        return column.cast(pa.string()).dictionary_encode()
+    return column.cast(arrow_type)
+
+
+class ParquetRecordWriter:
+    """
+    Streams parsed records into a Parquet file one row group at a time.
+
+    Records are flattened to any depth (nested keys joined by `separator`),
+    buffered until `row_group_size` rows, and written as one row group, so
+    memory stays bounded by a single group. Column types are inferred from the
+    values: booleans, 64-bit integers and floats stay numeric, integers widen
+    to floats when mixed, and any other mix or nested list is stored as text.
+
+    The schema evolves as records arrive. A new column or a widened type opens
+    a new segment (a temporary Parquet file) with the merged schema; on close
+    the segments are rewritten row group by row group into one file with the
+    final schema, with nulls for columns a segment did not have. Files whose
+    schema settles within the first row group are never rewritten. Typed
+    IPv4, hex and timestamp values in a column that later becomes text are
+    rewritten as "10.80.22.2", "0x2000" and "2021-10-13 12:54:53". The text
+    is rendered from the typed values, not kept from the input, so it is
+    canonical rather than verbatim: "0x00002000" and "0X2000" both come back
+    as "0x2000", and timestamps in other formats in the second form.
+
+    String columns named in `dictionary_fields`, or, when it is None, whose
+    first row group repeats values (at most `dictionary_ratio` distinct values
+    per row), are stored as Arrow dictionary columns such as action, app or
+    hostnames; Parquet pages are dictionary-encoded either way.
+    """
+
+    def __init__(self, output, row_group_size: int = 10000, dictionary_fields: list[str] = None,
+                 dictionary_ratio: float = 0.2, separator: str = "_", compression: str = "zstd"):
+        if pa is None:
+            raise ImportError("Parquet output requires pyarrow: pip install log_parser_sdk[parquet]")
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be at least 1")
+        self.output = output
+        self.row_group_size = row_group_size
+        self.dictionary_fields = None if dictionary_fields is None else set(dictionary_fields)
+        self.dictionary_ratio = dictionary_ratio
+        self.separator = separator
+        self.compression = compression
+        self.rows_written = 0
+        self._kinds = {}  # Column name -> kind, in order of first appearance.
+        self._dictionary = set()
+        self._decided = set()
+        self._buffer = []
+        self._segments = []
+        self._segment_kinds = []
+        self._writer = None
+        directory = os.path.dirname(os.path.abspath(output)) if isinstance(output, str) else None
+        self._spill_dir = tempfile.mkdtemp(prefix=".parquet-", dir=directory)
+        self._closed = False
+
+    @property
+    def schema(self):
+        """
+        The Arrow schema of the row groups written so far.
+        """
+        return self._arrow_schema(self._kinds)
+
+    def write(self, record: dict):
+        self._buffer.append(flatten_record(record, self.separator))
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def write_records(self, records) -> int:
+        """
+        Writes every record from an iterable. Returns the number written.
+        """
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        return count
+
+    def _arrow_type(self, name: str, kind: str | None):
+        if kind == "string" and name in self._dictionary:
+            return pa.dictionary(pa.int32(), pa.string())
+        return {"bool": pa.bool_(), "int": pa.int64(), "float": pa.float64(), "string": pa.string(),
+                "uint32": pa.uint32(), "uint64": pa.uint64(), "ipv4": pa.uint32(), "hex": pa.uint64(),
+                "timestamp": pa.timestamp("us"), None: pa.null()}[kind]
+
+    def _arrow_schema(self, kinds: dict):
+        return pa.schema([pa.field(name, self._arrow_type(name, kind)) for name, kind in kinds.items()])
+
+    def _choose_dictionary_columns(self, batch_kinds: dict, is_repetitive):
+        for name, kind in batch_kinds.items():
+            if name in self._decided or kind is None:
+                continue
+            self._decided.add(name)
+            if self.dictionary_fields is not None:
+                if name in self.dictionary_fields:
+                    self._dictionary.add(name)
+                continue
+            if kind == "string" and is_repetitive(name):
+                self._dictionary.add(name)
+
+    def _repetitive_values(self, values: list) -> bool:
+        values = [value for value in values if value is not None]
+        return len(set(map(_as_text, values))) <= self.dictionary_ratio * len(values)
+
+    def _repetitive_column(self, column) -> bool:
+        if not (pa.types.is_string(column.type) or pa.types.is_dictionary(column.type)):
+            return False
+        return pc.count_distinct(column).as_py() <= self.dictionary_ratio * (len(column) - column.null_count)
+
+    def _flush(self):
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        started = metrics.start()
+        columns = {}
+        for row in rows:
+            for name in row:
+                if name not in columns:
+                    columns[name] = [row.get(name) for row in rows]
+        batch_kinds = {}
+        for name, values in columns.items():
+            kind = None
+            for value in values:
+                kind = _merge_kinds(kind, _value_kind(value))
+            batch_kinds[name] = kind
+        self._choose_dictionary_columns(batch_kinds, lambda name: self._repetitive_values(columns[name]))
+        self._merge_schema(batch_kinds)
+
+        arrays = []
+        for name, kind in self._kinds.items():
+            if name not in columns:
+                arrays.append(pa.nulls(len(rows), self._arrow_type(name, kind)))
+                continue
+            values = columns[name]
+            if kind == "string":
+                array = pa.array([_as_text(value) for value in values], pa.string())
+                arrays.append(array.dictionary_encode() if name in self._dictionary else array)
+            else:
+                arrays.append(pa.array(values, self._arrow_type(name, kind)))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._writer.schema))
+        self.rows_written += len(rows)
+        metrics.stop("format", started)
+
+    def write_batch(self, batch) -> int:
+        """
+        Writes a pyarrow RecordBatch or Table, such as one produced by
+        TypedColumnConverter, keeping its column types (uint32 addresses,
+        timestamps). The schema evolves as it does for records, and buffered
+        records are flushed first so rows stay in order. Returns the number
+        of rows written.
+        """
+        self._flush()
+        if not batch.num_rows:
+            return 0
+        started = metrics.start()
+        columns = {name: batch.column(name) for name in batch.schema.names}
+        batch_kinds = {field.name: _arrow_kind(field) for field in batch.schema}
+        self._choose_dictionary_columns(batch_kinds, lambda name: self._repetitive_column(columns[name]))
+        self._merge_schema(batch_kinds)
+
+        arrays = []
+        for name, kind in self._kinds.items():
+            arrow_type = self._arrow_type(name, kind)
+            if name in columns:
+                arrays.append(_cast_column(columns[name], arrow_type, batch_kinds[name]))
+            else:
+                arrays.append(pa.nulls(batch.num_rows, arrow_type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._writer.schema))
+        self.rows_written += batch.num_rows
+        metrics.stop("format", started)
+        return batch.num_rows
+
+    def write_batches(self, batches) -> int:
+        """
+        Writes every record batch from an iterable. Returns the number of rows written.
+        """
+        return sum(self.write_batch(batch) for batch in batches)
+
+    def _merge_schema(self, batch_kinds: dict):
+        merged = dict(self._kinds)
+        for name, kind in batch_kinds.items():
+            merged[name] = _merge_kinds(merged.get(name), kind)
+        if self._writer is None or merged != self._kinds:
+            self._open_segment(merged)
+
+    def _open_segment(self, kinds: dict):
+        if self._writer is not None:
+            self._writer.close()
+        self._kinds = kinds
+        path = os.path.join(self._spill_dir, f"segment-{len(self._segments):05d}.parquet")
+        self._segments.append(path)
+        self._segment_kinds.append(kinds)
+        self._writer = pq.ParquetWriter(path, self._arrow_schema(kinds), compression=self.compression)
+
+    def close(self):
+        """
+        Flushes buffered rows and produces the final file.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._flush()
+            if self._writer is None:
+                self._open_segment(self._kinds)
+            self._writer.close()
+            if len(self._segments) == 1:
+                self._publish(self._segments[0])
+            else:
+                merged = os.path.join(self._spill_dir, "merged.parquet")
+                self._merge_segments(merged)
+                self._publish(merged)
+        finally:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+    def _merge_segments(self, path: str):
+        schema = self._arrow_schema(self._kinds)
+        with pq.ParquetWriter(path, schema, compression=self.compression) as writer:
+            for segment, kinds in zip(self._segments, self._segment_kinds):
+                segment_file = pq.ParquetFile(segment)
+                for index in range(segment_file.num_row_groups):
+                    table = segment_file.read_row_group(index)
+                    arrays = [_cast_column(table.column(field.name), field.type, kinds.get(field.name))
+                              if field.name in table.column_names else pa.nulls(table.num_rows, field.type)
+                              for field in schema]
+                    writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    def _publish(self, path: str):
+        if isinstance(self.output, str):
+            os.replace(path, self.output)
+        else:
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, self.output)
+
+    def __enter__(self):
+        return self
+
+    def abort(self):
+        """
+        Discards everything written so far without touching the output.
+        """
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close()
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif not self._closed:
+            self.abort()
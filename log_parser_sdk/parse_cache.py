@@ -0,0 +1,333 @@
+import re
+import threading
+from collections import OrderedDict
+
+# Variable parts of a log line, tried in order. Everything that is not matched
+# here is treated as literal text and becomes part of the template key.
+_VARIABLE_PATTERN = re.compile(
+    r"(?P<TS>\d{4}[/-]\d{2}[/-]\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+    r"|\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) +\d{1,2} \d{2}:\d{2}:\d{2}\b)"
+    r"|(?P<UUID>\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b)"
+    r"|(?P<IP>\b\d{1,3}(?:\.\d{1,3}){3}\b"
+    r"|\b(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}\b)"
+    r"|(?P<TIME>\b\d{1,2}:\d{2}:\d{2}(?:\.\d+)?\b)"
+    r"|(?P<HEX>\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{16,}\b)"
+    r"|(?P<NUM>\b\d+(?:\.\d+)?\b)"
+)
+
+_DIGIT = re.compile(r"\d")
+
+
+class _MaskedEntry:
+    """
+    A log entry split into alternating literal and variable pieces.
+    Even indices of `pieces` are literals, odd indices are variable tokens.
+    """
+    __slots__ = ("text", "pieces", "starts", "template")
+
+    def __init__(self, text: str):
+        self.text = text
+        pieces = []
+        starts = []
+        template = []
+        pos = 0
+        for match in _VARIABLE_PATTERN.finditer(text):
+            starts.append(pos)
+            pieces.append(text[pos:match.start()])
+            starts.append(match.start())
+            pieces.append(match.group())
+            template.append(text[pos:match.start()])
+            template.append(f"<{match.lastgroup}>")
+            pos = match.end()
+        starts.append(pos)
+        pieces.append(text[pos:])
+        template.append(text[pos:])
+        self.pieces = pieces
+        self.starts = starts
+        self.template = "".join(template)
+
+    def _piece_at(self, position: int) -> int:
+        lo, hi = 0, len(self.starts) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.starts[mid] <= position:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def span_to_ref(self, start: int, end: int):
+        """
+        Converts a character span of the raw text into a template-relative
+        reference, or returns None if the span cuts through a variable token.
+        """
+        first = self._piece_at(start)
+        last = self._piece_at(end - 1)
+        first_offset = start - self.starts[first]
+        last_offset = end - self.starts[last]
+        if first % 2 == 1 and first_offset != 0:
+            return None
+        if last % 2 == 1:
+            if last_offset != len(self.pieces[last]):
+                return None
+            last_offset = None
+        return (first, first_offset, last, last_offset)
+
+    def render(self, ref) -> str:
+        first, first_offset, last, last_offset = ref
+        if first == last:
+            return self.pieces[first][first_offset:last_offset]
+        return (
+            self.pieces[first][first_offset:]
+            + "".join(self.pieces[first + 1:last])
+            + self.pieces[last][:last_offset]
+        )
+
+
+class ParseCache:
+    """
+    LRU cache of Claude parse results keyed on the masked template of a log entry.
+
+    Variable parts of an entry (timestamps, IPs, hex values, numbers, UUIDs) are
+    replaced by placeholders to build the key. For each cached template the cache
+    keeps a field mapping that records where every parsed value came from in the
+    raw entry, so a later entry with the same template can be parsed locally by
+    substituting its own values into that mapping.
+
+    Values that do not appear in the entry, such as a service or status text
+    Claude inferred from a port or code, may depend on the variable parts. A
+    mapping with such a label is only used once a second entry of the same
+    template, with different variable values, was given the same label; if
+    the labels ever disagree, the template is never served from the cache.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer.")
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.uncacheable = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def template_of(log_entry: str) -> str:
+        """
+        Returns the masked template used as the cache key for a log entry.
+        """
+        return _MaskedEntry(log_entry).template
+
+    def lookup(self, log_entry: str):
+        """
+        Returns the parsed result for a log entry rebuilt from a cached mapping,
+        or None if no usable mapping exists for its template.
+        """
+        masked = _MaskedEntry(log_entry)
+        with self._lock:
+            entry = self._entries.get(masked.template)
+            mapping = None
+            if entry is not None:
+                mapping = entry[0]
+                self._entries.move_to_end(masked.template)
+        result = None
+        if mapping is not None:
+            try:
+                result = self._render(mapping, masked)
+            except (ValueError, _AmbiguousMapping):
+                result = None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def store(self, log_entry: str, parsed_data) -> bool:
+        """
+        Learns a field mapping from a log entry and its parsed result.
+        Returns False if the result cannot be reproduced from the entry alone.
+        """
+        mapping = None
+        if isinstance(parsed_data, dict) and parsed_data and "raw_output" not in parsed_data:
+            masked = _MaskedEntry(log_entry)
+            mapping = self._build(parsed_data, masked)
+        if mapping is None:
+            with self._lock:
+                self.uncacheable += 1
+            return False
+
+        # A template without variable slots only matches identical text, so its labels need no confirmation.
+        variables = tuple(masked.pieces[1::2])
+        if not variables:
+            mapping = self._confirm_labels(mapping)
+        with self._lock:
+            previous = self._entries.get(masked.template)
+            stored = True
+            if previous is not None:
+                old_mapping, old_variables = previous
+                try:
+                    mapping = None if old_mapping is None else self._merge(old_mapping, mapping,
+                                                                           old_variables != variables)
+                except _InconsistentLabels:
+                    mapping = None
+                if mapping is None:
+                    stored = False
+                    self.uncacheable += 1
+            self._entries[masked.template] = (mapping, variables)
+            self._entries.move_to_end(masked.template)
+            if stored:
+                self.stores += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return stored
+
+    def awaiting_confirmation(self, template: str) -> bool:
+        """
+        True if a template is cached with inferred labels that a second entry
+        has not confirmed yet, so its entries cannot be served from the cache.
+        """
+        with self._lock:
+            entry = self._entries.get(template)
+        return entry is not None and entry[0] is not None and self._has_labels(entry[0])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters as a dictionary.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "uncacheable": self.uncacheable,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _build(self, value, masked: _MaskedEntry):
+        if isinstance(value, dict):
+            fields = {}
+            for key, sub_value in value.items():
+                spec = self._build(sub_value, masked)
+                if spec is None:
+                    return None
+                fields[key] = spec
+            return ("dict", fields)
+        if isinstance(value, list):
+            items = []
+            for sub_value in value:
+                spec = self._build(sub_value, masked)
+                if spec is None:
+                    return None
+                items.append(spec)
+            return ("list", items)
+        if value is None:
+            return ("const", value)
+        if isinstance(value, bool):
+            return ("label", value)
+        if isinstance(value, (int, float)):
+            value_type = type(value)
+            text = repr(value) if isinstance(value, float) else str(value)
+        else:
+            value_type = str
+            text = str(value)
+
+        if not text:
+            return ("const", value)
+        refs = []
+        start = masked.text.find(text)
+        while start != -1:
+            ref = masked.span_to_ref(start, start + len(text))
+            if ref is not None:
+                refs.append(ref)
+            start = masked.text.find(text, start + 1)
+        if refs:
+            return ("span", tuple(refs), value_type)
+        if not _DIGIT.search(text):
+            # An inferred label such as a severity; it may still depend on the variable parts.
+            return ("label", value)
+        return None
+
+    def _has_labels(self, spec) -> bool:
+        if spec[0] == "label":
+            return True
+        if spec[0] == "dict":
+            return any(self._has_labels(sub_spec) for sub_spec in spec[1].values())
+        if spec[0] == "list":
+            return any(self._has_labels(sub_spec) for sub_spec in spec[1])
+        return False
+
+    def _confirm_labels(self, spec):
+        if spec[0] == "label":
+            return ("const", spec[1])
+        if spec[0] == "dict":
+            return ("dict", {key: self._confirm_labels(sub_spec) for key, sub_spec in spec[1].items()})
+        if spec[0] == "list":
+            return ("list", [self._confirm_labels(sub_spec) for sub_spec in spec[1]])
+        return spec
+
+    def _merge(self, old, new, variables_differ: bool):
+        # Combines two observations of a template. A label seen again with different variable values becomes a
+        # constant; a label that disagrees with an earlier one raises _InconsistentLabels.
+        if new[0] == "label" and old[0] in ("label", "const"):
+            if old[1] != new[1] or type(old[1]) is not type(new[1]):
+                raise _InconsistentLabels()
+            return ("const", new[1]) if old[0] == "const" or variables_differ else old
+        if old[0] == "label" and new[0] == "const":
+            raise _InconsistentLabels()
+        if old[0] != new[0]:
+            return new
+        if old[0] == "dict":
+            if old[1].keys() != new[1].keys():
+                return new
+            return ("dict", {key: self._merge(old[1][key], spec, variables_differ) for key, spec in new[1].items()})
+        if old[0] == "list":
+            if len(old[1]) != len(new[1]):
+                return new
+            return ("list", [self._merge(a, b, variables_differ) for a, b in zip(old[1], new[1])])
+        if old[0] == "span" and old[2] is new[2]:
+            # Two observations of the same template narrow down which of several
+            # equal-valued positions a field really came from.
+            common = tuple(ref for ref in new[1] if ref in old[1])
+            if common:
+                return ("span", common, new[2])
+        return new
+
+    def _render(self, spec, masked: _MaskedEntry):
+        kind = spec[0]
+        if kind == "const":
+            return spec[1]
+        if kind == "label":
+            # Not confirmed yet; see the class docstring.
+            raise _AmbiguousMapping()
+        if kind == "dict":
+            return {key: self._render(sub_spec, masked) for key, sub_spec in spec[1].items()}
+        if kind == "list":
+            return [self._render(sub_spec, masked) for sub_spec in spec[1]]
+        refs, value_type = spec[1], spec[2]
+        text = masked.render(refs[0])
+        for ref in refs[1:]:
+            if masked.render(ref) != text:
+                raise _AmbiguousMapping()
+        return text if value_type is str else value_type(text)
+
+
+class _AmbiguousMapping(Exception):
+    pass
+
+
+class _InconsistentLabels(Exception):
+    pass
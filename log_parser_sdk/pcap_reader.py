@@ -0,0 +1,390 @@
+from __future__ import annotations
+import struct
+from collections import OrderedDict
+
+# Link-layer header types (https://www.tcpdump.org/linktypes.html).
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LOOP = 108
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+_ETHERTYPE_IPV4 = 0x0800
+_ETHERTYPE_IPV6 = 0x86DD
+_ETHERTYPE_VLAN = {0x8100, 0x88A8, 0x9100}
+
+_PROTO_TCP = 6
+_PROTO_UDP = 17
+_PROTOCOL_NUMBERS = {"tcp": _PROTO_TCP, "udp": _PROTO_UDP}
+_IPV6_EXTENSION_HEADERS = {0, 43, 60}
+
+_TCP_FIN = 0x01
+_TCP_SYN = 0x02
+_TCP_RST = 0x04
+
+_PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6),
+    b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9),
+    b"\xa1\xb2\x3c\x4d": (">", 1e-9),
+}
+_PCAPNG_SHB = b"\x0a\x0d\x0d\x0a"
+
+# Bytes that may appear in text payloads; everything else counts as binary.
+_TEXT_BYTES = bytes(range(32, 127)) + b"\t\n\r"
+
+
+class PcapFormatError(ValueError):
+    pass
+
+
+def iter_pcap_records(stream):
+    """
+    Yields (timestamp, linktype, frame) for every packet in a pcap or pcapng
+    stream, reading one record at a time.
+    """
+    magic = stream.read(4)
+    if magic == _PCAPNG_SHB:
+        yield from _iter_pcapng_records(stream, magic)
+    elif magic in _PCAP_MAGIC:
+        yield from _iter_pcap_records(stream, magic)
+    else:
+        raise PcapFormatError(f"Not a pcap or pcapng file (magic {magic!r}).")
+
+
+def _iter_pcap_records(stream, magic: bytes):
+    endian, resolution = _PCAP_MAGIC[magic]
+    header = stream.read(20)
+    if len(header) < 20:
+        raise PcapFormatError("Truncated pcap file header.")
+    linktype = struct.unpack(endian + "I", header[16:20])[0] & 0x0FFFFFFF
+    record_header = struct.Struct(endian + "IIII")
+    read = stream.read
+    while True:
+        raw_header = read(16)
+        if len(raw_header) < 16:
+            return
+        seconds, fraction, captured_length, _ = record_header.unpack(raw_header)
+        frame = read(captured_length)
+        if len(frame) < captured_length:
+            return
+        yield seconds + fraction * resolution, linktype, frame
+
+
+def _iter_pcapng_records(stream, magic: bytes):
+    endian = "<"
+    interfaces = []
+    read = stream.read
+    block_type_bytes = magic
+    while True:
+        raw_length = read(4)
+        if len(raw_length) < 4:
+            return
+        if block_type_bytes == _PCAPNG_SHB:
+            byte_order_magic = read(4)
+            endian = "<" if byte_order_magic == b"\x4d\x3c\x2b\x1a" else ">"
+            block_length = struct.unpack(endian + "I", raw_length)[0]
+            body = byte_order_magic + read(block_length - 16)
+            interfaces = []  # A new section starts a new interface list.
+        else:
+            block_length = struct.unpack(endian + "I", raw_length)[0]
+            body = read(block_length - 12)
+        read(4)  # Trailing block length.
+        block_type = struct.unpack(endian + "I", block_type_bytes)[0]
+
+        if block_type == 0x00000001 and len(body) >= 8:  # Interface Description Block
+            linktype = struct.unpack(endian + "H", body[0:2])[0]
+            interfaces.append((linktype, _pcapng_resolution(body[8:], endian)))
+        elif block_type == 0x00000006 and len(body) >= 20:  # Enhanced Packet Block
+            interface_id, high, low, captured_length = struct.unpack(endian + "IIII", body[:16])
+            linktype, resolution = interfaces[interface_id] if interface_id < len(interfaces) else (LINKTYPE_ETHERNET, 1e-6)
+            yield ((high << 32) | low) * resolution, linktype, body[20:20 + captured_length]
+        elif block_type == 0x00000003 and len(body) >= 4:  # Simple Packet Block
+            linktype = interfaces[0][0] if interfaces else LINKTYPE_ETHERNET
+            original_length = struct.unpack(endian + "I", body[:4])[0]
+            yield 0.0, linktype, body[4:4 + original_length]
+
+        block_type_bytes = read(4)
+        if len(block_type_bytes) < 4:
+            return
+
+
+def _pcapng_resolution(options: bytes, endian: str) -> float:
+    position = 0
+    while position + 4 <= len(options):
+        code, length = struct.unpack(endian + "HH", options[position:position + 4])
+        if code == 0:
+            break
+        if code == 9 and length >= 1:  # if_tsresol
+            value = options[position + 4]
+            return 2.0 ** -(value & 0x7F) if value & 0x80 else 10.0 ** -value
+        position += 4 + (length + 3) // 4 * 4
+    return 1e-6
+
+
+def _network_layer(linktype: int, frame: bytes):
+    """
+    Returns (ethertype, offset) of the network header in a frame, or None.
+    """
+    if linktype == LINKTYPE_ETHERNET:
+        if len(frame) < 14:
+            return None
+        ethertype = (frame[12] << 8) | frame[13]
+        offset = 14
+        while ethertype in _ETHERTYPE_VLAN and len(frame) >= offset + 4:
+            ethertype = (frame[offset + 2] << 8) | frame[offset + 3]
+            offset += 4
+        return ethertype, offset
+    if linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        if not frame:
+            return None
+        return (_ETHERTYPE_IPV6 if frame[0] >> 4 == 6 else _ETHERTYPE_IPV4), 0
+    if linktype == LINKTYPE_LINUX_SLL:
+        return ((frame[14] << 8) | frame[15], 16) if len(frame) >= 16 else None
+    if linktype == LINKTYPE_LINUX_SLL2:
+        return ((frame[0] << 8) | frame[1], 20) if len(frame) >= 20 else None
+    if linktype in (LINKTYPE_NULL, LINKTYPE_LOOP):
+        if len(frame) < 5:
+            return None
+        return (_ETHERTYPE_IPV6 if frame[4] >> 4 == 6 else _ETHERTYPE_IPV4), 4
+    return None
+
+
+def decode_transport(linktype: int, frame: bytes):
+    """
+    Decodes just enough of a frame to find its transport header. Returns
+    (protocol, src, sport, dst, dport, header_offset, ip_end) or None for
+    frames that are not TCP or UDP over IPv4/IPv6 or are IP fragments after
+    the first. ip_end excludes any link-layer padding.
+    """
+    network = _network_layer(linktype, frame)
+    if network is None:
+        return None
+    ethertype, offset = network
+    if ethertype == _ETHERTYPE_IPV4:
+        if len(frame) < offset + 20:
+            return None
+        header_length = (frame[offset] & 0x0F) * 4
+        if (frame[offset + 6] & 0x1F) or frame[offset + 7]:
+            return None  # Not the first fragment: no transport header.
+        total_length = (frame[offset + 2] << 8) | frame[offset + 3]
+        # A zero total length appears in captures of TCP segmentation offload.
+        ip_end = min(offset + total_length, len(frame)) if total_length else len(frame)
+        protocol = frame[offset + 9]
+        src = frame[offset + 12:offset + 16]
+        dst = frame[offset + 16:offset + 20]
+        offset += header_length
+    elif ethertype == _ETHERTYPE_IPV6:
+        if len(frame) < offset + 40:
+            return None
+        ip_end = min(offset + 40 + ((frame[offset + 4] << 8) | frame[offset + 5]), len(frame))
+        protocol = frame[offset + 6]
+        src = frame[offset + 8:offset + 24]
+        dst = frame[offset + 24:offset + 40]
+        offset += 40
+        while protocol in _IPV6_EXTENSION_HEADERS and len(frame) >= offset + 2:
+            protocol = frame[offset]
+            offset += (frame[offset + 1] + 1) * 8
+    else:
+        return None
+    if protocol not in (_PROTO_TCP, _PROTO_UDP) or len(frame) < offset + 8:
+        return None
+    sport = (frame[offset] << 8) | frame[offset + 1]
+    dport = (frame[offset + 2] << 8) | frame[offset + 3]
+    return protocol, src, sport, dst, dport, offset, ip_end
+
+
+class PcapFilter:
+    """
+    A BPF-like filter on transport protocol and port, evaluated on the packet
+    headers before any payload is copied or decoded. A port matches either
+    the source or destination port. None means "any".
+    """
+
+    def __init__(self, protocols=None, ports=None):
+        self.protocols = None if protocols is None else {_PROTOCOL_NUMBERS[p.lower()] for p in protocols}
+        self.ports = None if ports is None else set(ports)
+
+    def accepts(self, protocol: int, sport: int, dport: int) -> bool:
+        if self.protocols is not None and protocol not in self.protocols:
+            return False
+        if self.ports is not None and sport not in self.ports and dport not in self.ports:
+            return False
+        return True
+
+
+class TcpStreamReassembler:
+    """
+    Reassembles TCP byte streams per direction and splits them into messages,
+    using RFC 6587 octet counting ("LEN SP MSG") when a stream starts with a
+    digit and newline framing otherwise. Out-of-order segments are held until
+    the gap is filled; retransmitted bytes are dropped.
+
+    At most max_streams streams are tracked. When a new stream would exceed
+    that, the least recently active one is closed and its unterminated data
+    is returned with the messages of the segment that displaced it, so a
+    scan or a capture of many short connections without FIN/RST does not
+    grow the table without bound.
+    """
+
+    def __init__(self, max_buffer_bytes: int = 1024 * 1024, max_streams: int = 10000):
+        self.max_buffer_bytes = max_buffer_bytes
+        self.max_streams = max_streams
+        self._streams = OrderedDict()
+
+    def add(self, key, seq: int, flags: int, payload: bytes) -> list[bytes]:
+        messages = []
+        stream = self._streams.get(key)
+        if stream is None:
+            while len(self._streams) >= self.max_streams:
+                messages.extend(self._close(next(iter(self._streams))))
+            # Start at this segment; the SYN itself consumes one sequence number.
+            next_seq = (seq + 1) & 0xFFFFFFFF if flags & _TCP_SYN else seq
+            stream = self._streams[key] = {"next": next_seq, "pending": {}, "buffer": bytearray()}
+        else:
+            self._streams.move_to_end(key)
+            if flags & _TCP_SYN:
+                stream["next"] = (seq + 1) & 0xFFFFFFFF
+        if payload:
+            self._accept(stream, seq, payload)
+        messages.extend(self._split(stream))
+        if flags & (_TCP_FIN | _TCP_RST):
+            messages.extend(self._close(key))
+        return messages
+
+    def _accept(self, stream: dict, seq: int, payload: bytes):
+        delta = (seq - stream["next"]) & 0xFFFFFFFF
+        if delta >= 0x80000000:  # Starts before what we have: drop the overlap.
+            overlap = 0x100000000 - delta
+            if overlap >= len(payload):
+                return
+            payload = payload[overlap:]
+            delta = 0
+        if delta:
+            stream["pending"][seq] = payload
+            if sum(len(p) for p in stream["pending"].values()) > self.max_buffer_bytes:
+                # Give up on the gap rather than buffer without bound.
+                seq = min(stream["pending"], key=lambda s: (s - stream["next"]) & 0xFFFFFFFF)
+                stream["next"] = seq
+            else:
+                return
+        else:
+            stream["buffer"] += payload
+            stream["next"] = (stream["next"] + len(payload)) & 0xFFFFFFFF
+        pending = stream["pending"]
+        progressed = True
+        while pending and progressed:
+            progressed = False
+            for seq in list(pending):
+                delta = (seq - stream["next"]) & 0xFFFFFFFF
+                if delta and delta < 0x80000000:
+                    continue
+                data = pending.pop(seq)
+                if delta:
+                    data = data[0x100000000 - delta:]
+                stream["buffer"] += data
+                stream["next"] = (stream["next"] + len(data)) & 0xFFFFFFFF
+                progressed = True
+
+    def _split(self, stream: dict) -> list[bytes]:
+        buffer = stream["buffer"]
+        messages = []
+        position = 0
+        while position < len(buffer):
+            if 48 <= buffer[position] <= 57:
+                # Octet-counted syslog frames look like "LEN <PRI>...".
+                space = buffer.find(b" <", position, position + 12)
+                if space != -1 and buffer[position:space].isdigit():
+                    end = space + 1 + int(buffer[position:space])
+                    if end > len(buffer):
+                        break
+                    messages.append(bytes(buffer[space + 1:end]))
+                    position = end
+                    continue
+            newline = buffer.find(b"\n", position)
+            if newline == -1:
+                if len(buffer) - position > self.max_buffer_bytes:
+                    newline = len(buffer)
+                else:
+                    break
+            messages.append(bytes(buffer[position:newline]))
+            position = newline + 1
+        del buffer[:position]
+        return messages
+
+    def _close(self, key) -> list[bytes]:
+        stream = self._streams.pop(key, None)
+        if stream is None or not stream["buffer"]:
+            return []
+        return [bytes(stream["buffer"])]
+
+    def flush(self) -> list[bytes]:
+        """
+        Returns the unterminated data left in every stream.
+        """
+        messages = []
+        for key in list(self._streams):
+            messages.extend(self._close(key))
+        return messages
+
+
+def payload_to_text(payload: bytes, text_only: bool = True) -> str | None:
+    """
+    Decodes a payload as UTF-8 (falling back to Latin-1). With text_only, a
+    payload of which more than a tenth is non-text bytes is rejected.
+    """
+    if text_only and len(payload.translate(None, _TEXT_BYTES)) * 10 > len(payload):
+        return None
+    try:
+        text = payload.decode("utf-8")
+    except UnicodeDecodeError:
+        text = payload.decode("latin-1")
+    return text.strip() or None
+
+
+def iter_pcap_payloads(stream, protocols=None, ports=None, reassemble_tcp: bool = True,
+                       max_packets: int = None, text_only: bool = True):
+    """
+    Yields the text of the application payloads in a pcap/pcapng stream.
+
+    Frames are filtered on protocol and port from their headers alone; only
+    matching payloads are sliced out and decoded. UDP datagrams yield one
+    entry each. TCP payloads are reassembled per direction and split into
+    newline- or octet-count-framed messages (syslog over TCP), unless
+    reassemble_tcp is False, in which case each segment is one entry.
+    """
+    packet_filter = PcapFilter(protocols, ports)
+    reassembler = TcpStreamReassembler() if reassemble_tcp else None
+    for count, (_, linktype, frame) in enumerate(iter_pcap_records(stream)):
+        if max_packets and count >= max_packets:
+            break
+        decoded = decode_transport(linktype, frame)
+        if decoded is None:
+            continue
+        protocol, src, sport, dst, dport, offset, ip_end = decoded
+        if not packet_filter.accepts(protocol, sport, dport):
+            continue
+        if protocol == _PROTO_UDP:
+            payloads = [frame[offset + 8:ip_end]]
+        else:
+            if len(frame) < offset + 20:
+                continue
+            payload = frame[offset + (frame[offset + 12] >> 4) * 4:ip_end]
+            if reassembler is None:
+                payloads = [payload]
+            else:
+                seq = struct.unpack_from("!I", frame, offset + 4)[0]
+                payloads = reassembler.add((src, sport, dst, dport), seq, frame[offset + 13], payload)
+        for payload in payloads:
+            if payload:
+                text = payload_to_text(payload, text_only)
+                if text is not None:
+                    yield text
+    if reassembler is not None:
+        for payload in reassembler.flush():
+            text = payload_to_text(payload, text_only)
+            if text is not None:
+                yield text
@@ -0,0 +1,295 @@
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from .compact_records import record_default
+from .json_extract import loads
+from .output_formatter import flatten_record
+
+# Flattened field names checked, in order, for a record's event time.
+DEFAULT_TIME_FIELDS = ("time_generated", "receive_time", "@timestamp", "timestamp", "eventTime", "time",
+                       "syslog_timestamp")
+# Flattened field names given an inverted index by default.
+DEFAULT_INDEXED_FIELDS = ("type", "subtype", "src", "dst", "natsrc", "natdst", "srcuser", "dstuser", "hostname",
+                          "syslog_hostname", "device_name", "action", "threatid", "app", "rule",
+                          "sourceIPAddress", "eventName")
+
+_TIME_FORMATS = ("%Y/%m/%d %H:%M:%S", "%Y/%m/%d %H:%M:%S.%f")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Matches counted per condition when choosing which index drives a query.
+_PROBE_LIMIT = 1000
+
+
+def to_epoch_micros(value) -> int | None:
+    """
+    Converts a timestamp to microseconds since the epoch. Accepts datetimes,
+    epoch seconds, PAN-OS style "2021/10/13 12:54:53" and ISO 8601 strings.
+    Times without a UTC offset are taken as UTC. Returns None for anything
+    else, including syslog times without a year.
+    """
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value * 1_000_000)
+    elif isinstance(value, str):
+        moment = None
+        for time_format in _TIME_FORMATS:
+            try:
+                moment = datetime.strptime(value, time_format)
+                break
+            except ValueError:
+                pass
+        if moment is None:
+            # fromisoformat only accepts a "Z" suffix from Python 3.11.
+            if value.endswith(("Z", "z")):
+                value = value[:-1] + "+00:00"
+            try:
+                moment = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+    else:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    delta = moment - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _index_values(value):
+    # The terms a field value is indexed under; every element of a list is a term.
+    if value is None or isinstance(value, dict):
+        return ()
+    if isinstance(value, list):
+        return tuple(str(item) for item in value if item is not None and not isinstance(item, (dict, list)))
+    return (str(value),)
+
+
+def _placeholders(term: list) -> str:
+    # Placeholders for the values of a [field, value, ...] term.
+    return ",".join("?" * (len(term) - 1))
+
+
+class QueryIndex:
+    """
+    A persistent SQLite index of parsed records for triage queries such as
+    "THREAT events from 10.80.22.2 between 12:00 and 13:00" without
+    re-parsing or rescanning the logs.
+
+    Records are stored as JSON in a table keyed by insertion order, next to
+    a B-tree index on their event time (the first of `time_fields` that
+    holds a recognizable timestamp) and an inverted index of
+    (field, value, record) terms for `indexed_fields`. Nested fields are
+    named as flattened by the CSV writer, e.g. syslog_hostname. A lookup
+    seeks into those B-trees, so its cost grows with the log of the corpus
+    size plus the number of matches.
+
+    Records are added in batches of `batch_size` as they stream out of the
+    parser (see index_records). The field lists are saved with the index;
+    reopening it with different lists raises ValueError, since records that
+    are already stored would not be covered.
+    """
+
+    def __init__(self, path: str, indexed_fields: tuple[str, ...] = None, time_fields: tuple[str, ...] = None,
+                 batch_size: int = 1000, separator: str = "_"):
+        self.path = path
+        self.batch_size = batch_size
+        self.separator = separator
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, ts INTEGER, "
+                               "record TEXT NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS records_ts ON records (ts)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS terms (field TEXT NOT NULL, value TEXT NOT NULL, "
+                               "record_id INTEGER NOT NULL, PRIMARY KEY (field, value, record_id)) WITHOUT ROWID")
+            self.indexed_fields = self._settle_fields("indexed_fields", indexed_fields, DEFAULT_INDEXED_FIELDS)
+            self.time_fields = self._settle_fields("time_fields", time_fields, DEFAULT_TIME_FIELDS)
+            self._next_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM records").fetchone()[0]
+
+    def _settle_fields(self, key: str, requested, default) -> tuple[str, ...]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        stored = tuple(json.loads(row[0])) if row else None
+        fields = tuple(requested) if requested is not None else stored or tuple(default)
+        if stored is not None and fields != stored:
+            raise ValueError(f"{self.path} was built with {key}={list(stored)}; open it with the same fields "
+                             f"or build a new index")
+        if stored is None:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(list(fields))))
+        return fields
+
+    def add(self, record):
+        """
+        Queues one record (a dict or CompactRecord); it is stored with the
+        next full batch or on flush().
+        """
+        if record is None:
+            return
+        with self._lock:
+            self._pending.append(record)
+            if len(self._pending) >= self.batch_size:
+                self._write_pending()
+
+    def add_records(self, records) -> int:
+        """
+        Indexes every record from an iterable and flushes. Returns the number added.
+        """
+        count = 0
+        for record in self.index_records(records):
+            count += 1
+        return count
+
+    def index_records(self, records):
+        """
+        Indexes records as they stream past and yields each one, so indexing
+        can sit between the parser and an output writer:
+
+            write_json_lines(index.index_records(sdk.iter_parse_log_file(path)), out)
+
+        The last partial batch is flushed when the iterable is exhausted.
+        """
+        for record in records:
+            self.add(record)
+            yield record
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._write_pending()
+
+    def _write_pending(self):
+        records, self._pending = self._pending, []
+        if not records:
+            return
+        rows = []
+        terms = []
+        for record in records:
+            record_id = self._next_id
+            self._next_id += 1
+            flat = flatten_record(record, self.separator)
+            timestamp = None
+            for name in self.time_fields:
+                timestamp = to_epoch_micros(flat.get(name))
+                if timestamp is not None:
+                    break
+            rows.append((record_id, timestamp, json.dumps(record, default=record_default)))
+            for name in self.indexed_fields:
+                for value in _index_values(flat.get(name)):
+                    terms.append((name, value, record_id))
+        with self._conn:
+            self._conn.executemany("INSERT INTO records (id, ts, record) VALUES (?, ?, ?)", rows)
+            self._conn.executemany("INSERT OR IGNORE INTO terms (field, value, record_id) VALUES (?, ?, ?)", terms)
+
+    def _select(self, columns: str, start, end, where: dict, fields: dict):
+        # Each condition is estimated by counting up to _PROBE_LIMIT matches, and the most selective one drives
+        # the query through its B-tree; the rest are checked per candidate with primary key lookups. Left to
+        # itself, SQLite would walk every id of a common term such as type=THREAT before looking at the others.
+        terms = []
+        for name, values in {**(where or {}), **fields}.items():
+            if name not in self.indexed_fields:
+                raise ValueError(f"{name!r} is not indexed; indexed fields are {list(self.indexed_fields)}")
+            values = values if isinstance(values, (list, tuple, set)) else [values]
+            terms.append([name, *(str(value) for value in values)])
+        bounds = []
+        for operator, bound in ((">=", start), ("<", end)):
+            if bound is None:
+                continue
+            micros = to_epoch_micros(bound)
+            if micros is None:
+                raise ValueError(f"Unrecognized timestamp: {bound!r}")
+            bounds.append((operator, micros))
+
+        estimates = [self._estimate(f"SELECT 1 FROM terms WHERE field = ? AND value IN ({_placeholders(term)})",
+                                    term) for term in terms]
+        if bounds:
+            estimates.append(self._estimate("SELECT 1 FROM records WHERE " + " AND ".join(
+                f"ts {operator} ?" for operator, _ in bounds), [micros for _, micros in bounds]))
+        driver = estimates.index(min(estimates)) if estimates else None
+
+        conditions = []
+        params = []
+        for position, term in enumerate(terms):
+            if position == driver:
+                conditions.append(f"id IN (SELECT record_id FROM terms WHERE field = ? AND value IN "
+                                  f"({_placeholders(term)}))")
+            else:
+                conditions.append(f"EXISTS (SELECT 1 FROM terms WHERE field = ? AND value IN ({_placeholders(term)}) "
+                                  f"AND record_id = records.id)")
+            params.extend(term)
+        for operator, micros in bounds:
+            # A unary + keeps SQLite off the ts index when a term drives the query.
+            conditions.append(f"{'' if driver == len(terms) else '+'}ts {operator} ?")
+            params.append(micros)
+        sql = f"SELECT {columns} FROM records"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql, params
+
+    def _estimate(self, sql: str, params) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM ({sql} LIMIT {_PROBE_LIMIT})", params).fetchone()[0]
+
+    def iter_query(self, start=None, end=None, where: dict = None, limit: int = None, **fields):
+        """
+        Yields the stored records matching every condition, in event-time
+        order (records without a time last, then in insertion order).
+
+        start and end bound the event time (start inclusive, end exclusive)
+        and take the same formats as to_epoch_micros. Each keyword names an
+        indexed field and a value or a list of alternatives, e.g.
+        type="THREAT", src=["10.80.22.2", "10.80.22.3"]; use `where` for
+        field names that are not valid keywords. Pending records are flushed
+        first.
+        """
+        self.flush()
+        sql, params = self._select("record", start, end, where, fields)
+        sql += " ORDER BY ts IS NULL, ts, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        for (record,) in rows:
+            yield loads(record)
+
+    def query(self, start=None, end=None, where: dict = None, limit: int = None, **fields) -> list[dict]:
+        return list(self.iter_query(start, end, where, limit, **fields))
+
+    def count(self, start=None, end=None, where: dict = None, **fields) -> int:
+        self.flush()
+        sql, params = self._select("COUNT(*)", start, end, where, fields)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def values(self, field: str, limit: int = 100) -> list[tuple[str, int]]:
+        """
+        Returns the most common values of an indexed field with their record counts.
+        """
+        self.flush()
+        with self._lock:
+            return self._conn.execute(
+                "SELECT value, COUNT(*) FROM terms WHERE field = ? GROUP BY value ORDER BY COUNT(*) DESC, value "
+                "LIMIT ?", (field, limit)).fetchall()
+
+    def __len__(self):
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._write_pending()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,99 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket. Tokens refill continuously at `rate` per second
+    up to `capacity`; `acquire` blocks until the requested amount is available.
+    """
+
+    def __init__(self, capacity: float, rate: float, clock=time.monotonic, sleep=time.sleep):
+        if capacity <= 0 or rate <= 0:
+            raise ValueError("capacity and rate must be positive.")
+        self.capacity = capacity
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """
+        Takes `amount` tokens if they are available and returns 0, otherwise
+        returns the number of seconds to wait before they will be.
+        """
+        # A request larger than the bucket can never be satisfied; cap it so it
+        # waits for a full bucket instead of blocking forever.
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1):
+        while True:
+            wait = self.try_acquire(amount)
+            if not wait:
+                return
+            self._sleep(wait)
+
+    async def acquire_async(self, amount: float = 1):
+        import asyncio
+
+        while True:
+            wait = self.try_acquire(amount)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Limits Claude API usage to a number of requests and tokens per minute.
+    Either limit may be None to leave it unbounded. One limiter can be shared by
+    all worker threads of a client.
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self._sleep = sleep
+        self.request_bucket = None
+        self.token_bucket = None
+        if requests_per_minute:
+            self.request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0, clock, sleep)
+        if tokens_per_minute:
+            self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, clock, sleep)
+
+    def acquire(self, tokens: int = 0):
+        """
+        Blocks until one request carrying `tokens` tokens may be sent.
+        """
+        if self.request_bucket is not None:
+            self.request_bucket.acquire(1)
+        if self.token_bucket is not None and tokens:
+            self.token_bucket.acquire(tokens)
+
+    async def acquire_async(self, tokens: int = 0):
+        """
+        Like acquire, but waits with asyncio.sleep so the event loop keeps running.
+        """
+        if self.request_bucket is not None:
+            await self.request_bucket.acquire_async(1)
+        if self.token_bucket is not None and tokens:
+            await self.token_bucket.acquire_async(tokens)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for rate limiting; Claude averages about four characters per token.
+    """
+    return len(text) // 4 + 1
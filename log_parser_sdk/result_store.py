@@ -0,0 +1,103 @@
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResultStore:
+    """
+    A persistent SQLite store of Claude parse results and file checkpoints.
+
+    Results are keyed by a SHA-256 hash of the prompt version and the
+    whitespace-normalized log entry, so rerunning a job skips entries that were
+    already parsed, and changing the prompt invalidates old results. Checkpoints
+    record how far into a file a run has got, so interrupted or appended files
+    can be resumed from a byte offset.
+    """
+
+    def __init__(self, path: str, prompt_version: str = "1"):
+        self.path = path
+        self.prompt_version = prompt_version
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, parsed TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints (source TEXT PRIMARY KEY, offset INTEGER NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def key(self, log_entry: str) -> str:
+        """
+        Returns the store key for a log entry under the current prompt version.
+        """
+        normalized = " ".join(log_entry.split())
+        return hashlib.sha256(f"{self.prompt_version}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, log_entry: str) -> str | None:
+        """
+        Returns the stored JSON result for a log entry, or None.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT parsed FROM results WHERE key = ?", (self.key(log_entry),)).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, log_entries: list[str]) -> list[str | None]:
+        """
+        Looks up several entries at once. Returns stored results in input
+        order, with None for entries that have not been parsed yet.
+        """
+        keys = [self.key(entry) for entry in log_entries]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT key, parsed FROM results WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+        return [found.get(key) for key in keys]
+
+    def put(self, log_entry: str, parsed_json: str):
+        self.put_many([(log_entry, parsed_json)])
+
+    def put_many(self, items):
+        """
+        Stores (log_entry, parsed_json) pairs, replacing earlier results.
+        """
+        now = time.time()
+        rows = [(self.key(entry), parsed_json, now) for entry, parsed_json in items]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO results (key, parsed, created) VALUES (?, ?, ?)", rows)
+
+    def get_checkpoint(self, source: str) -> int | None:
+        """
+        Returns the byte offset recorded for a source file, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT offset FROM checkpoints WHERE source = ?", (os.path.abspath(source),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_checkpoint(self, source: str, offset: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (source, offset, updated) VALUES (?, ?, ?)",
+                (os.path.abspath(source), offset, time.time()),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
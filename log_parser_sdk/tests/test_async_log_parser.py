@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import AsyncMock
+from log_parser_sdk.async_log_parser import AsyncLogParsingSDK
+
+
+async def echo_batch(entries, *args, **kwargs):
+    return [{"message": entry} for entry in entries]
+
+
+class TestAsyncLogParsingSDK(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.sdk = AsyncLogParsingSDK("test_api_key", parse_cache_size=0, chunk_size=10, queue_size=1,
+                                      max_in_flight=1)
+        self.sdk.claude_client.parse_logs = AsyncMock(side_effect=echo_batch)
+        self.sdk.claude_client.parse_log = AsyncMock(side_effect=lambda entry: {"message": entry})
+
+    async def asyncTearDown(self):
+        await self.sdk.aclose()
+
+    async def test_iter_parse_log_file_in_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "app.log")
+            with open(path, "w") as f:
+                for i in range(45):
+                    f.write(f'{{"i": {i}}}\n' if i % 3 == 0 else f"custom event {i}\n")
+            records = [record async for record in self.sdk.iter_parse_log_file(path)]
+        self.assertEqual(records, [{"i": i} if i % 3 == 0 else {"message": f"custom event {i}"} for i in range(45)])
+
+    async def test_slow_claude_applies_backpressure(self):
+        consumed = 0
+        release = asyncio.Event()
+
+        def entries():
+            nonlocal consumed
+            for i in range(1000):
+                consumed += 1
+                yield f"custom event {i}"
+
+        async def slow_batch(batch, *args, **kwargs):
+            await release.wait()
+            return await echo_batch(batch)
+
+        self.sdk.claude_client.parse_logs = AsyncMock(side_effect=slow_batch)
+        records = self.sdk.iter_parse_entries(entries())
+        try:
+            first = asyncio.ensure_future(records.__anext__())
+            await asyncio.sleep(0.2)
+            # Chunks held by the read queue, the parse queue, the stages and the consumer.
+            self.assertLessEqual(consumed, 10 * 6)
+            release.set()
+            self.assertEqual(await first, {"message": "custom event 0"})
+            rest = [record async for record in records]
+        finally:
+            await records.aclose()
+        self.assertEqual(len(rest), 999)
+        self.assertEqual(consumed, 1000)
+
+    async def test_cancellation_stops_reader_and_requests(self):
+        closed = asyncio.Event()
+        cancelled = []
+        loop = asyncio.get_running_loop()
+
+        def entries():
+            try:
+                for i in range(1000):
+                    yield f"custom event {i}"
+            finally:
+                loop.call_soon_threadsafe(closed.set)
+
+        async def stuck_batch(batch, *args, **kwargs):
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(len(batch))
+                raise
+
+        self.sdk.claude_client.parse_logs = AsyncMock(side_effect=stuck_batch)
+
+        async def consume():
+            records = self.sdk.iter_parse_entries(entries())
+            try:
+                async for _ in records:
+                    pass
+            finally:
+                await records.aclose()
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        await asyncio.wait_for(closed.wait(), 5)
+        self.assertTrue(cancelled)
+
+    async def test_batch_errors_are_reported_inline(self):
+        self.sdk.claude_client.parse_logs = AsyncMock(side_effect=RuntimeError("overloaded"))
+        with self.assertLogs("log_parser_sdk.async_log_parser", level="ERROR"):
+            results = await self.sdk.parse_entries(["custom event 1", "custom event 2", '{"ok": true}'])
+        self.assertEqual(results[0], {"parsing_error": "overloaded", "raw_log": "custom event 1"})
+        self.assertEqual(results[2], {"ok": True})
+
+    async def test_write_json_lines_from_async_iterator(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.jsonl")
+            count = await self.sdk.write_json_lines(self.sdk.iter_parse_entries(f"custom event {i}" for i in range(25)),
+                                                    path)
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(count, 25)
+        self.assertEqual(lines[24], {"message": "custom event 24"})
+
+    async def test_failed_write_is_raised(self):
+        async def records():
+            for i in range(50):
+                yield {"i": i}
+
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(OSError):
+                await self.sdk.write_json_lines(records(), os.path.join(directory, "missing", "out.jsonl"))
+
+    async def test_parse_log_entry(self):
+        self.assertEqual(await self.sdk.parse_log_entry('{"a": 1}'), {"a": 1})
+        self.assertEqual(await self.sdk.parse_log_entry("custom event"), {"message": "custom event"})
+
+
+    async def test_blocking_work_runs_off_the_event_loop(self):
+        threads = []
+
+        def recording(function):
+            def wrapper(*args):
+                threads.append(threading.current_thread())
+                return function(*args)
+            return wrapper
+
+        with tempfile.TemporaryDirectory() as directory:
+            sdk = AsyncLogParsingSDK("test_api_key", parse_cache_size=0, chunk_size=10,
+                                     result_store_path=os.path.join(directory, "results.db"))
+            try:
+                sdk.claude_client.parse_logs = AsyncMock(side_effect=echo_batch)
+                sdk._parse_locally = recording(sdk._parse_locally)
+                sdk.result_store.set_checkpoint = recording(sdk.result_store.set_checkpoint)
+                path = os.path.join(directory, "app.log")
+                with open(path, "w") as f:
+                    f.write("".join(f"custom event {i}\n" for i in range(25)))
+                records = [record async for record in sdk.iter_parse_log_file(path, resume=True)]
+            finally:
+                await sdk.aclose()
+        self.assertEqual(len(records), 25)
+        self.assertEqual(len(threads), 25 + 3)
+        self.assertNotIn(threading.current_thread(), threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
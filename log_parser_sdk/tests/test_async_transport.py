@@ -0,0 +1,211 @@
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import requests
+from log_parser_sdk.async_claude_client import AsyncClaudeClient
+from log_parser_sdk.async_transport import AsyncTransport
+from log_parser_sdk.result_store import ResultStore
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class _MessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.paths.append(self.path)
+        if self.path == "/moved":
+            self.send_response(307)
+            self.send_header("Location", "/v1/messages")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/continue":
+            self.send_response_only(100)
+            self.end_headers()
+        if self.path == "/slow":
+            self.server.slow_started.set()
+            self.server.release.wait(5)
+        if self.path == "/error":
+            self._send(529, json.dumps({"type": "error"}).encode("utf-8"))
+            return
+        prompt = payload.get("messages", [{}])[-1].get("content", "")
+        entries = re.findall(r"^\[(\d+)\] (.*)$", prompt, re.MULTILINE)
+        if entries:
+            text = json.dumps([{"id": int(entry_id), "parsed": {"message": entry}} for entry_id, entry in entries])
+        else:
+            text = '{"ok": true}'
+        body = json.dumps({"content": [{"type": "text", "text": text}], "usage": {"output_tokens": 5}}).encode()
+        if self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(body), 7):
+                piece = body[start:start + 7]
+                self.wfile.write(f"{len(piece):x}\r\n".encode() + piece + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self._send(200, body)
+        if self.path == "/drop":
+            # Close without announcing it, like a server timing out an idle connection.
+            self.close_connection = True
+
+    def _send(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MessagesHandler)
+    server.daemon_threads = True
+    server.slow_started = threading.Event()
+    server.release = threading.Event()
+    server.paths = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestAsyncTransport(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = _start_server()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    async def test_connections_are_reused(self):
+        async with AsyncTransport() as transport:
+            for _ in range(5):
+                response = await transport.post(self.base + "/v1/messages", json={})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(response.json()["content"][0]["text"]), {"ok": True})
+            metrics = transport.metrics.snapshot()
+        self.assertEqual(metrics["requests"], 5)
+        self.assertEqual(metrics["connections_opened"], 1)
+
+    async def test_chunked_response(self):
+        async with AsyncTransport() as transport:
+            response = await transport.post(self.base + "/chunked", json={})
+        self.assertEqual(json.loads(response.json()["content"][0]["text"]), {"ok": True})
+
+    async def test_http_error_raises_requests_error(self):
+        async with AsyncTransport() as transport:
+            response = await transport.post(self.base + "/error", json={})
+            with self.assertRaises(requests.exceptions.HTTPError) as raised:
+                response.raise_for_status()
+        self.assertEqual(raised.exception.response.status_code, 529)
+
+    async def test_closed_idle_connection_is_replaced(self):
+        async with AsyncTransport() as transport:
+            await transport.post(self.base + "/drop", json={})
+            await asyncio.sleep(0.05)
+            response = await transport.post(self.base + "/v1/messages", json={})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(transport.metrics.snapshot()["connections_opened"], 2)
+
+    async def test_cancelled_request_does_not_return_connection_to_pool(self):
+        async with AsyncTransport() as transport:
+            request = asyncio.ensure_future(transport.post(self.base + "/slow", json={}))
+            await asyncio.to_thread(self.server.slow_started.wait, 5)
+            request.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await request
+            self.server.release.set()
+            self.assertEqual((await transport.post(self.base + "/v1/messages", json={})).status_code, 200)
+            self.assertEqual(transport.metrics.snapshot()["connections_opened"], 2)
+
+    async def test_interim_responses_and_redirects_are_handled_like_requests(self):
+        async with AsyncTransport() as transport:
+            self.assertEqual((await transport.post(self.base + "/continue", json={})).status_code, 200)
+            response = await transport.post(self.base + "/moved", json={})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.paths, ["/continue", "/moved", "/v1/messages"])
+
+    async def test_proxy_environment_variables(self):
+        proxy = _start_server()
+        try:
+            environment = {"HTTP_PROXY": f"http://127.0.0.1:{proxy.server_address[1]}", "NO_PROXY": "localhost"}
+            with mock.patch.dict(os.environ, environment):
+                async with AsyncTransport() as transport:
+                    self.assertEqual((await transport.post("http://claude.invalid/v1/messages",
+                                                           json={})).status_code, 200)
+                    # NO_PROXY hosts are reached directly.
+                    await transport.post(self.base.replace("127.0.0.1", "localhost") + "/v1/messages", json={})
+        finally:
+            proxy.shutdown()
+            proxy.server_close()
+        self.assertEqual(proxy.paths, ["http://claude.invalid/v1/messages"])
+        self.assertEqual(self.server.paths, ["/v1/messages"])
+
+    async def test_connect_failure_raises_connection_error(self):
+        self.server.shutdown()
+        self.server.server_close()
+        async with AsyncTransport(connect_timeout=2) as transport:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                await transport.post(self.base + "/v1/messages", json={})
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class TestAsyncClaudeClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = _start_server()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/messages"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    async def test_parse_log_and_parse_logs(self):
+        client = AsyncClaudeClient("test_api_key", base_url=self.url, max_concurrency=2)
+        try:
+            self.assertEqual(await client.parse_log("sample log"), {"ok": True})
+            entries = [f"entry {i}" for i in range(30)]
+            results = await client.parse_logs(entries, max_batch_entries=10)
+        finally:
+            await client.aclose()
+        self.assertEqual(results, [{"message": entry} for entry in entries])
+        self.assertEqual(client.ledger.snapshot()["requests"], 4)
+        self.assertEqual(client.ledger.snapshot()["entries"], 31)
+
+    async def test_result_store_is_queried_off_the_event_loop(self):
+        threads = []
+        with tempfile.TemporaryDirectory() as directory:
+            store = ResultStore(os.path.join(directory, "results.db"))
+            for name in ("get", "put", "get_many", "put_many"):
+                def wrapper(*args, function=getattr(store, name)):
+                    threads.append(threading.current_thread())
+                    return function(*args)
+                setattr(store, name, wrapper)
+            client = AsyncClaudeClient("test_api_key", base_url=self.url, result_store=store)
+            try:
+                await client.parse_log("sample log")
+                await client.parse_logs([f"entry {i}" for i in range(5)])
+                self.assertEqual(await client.parse_log("sample log"), {"ok": True})
+            finally:
+                await client.aclose()
+                store.close()
+        self.assertGreaterEqual(len(threads), 5)
+        self.assertNotIn(threading.current_thread(), threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
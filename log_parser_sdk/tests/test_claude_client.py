@@ -63,6 +63,66 @@ class TestClaudeClient(unittest.TestCase):
         result = self.client.parse_log_with_claude(log_entry, output_format="json")
         self.assertEqual(result, "")
 
+    @patch.object(ClaudeClient, "_make_request")
+    def test_parse_logs_batch_maps_results_by_id(self, mock_make_request):
+        mock_make_request.return_value = json.dumps([
+            {"id": 1, "parsed": {"n": "b"}},
+            {"id": 0, "parsed": {"n": "a"}},
+        ])
+        result = self.client.parse_logs_batch(["line a", "line b"])
+        self.assertEqual(result, [json.dumps({"n": "a"}), json.dumps({"n": "b"})])
+        mock_make_request.assert_called_once()
+        self.assertIn("[0] line a\n[1] line b", mock_make_request.call_args[0][0])
+
+    @patch.object(ClaudeClient, "parse_log")
+    @patch.object(ClaudeClient, "_make_request")
+    def test_parse_logs_batch_retries_missing_items(self, mock_make_request, mock_parse_log_with_claude):
+        mock_make_request.side_effect = [
+            json.dumps([{"id": 0, "parsed": {"n": "a"}}, {"id": 1, "parsed": "not an object"}]),
+            "{}",
+        ]
+        mock_parse_log_with_claude.side_effect = [{"n": "b"}, {"n": "c"}]
+        result = self.client.parse_logs_batch(["line a", "line b", "line c"])
+        self.assertEqual(result, [json.dumps({"n": "a"}), json.dumps({"n": "b"}), json.dumps({"n": "c"})])
+        self.assertEqual(mock_make_request.call_count, 2)
+        self.assertEqual(mock_parse_log_with_claude.call_count, 2)
+
+    def test_request_uses_cached_system_block_and_records_usage(self):
+        transport = Mock()
+        transport.post.return_value.json.return_value = {
+            "content": [{"text": '{"a": 1}'}],
+            "usage": {"input_tokens": 20, "output_tokens": 8, "cache_read_input_tokens": 150},
+        }
+        client = ClaudeClient(self.api_key, transport=transport)
+        self.assertEqual(client.parse_log_with_claude("sample log"), '{"a": 1}')
+        payload = transport.post.call_args.kwargs["json"]
+        self.assertEqual(payload["temperature"], 0.0)
+        self.assertEqual(payload["system"][0]["cache_control"], {"type": "ephemeral"})
+        self.assertNotIn("security log parsing assistant", payload["messages"][0]["content"])
+        snapshot = client.ledger.snapshot()
+        self.assertEqual((snapshot["entries"], snapshot["output_tokens"], snapshot["cache_read_input_tokens"]), (1, 8, 150))
+
+    def test_truncated_response_is_retried_with_larger_budget(self):
+        transport = Mock()
+        truncated = Mock()
+        truncated.json.return_value = {"content": [{"text": '{"a": '}], "stop_reason": "max_tokens",
+                                       "usage": {"output_tokens": 10}}
+        complete = Mock()
+        complete.json.return_value = {"content": [{"text": '{"a": 1}'}], "stop_reason": "end_turn"}
+        transport.post.side_effect = [truncated, complete]
+        client = ClaudeClient(self.api_key, transport=transport, prompt_caching=False)
+        self.assertEqual(client.parse_log_with_claude("sample log"), '{"a": 1}')
+        budgets = [call.kwargs["json"]["max_tokens"] for call in transport.post.call_args_list]
+        self.assertEqual(budgets[1], client.output_budget.maximum)
+        self.assertLess(budgets[0], budgets[1])
+        self.assertNotIn("cache_control", transport.post.call_args.kwargs["json"]["system"][0])
+
+    def test_pack_batches_respects_token_budget(self):
+        entries = ["x" * 400] * 5
+        batches = self.client.pack_batches(entries, max_batch_tokens=450)
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual([index for batch in batches for index in batch], list(range(5)))
+
 if __name__ == '__main__':
     unittest.main()
 
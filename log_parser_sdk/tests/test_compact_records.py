@@ -0,0 +1,85 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from log_parser_sdk.compact_records import CompactRecord, RecordCompactor, record_default
+from log_parser_sdk.log_parser import LogParsingSDK
+from log_parser_sdk.output_formatter import OutputFormatter
+
+PANOS = ("<14>Jun 11 00:39:44 PA-01 1,2024/06/11 00:39:44,012345678901,TRAFFIC,end,2561,2024/06/11 00:39:44,"
+         "10.0.0.5,8.8.8.8,0.0.0.0,0.0.0.0,allow-dns,,,dns,vsys1,trust,untrust,ethernet1/2,ethernet1/1,"
+         "Forward,2024/06/11 00:39:44,{session},1,5353,53,0,0,0x0,udp,allow,200,100,100,2")
+
+
+class TestRecordCompactor(unittest.TestCase):
+    def setUp(self):
+        self.compactor = RecordCompactor()
+
+    def test_mapping_behaviour(self):
+        original = {"type": "TRAFFIC", "sport": 5353, "syslog": {"hostname": "PA-01"}, "tags": ["a"]}
+        record = self.compactor.compact(original)
+        self.assertIsInstance(record, CompactRecord)
+        self.assertEqual(record, original)
+        self.assertEqual(record["sport"], 5353)
+        self.assertEqual(record["syslog"]["hostname"], "PA-01")
+        self.assertIn("type", record)
+        self.assertNotIn("missing", record)
+        self.assertIsNone(record.get("missing"))
+        self.assertEqual(list(record), ["type", "sport", "syslog", "tags"])
+        self.assertEqual(record.to_dict(), original)
+        self.assertIs(type(record.to_dict()["syslog"]), dict)
+        with self.assertRaises(KeyError):
+            record["missing"]
+
+    def test_same_layout_shares_schema_and_strings(self):
+        first = self.compactor.compact({"action": "".join(["al", "low"]), "bytes": 1})
+        second = self.compactor.compact({"action": "".join(["al", "low"]), "bytes": 2})
+        other = self.compactor.compact({"bytes": 3, "action": "deny"})
+        self.assertIs(first.schema, second.schema)
+        self.assertIsNot(first.schema, other.schema)
+        self.assertIs(first["action"], second["action"])
+        self.assertEqual(self.compactor.schema_count, 2)
+
+    def test_high_cardinality_fields_stop_interning(self):
+        compactor = RecordCompactor(max_distinct=2)
+        records = [compactor.compact({"src": "".join(["10.0.0.", str(i % 3)])}) for i in range(6)]
+        self.assertIsNot(records[3]["src"], records[0]["src"])
+        self.assertEqual([record["src"] for record in records], [f"10.0.0.{i % 3}" for i in range(6)])
+
+    def test_non_dicts_pass_through(self):
+        record = self.compactor.compact({"a": 1})
+        self.assertIs(self.compactor.compact(record), record)
+        self.assertIsNone(self.compactor.compact(None))
+
+    def test_serialization(self):
+        record = self.compactor.compact({"a": 1, "nested": {"b": "x"}})
+        self.assertEqual(json.loads(json.dumps(record, default=record_default)), {"a": 1, "nested": {"b": "x"}})
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+        self.assertEqual(OutputFormatter().format_to_csv([record]), "a,nested_b\r\n1,x\r\n")
+
+
+class TestCompactRecordsInSDK(unittest.TestCase):
+    def test_parse_log_file_returns_compact_records(self):
+        sdk = LogParsingSDK("test_api_key", compact_records=True)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "fw.log")
+            with open(path, "w") as f:
+                for session in range(20):
+                    f.write(PANOS.format(session=1000 + session) + "\n")
+                f.write('{"event": "login"}\n')
+            records = sdk.parse_log_file(path)
+            output = os.path.join(directory, "out.jsonl")
+            sdk.output_formatter.write_json_lines(records, output)
+            with open(output) as f:
+                lines = [json.loads(line) for line in f]
+        self.assertTrue(all(isinstance(record, CompactRecord) for record in records))
+        self.assertIs(records[0].schema, records[19].schema)
+        self.assertEqual(records[5]["sessionid"], 1005)
+        self.assertEqual(lines[5]["syslog"]["hostname"], "PA-01")
+        self.assertEqual(lines[20], {"event": "login"})
+        self.assertEqual(sdk.parse_log_entry('{"a": 1}'), {"a": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
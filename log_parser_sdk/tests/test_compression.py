@@ -0,0 +1,141 @@
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import tracemalloc
+import unittest
+import zlib
+from log_parser_sdk.compression import detect_codec, iter_decompressed, open_decompressed
+from log_parser_sdk.input_handler import InputHandler
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LINES = b"".join(b"Jun 11 00:39:%02d host sshd[%d]: Accepted publickey for root from 10.0.0.%d\n" % (i % 60, i, i % 255)
+                 for i in range(20000))
+PIECES = [LINES[i:i + 50000] for i in range(0, len(LINES), 50000)]
+
+
+class TestDecompression(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def assertDecompresses(self, path: str, expected: bytes = LINES):
+        for workers, chunk_size in ((1, 8 * 1024 * 1024), (4, 4096), (3, 7777)):
+            self.assertEqual(b"".join(iter_decompressed(path, workers=workers, chunk_size=chunk_size)), expected)
+
+    def test_detects_codecs_by_magic_bytes(self):
+        self.assertEqual(detect_codec(self.write("a.log", gzip.compress(b"x"))), "gzip")
+        self.assertEqual(detect_codec(self.write("b", bz2.compress(b"x"))), "bz2")
+        self.assertEqual(detect_codec(self.write("c.gz", lzma.compress(b"x"))), "xz")
+        self.assertIsNone(detect_codec(self.write("d.gz", b"plain text")))
+        self.assertIsNone(detect_codec(self.write("e", b"")))
+
+    def test_gzip_members(self):
+        self.assertDecompresses(self.write("single.gz", gzip.compress(LINES)))
+        self.assertDecompresses(self.write("multi.gz", b"".join(gzip.compress(piece) for piece in PIECES)))
+        self.assertDecompresses(self.write("padded.gz", gzip.compress(LINES) + b"\x00" * 64))
+
+    def test_bz2_and_xz_streams(self):
+        self.assertDecompresses(self.write("multi.bz2", b"".join(bz2.compress(piece) for piece in PIECES)))
+        self.assertDecompresses(self.write("multi.xz", b"".join(lzma.compress(piece) for piece in PIECES)))
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd_frames(self):
+        compressor = zstandard.ZstdCompressor(write_checksum=True)
+        self.assertDecompresses(self.write("single.zst", compressor.compress(LINES)))
+        skippable = b"\x50\x2a\x4d\x18\x04\x00\x00\x00meta"
+        self.assertDecompresses(self.write("multi.zst", skippable + b"".join(compressor.compress(piece)
+                                                                             for piece in PIECES)))
+
+    def test_truncated_and_plain_files(self):
+        path = self.write("truncated.gz", b"".join(gzip.compress(piece) for piece in PIECES)[:-100])
+        for workers in (1, 4):
+            with self.assertRaises(EOFError):
+                b"".join(iter_decompressed(path, workers=workers, chunk_size=4096))
+        self.assertDecompresses(self.write("plain.log", LINES))
+        with open_decompressed(self.write("lines.gz", gzip.compress(LINES))) as f:
+            self.assertEqual(sum(1 for _ in f), 20000)
+
+    def assertBoundedOutput(self, path: str, expected: bytes, max_buffer_bytes: int):
+        # Only a checksum of the output is kept, so what tracemalloc sees is what the decompressor holds.
+        checksum = length = 0
+        tracemalloc.start()
+        try:
+            for piece in iter_decompressed(path, workers=4, chunk_size=16 * 1024, max_buffer_bytes=max_buffer_bytes):
+                checksum = zlib.crc32(piece, checksum)
+                length += len(piece)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual((length, checksum), (len(expected), zlib.crc32(expected)))
+        # One output piece of 1 MiB may be on its way to the consumer on top of the chunks in flight.
+        self.assertLess(peak, max_buffer_bytes + 2 * 1024 * 1024)
+
+    def test_parallel_output_in_flight_is_bounded(self):
+        # Each member expands 1000-fold; decoding four chunks of them whole would hold about 64 MiB.
+        member = b"\x00" * (4 * 1024 * 1024) + LINES[:100000]
+        path = self.write("zeros.gz", b"".join(gzip.compress(member) for _ in range(40)))
+        self.assertBoundedOutput(path, member * 40, 8 * 1024 * 1024)
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_parallel_zstd_output_in_flight_is_bounded(self):
+        compressor = zstandard.ZstdCompressor()
+        small = b"\x00" * (512 * 1024) + LINES[:3000]
+        large = b"\x00" * (12 * 1024 * 1024)
+        frames = [small] * 100 + [large] + [LINES] * 5
+        path = self.write("zeros.zst", b"".join(compressor.compress(frame) for frame in frames))
+        self.assertBoundedOutput(path, b"".join(frames), 8 * 1024 * 1024)
+
+
+class TestCompressedInput(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_handler = InputHandler(decompress_workers=2)
+        self.text = b"first entry\n{\n  \"user\": \"root\"\n}\nlast entry\n"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def test_read_log_file_and_resume(self):
+        with open(self.path("messages.1.gz"), "wb") as f:
+            f.write(gzip.compress(self.text[:20]) + gzip.compress(self.text[20:]))
+        entries = list(self.input_handler.iter_log_file_with_offsets(self.path("messages.1.gz")))
+        self.assertEqual([entry for _, _, entry in entries], ["first entry", '{\n"user": "root"\n}', "last entry"])
+        resumed = self.input_handler.iter_log_file(self.path("messages.1.gz"), start_offset=entries[1][1])
+        self.assertEqual(list(resumed), ["last entry"])
+
+    def test_directories_include_compressed_files(self):
+        with open(self.path("app.log"), "wb") as f:
+            f.write(b"plain entry\n")
+        with open(self.path("messages.2.bz2"), "wb") as f:
+            f.write(bz2.compress(b"rotated entry\n"))
+        with open(self.path("notes.md"), "wb") as f:
+            f.write(b"skipped\n")
+        files = self.input_handler.list_log_files(self.directory.name)
+        self.assertEqual([os.path.basename(path) for path in files], ["app.log", "messages.2.bz2"])
+        self.assertEqual(list(self.input_handler.read_logs_from_directory(self.directory.name).values()),
+                         [["plain entry"], ["rotated entry"]])
+        shards = self.input_handler.shard_log_files(files, shard_bytes=4)
+        self.assertEqual(shards[-1], (files[1], 0, os.path.getsize(files[1])))
+        self.assertEqual([entry for _, _, entry in self.input_handler.iter_log_range(*shards[-1])],
+                         ["rotated entry"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+import tempfile
+from log_parser_sdk.grok import GrokPattern, GrokPatternStore, GrokError, clean_pattern
+
+SYSLOG_LINE = "Jun 11 00:39:16 electrictampa runuser[2403]: pam_unix(runuser:session): session closed for user root"
+
+
+class TestGrokPattern(unittest.TestCase):
+    def test_match_syslog_base(self):
+        pattern = GrokPattern("%{SYSLOGBASE} %{GREEDYDATA:message}")
+        self.assertEqual(pattern.match(SYSLOG_LINE), {
+            "timestamp": "Jun 11 00:39:16",
+            "logsource": "electrictampa",
+            "program": "runuser",
+            "pid": "2403",
+            "message": "pam_unix(runuser:session): session closed for user root",
+        })
+
+    def test_typed_and_nested_fields(self):
+        pattern = GrokPattern("%{IPV4:[source][ip]}:%{INT:[source][port]:int} %{NUMBER:duration:float}")
+        self.assertEqual(pattern.match("10.80.22.2:61879 0.25"), {
+            "source": {"ip": "10.80.22.2", "port": 61879},
+            "duration": 0.25,
+        })
+
+    def test_no_match_returns_none(self):
+        pattern = GrokPattern("%{IPV4:ip}")
+        self.assertIsNone(pattern.match("not an address"))
+
+    def test_unknown_pattern_raises(self):
+        with self.assertRaises(GrokError):
+            GrokPattern("%{NOT_A_PATTERN:x}")
+
+    def test_clean_pattern(self):
+        self.assertEqual(clean_pattern("```\n%{IP:client} %{WORD:method}\n```"), "%{IP:client} %{WORD:method}")
+        self.assertEqual(clean_pattern("Grok Pattern: `%{IP:client}`"), "%{IP:client}")
+
+
+class TestGrokPatternStore(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_add_rejects_pattern_that_does_not_match_sample(self):
+        store = GrokPatternStore()
+        self.assertIsNone(store.add("%{IPV4:ip}", sample="hello"))
+        self.assertEqual(len(store), 0)
+
+    def test_save_and_reload(self):
+        store = GrokPatternStore(self.path)
+        store.add("%{SYSLOGBASE} %{GREEDYDATA:message}", sample=SYSLOG_LINE)
+        store.save()
+
+        reloaded = GrokPatternStore(self.path)
+        self.assertEqual(len(reloaded), 1)
+        self.assertEqual(reloaded.match(SYSLOG_LINE)["program"], "runuser")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+HEAVY_MODULES = ("scapy", "requests", "tenacity", "pyarrow", "asyncio", "http.server")
+
+
+def loaded_modules(code: str) -> set[str]:
+    probe = code + f"\nimport sys\nprint('loaded:' + ','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    loaded = output.stdout.splitlines()[-1][len("loaded:"):]
+    return {name for name in loaded.split(",") if name}
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_package_import_loads_nothing_heavy(self):
+        self.assertEqual(loaded_modules("import log_parser_sdk"), set())
+
+    def test_local_parsing_does_not_load_optional_dependencies(self):
+        code = ("from log_parser_sdk import LogParsingSDK\n"
+                "sdk = LogParsingSDK('key')\n"
+                "assert sdk.parse_log_entry('{\"a\": 1}') == {'a': 1}")
+        self.assertEqual(loaded_modules(code), set())
+
+    def test_claude_client_loads_http_stack_on_first_use(self):
+        code = ("from log_parser_sdk import LogParsingSDK\n"
+                "LogParsingSDK('key').claude_client")
+        self.assertEqual(loaded_modules(code), {"requests", "tenacity"})
+
+    def test_lazy_exports(self):
+        import log_parser_sdk
+        from log_parser_sdk.async_log_parser import AsyncLogParsingSDK
+
+        self.assertIs(log_parser_sdk.AsyncLogParsingSDK, AsyncLogParsingSDK)
+        self.assertIn("LogParsingSDK", dir(log_parser_sdk))
+        with self.assertRaises(AttributeError):
+            log_parser_sdk.Missing
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 import os
-from log_parser_sdk.input_handler import InputHandler
+from log_parser_sdk.input_handler import BufferedLogFile, InputHandler, LineSegmenter
 
 class TestInputHandler(unittest.TestCase):
     def setUp(self):
@@ -20,6 +20,85 @@ class TestInputHandler(unittest.TestCase):
         logs = self.input_handler.read_log_file(self.test_file_path)
         self.assertEqual(logs, ["log entry 1", "log entry 2", "log entry 3"])
 
+    def test_read_log_file_keeps_multiline_json_together(self):
+        with open(self.test_file_path, "w") as f:
+            f.write("plain line\n")
+            f.write("{\n")
+            f.write('  "user": {"name": "root"}\n')
+            f.write("}\n")
+            f.write('{"inline": true}\n')
+        logs = self.input_handler.read_log_file(self.test_file_path)
+        self.assertEqual(logs, ["plain line", '{\n"user": {"name": "root"}\n}', '{"inline": true}'])
+
+    def test_iter_log_file_with_offsets_can_resume(self):
+        entries = list(self.input_handler.iter_log_file_with_offsets(self.test_file_path))
+        self.assertEqual([entry for _, _, entry in entries], ["log entry 1", "log entry 2", "log entry 3"])
+        resumed = list(self.input_handler.iter_log_file(self.test_file_path, start_offset=entries[0][1]))
+        self.assertEqual(resumed, ["log entry 2", "log entry 3"])
+
+    def test_shards_cover_file_without_splitting_json_blocks(self):
+        with open(self.test_file_path, "w") as f:
+            for i in range(200):
+                f.write(f"plain line {i}\n" if i % 4 else '{\n  "block": %d,\n  "nested": {"ok": true}\n}\n' % i)
+        shards = self.input_handler.shard_log_files([self.test_file_path], shard_bytes=256)
+        self.assertGreater(len(shards), 1)
+        self.assertEqual(shards[0][1], 0)
+        self.assertEqual(shards[-1][2], os.path.getsize(self.test_file_path))
+        sharded = [entry for shard in shards for entry in self.input_handler.iter_log_range(*shard)]
+        self.assertEqual(sharded, list(self.input_handler.iter_log_file_with_offsets(self.test_file_path)))
+
+    def test_shards_never_start_inside_an_unindented_json_block(self):
+        with open(self.test_file_path, "w") as f:
+            f.write("plain line one\nplain line two\n{\n\"values\": [\n1,\ntrue,\n{\n\"x\": 1\n}\n]\n}\n"
+                    "plain line three\n")
+        serial = list(self.input_handler.iter_log_file_with_offsets(self.test_file_path))
+        self.assertEqual(len(serial), 4)
+        for shard_bytes in range(1, os.path.getsize(self.test_file_path) + 1):
+            shards = self.input_handler.shard_log_files([self.test_file_path], shard_bytes)
+            sharded = [entry for shard in shards for entry in self.input_handler.iter_log_range(*shard)]
+            self.assertEqual(sharded, serial, f"shard_bytes={shard_bytes}")
+
+    def test_buffered_log_file_matches_line_segmenter(self):
+        with open(self.test_file_path, "wb") as f:
+            f.write(b'plain } { line\r\n  \n{\n  "a": {"b": 1},\n\n  "c": 2\n}\n{"inline": 1}\n' * 20
+                    + b'last line\n{"open": [1,\n 2')
+        segmenter = LineSegmenter()
+        expected = []
+        offset = 0
+        with open(self.test_file_path, "rb") as f:
+            for raw_line in f:
+                expected.extend(segmenter.push(raw_line, offset, offset + len(raw_line)))
+                offset += len(raw_line)
+        expected.extend(segmenter.flush())
+        for block_size in (1, 7, 64, 1024 * 1024):
+            with BufferedLogFile(self.test_file_path, block_size) as log_file:
+                self.assertEqual(list(log_file), expected)
+                self.assertEqual(list(log_file.iter_entries(expected[3][0], expected[9][0])), expected[3:9])
+
+    def test_buffered_log_file_offsets(self):
+        with BufferedLogFile(self.test_file_path) as log_file:
+            entries = list(log_file)
+        self.assertEqual([entry for _, _, entry in entries], ["log entry 1", "log entry 2", "log entry 3"])
+        with open(self.test_file_path, "rb") as f:
+            f.seek(entries[1][0])
+            self.assertEqual(f.read(entries[1][1] - entries[1][0]), b"log entry 2\n")
+
+    def test_buffered_log_file_empty(self):
+        open(self.test_file_path, "w").close()
+        with BufferedLogFile(self.test_file_path) as log_file:
+            self.assertEqual(list(log_file), [])
+
+    def test_truncation_while_reading_ends_the_file(self):
+        with open(self.test_file_path, "w") as f:
+            for i in range(200000):
+                f.write(f"log entry {i}\n")
+        entries = self.input_handler.iter_log_file(self.test_file_path)
+        self.assertEqual(next(entries), "log entry 0")
+        # What logrotate's copytruncate does to a live log.
+        with open(self.test_file_path, "r+") as f:
+            f.truncate(0)
+        self.assertLess(len(list(entries)), 199999)
+
     def test_read_log_file_not_found(self):
         with self.assertRaises(FileNotFoundError):
             self.input_handler.read_log_file("non_existent_file.txt")
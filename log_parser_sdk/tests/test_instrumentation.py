@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import patch
+from log_parser_sdk.instrumentation import Instrumentation, metrics
+from log_parser_sdk.log_parser import LogParsingSDK
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        instrumentation = Instrumentation()
+        items = [1, 2, 3]
+        self.assertIsNone(instrumentation.start())
+        self.assertIs(instrumentation.timed_iter("read", items), items)
+        with instrumentation.timer("format"):
+            pass
+        instrumentation.increment("dispatch", route="json")
+        self.assertEqual(instrumentation.snapshot(), {"enabled": False, "stages": {}, "counters": {}})
+
+    def test_snapshot_stages_and_counters(self):
+        instrumentation = Instrumentation(enabled=True, buckets=(0.001, 0.01))
+        instrumentation.observe("classify", 0.0005)
+        instrumentation.observe("classify", 0.005)
+        self.assertEqual(list(instrumentation.timed_iter("read", "ab")), ["a", "b"])
+        instrumentation.increment("dispatch", route="json")
+        instrumentation.increment("dispatch", 2, route="json")
+        snapshot = instrumentation.snapshot()
+        self.assertEqual(snapshot["stages"]["classify"]["count"], 2)
+        self.assertAlmostEqual(snapshot["stages"]["classify"]["total_seconds"], 0.0055)
+        self.assertEqual(snapshot["stages"]["classify"]["p50_ms"], 1.0)
+        self.assertEqual(snapshot["stages"]["classify"]["p99_ms"], 10.0)
+        self.assertEqual(snapshot["stages"]["read"]["count"], 2)
+        self.assertEqual(snapshot["counters"], {'dispatch{route="json"}': 3})
+        json.dumps(snapshot)
+
+    def test_prometheus_text(self):
+        instrumentation = Instrumentation(enabled=True, buckets=(0.001, 0.01))
+        instrumentation.observe("format", 0.005)
+        instrumentation.observe("format", 0.5)
+        instrumentation.increment("claude_requests", kind="batch")
+        lines = instrumentation.to_prometheus().splitlines()
+        self.assertIn("# TYPE log_parser_stage_seconds histogram", lines)
+        self.assertIn('log_parser_stage_seconds_bucket{stage="format",le="0.001"} 0', lines)
+        self.assertIn('log_parser_stage_seconds_bucket{stage="format",le="0.01"} 1', lines)
+        self.assertIn('log_parser_stage_seconds_bucket{stage="format",le="+Inf"} 2', lines)
+        self.assertIn('log_parser_stage_seconds_count{stage="format"} 2', lines)
+        self.assertIn("# TYPE log_parser_claude_requests_total counter", lines)
+        self.assertIn('log_parser_claude_requests_total{kind="batch"} 1', lines)
+
+    def test_serve(self):
+        instrumentation = Instrumentation(enabled=True)
+        instrumentation.increment("dispatch", route="native")
+        server = instrumentation.serve(port=0)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(base + "/metrics") as response:
+                self.assertIn('log_parser_dispatch_total{route="native"} 1', response.read().decode())
+            with urllib.request.urlopen(base + "/metrics.json") as response:
+                self.assertEqual(json.load(response)["counters"], {'dispatch{route="native"}': 1})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestSDKInstrumentation(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+        metrics.enable()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_logs")
+    def test_stages_recorded_across_components(self, mock_parse_logs):
+        mock_parse_logs.side_effect = lambda entries, *args, **kwargs: [{"message": entry} for entry in entries]
+        sdk = LogParsingSDK("test_api_key")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "app.log")
+            with open(path, "w") as f:
+                f.write('{"event": "login"}\n')
+                f.write("Jun 11 00:39:01 web1 sshd[42]: Accepted publickey for alice\n")
+                f.write("custom event 1 happened\n")
+                f.write("other thing 2 failed\n")
+            records = sdk.parse_log_file(path)
+            sdk.output_formatter.write_json_lines(records, os.path.join(directory, "out.jsonl"))
+
+        snapshot = sdk.metrics.snapshot()
+        self.assertEqual(snapshot["stages"]["read"]["count"], 1)
+        self.assertEqual(snapshot["stages"]["segment"]["count"], 4)
+        self.assertEqual(snapshot["stages"]["format"]["count"], 4)
+        self.assertGreaterEqual(snapshot["stages"]["classify"]["count"], 4)
+        self.assertIn("cache_lookup", snapshot["stages"])
+        self.assertEqual(snapshot["counters"]['dispatch{route="json"}'], 1)
+        self.assertEqual(snapshot["counters"]['dispatch{route="native"}'], 1)
+        self.assertEqual(snapshot["counters"]['dispatch{route="claude"}'], 2)
+        self.assertEqual(snapshot["counters"]['records_formatted{format="jsonl"}'], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
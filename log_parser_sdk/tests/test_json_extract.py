@@ -0,0 +1,43 @@
+import unittest
+from unittest.mock import patch
+from log_parser_sdk import json_extract
+from log_parser_sdk.json_extract import decode_json_entry, extract_json_value, iter_json_values, loads
+
+
+class TestJsonExtract(unittest.TestCase):
+    def test_extract_plain_fenced_and_embedded_values(self):
+        self.assertEqual(extract_json_value(' {"a": 1} '), {"a": 1})
+        fenced = 'Item [0] is below:\n\n```json\n[{"id": 0}]\n```\nDone.'
+        self.assertEqual(extract_json_value(fenced), [{"id": 0}])
+        self.assertEqual(extract_json_value('Here you go: {"a": {"b": [1, 2]}} hope it helps {"c": 3}'),
+                         {"a": {"b": [1, 2]}})
+        self.assertEqual(extract_json_value('{"a": 1} and more text'), {"a": 1})
+        self.assertIsNone(extract_json_value("no json {here"))
+        self.assertEqual(extract_json_value("", default={}), {})
+
+    def test_iter_json_values(self):
+        text = '[{"id": 0}] then {"id": 1, "parsed": {}} and {broken [2]'
+        self.assertEqual(list(iter_json_values(text)), [[{"id": 0}], {"id": 1, "parsed": {}}, [2]])
+        truncated = '[{"id": 0, "parsed": {"a": 1}}, {"id": 1, "parsed": {"a":'
+        self.assertEqual(list(iter_json_values(truncated)), [{"id": 0, "parsed": {"a": 1}}])
+
+    def test_loads_falls_back_to_standard_library(self):
+        self.assertEqual(loads('{"n": 1}'), {"n": 1})
+        self.assertEqual(loads("[%d]" % 2 ** 70), [2 ** 70])
+        with patch.object(json_extract, "orjson", None):
+            self.assertEqual(loads('{"n": 1}'), {"n": 1})
+        with self.assertRaises(ValueError):
+            loads("{")
+
+    def test_decode_json_entry(self):
+        self.assertEqual(decode_json_entry('  {"a": 1}'), {"a": 1})
+        self.assertEqual(decode_json_entry("[1, 2]"), [1, 2])
+        self.assertIsNone(decode_json_entry("[2024-05-01] service started"))
+        self.assertIsNone(decode_json_entry("12345"))
+        self.assertIsNone(decode_json_entry(""))
+        with patch.object(json_extract, "loads") as mock_loads:
+            decode_json_entry("Jun 11 00:39:14 web01 sshd[1]: message")
+            mock_loads.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
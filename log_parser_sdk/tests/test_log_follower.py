@@ -0,0 +1,103 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+from log_parser_sdk.log_follower import LogFollower
+from log_parser_sdk.log_parser import LogParsingSDK
+
+
+def entries_of(tuples):
+    return [entry for _, _, entry in tuples]
+
+
+class TestLogFollower(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "app.log")
+        self.checkpoint_path = os.path.join(self.directory, "app.checkpoint")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def append(self, text, path=None):
+        with open(path or self.path, "a") as f:
+            f.write(text)
+
+    def test_reads_appended_lines_and_waits_for_complete_lines(self):
+        self.append("line 1\nline 2\npart")
+        with LogFollower(self.path, use_inotify=False) as follower:
+            self.assertEqual(entries_of(follower.read_available()), ["line 1", "line 2"])
+            self.assertEqual(follower.read_available(), [])
+            self.append("ial\nline 4\n")
+            self.assertEqual(entries_of(follower.read_available()), ["partial", "line 4"])
+
+    def test_checkpoint_resume(self):
+        self.append("line 1\nline 2\n")
+        with LogFollower(self.path, checkpoint_path=self.checkpoint_path) as follower:
+            self.assertEqual(entries_of(follower.read_available()), ["line 1", "line 2"])
+            follower.checkpoint()
+        self.append("line 3\n")
+        with LogFollower(self.path, checkpoint_path=self.checkpoint_path) as follower:
+            self.assertEqual(entries_of(follower.read_available()), ["line 3"])
+
+    def test_detects_truncation(self):
+        self.append("line 1\nline 2\n")
+        with LogFollower(self.path, use_inotify=False) as follower:
+            follower.read_available()
+            with open(self.path, "w") as f:
+                f.write("new\n")
+            with self.assertLogs("log_parser_sdk.log_follower", level="WARNING"):
+                self.assertEqual(entries_of(follower.read_available()), ["new"])
+
+    def test_detects_rotation_and_drains_old_file(self):
+        self.append("line 1\n")
+        with LogFollower(self.path) as follower:
+            self.assertEqual(entries_of(follower.read_available()), ["line 1"])
+            self.append("line 2\nlast line without newline")
+            os.rename(self.path, self.path + ".1")
+            self.append("fresh 1\n")
+            read = entries_of(follower.read_available()) + entries_of(follower.read_available())
+            self.assertEqual(read, ["line 2", "last line without newline", "fresh 1"])
+
+    def test_start_at_end_skips_existing_lines(self):
+        self.append("old\n")
+        with LogFollower(self.path, start_at_end=True, use_inotify=False) as follower:
+            self.assertEqual(follower.read_available(), [])
+            self.append("new\n")
+            self.assertEqual(entries_of(follower.read_available()), ["new"])
+
+    def test_follow_stops_after_idle_timeout(self):
+        self.append("line 1\n")
+        with LogFollower(self.path, poll_interval=0.01) as follower:
+            self.assertEqual(entries_of(follower.follow(idle_timeout=0.05)), ["line 1"])
+
+
+class TestFollowLogFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "app.log")
+        self.checkpoint_path = os.path.join(self.directory, "app.checkpoint")
+        self.sdk = LogParsingSDK("fake_api_key", parse_cache_size=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
+    def test_follow_log_file_parses_and_checkpoints(self, mock_parse):
+        mock_parse.side_effect = lambda entry: {"message": entry}
+        with open(self.path, "w") as f:
+            f.write('{"already": "json"}\nplain line\n')
+
+        records = list(self.sdk.follow_log_file(self.path, checkpoint_path=self.checkpoint_path,
+                                                poll_interval=0.01, idle_timeout=0.05))
+        self.assertEqual(records, [{"already": "json"}, {"message": "plain line"}])
+
+        with open(self.path, "a") as f:
+            f.write("another line\n")
+        records = list(self.sdk.follow_log_file(self.path, checkpoint_path=self.checkpoint_path,
+                                                poll_interval=0.01, idle_timeout=0.05))
+        self.assertEqual(records, [{"message": "another line"}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
+import io
 from unittest.mock import patch, MagicMock
 import os
 import json
+import tempfile
 from log_parser_sdk.log_parser import LogParsingSDK
 
 class TestLogParsingSDK(unittest.TestCase):
@@ -17,15 +19,15 @@ class TestLogParsingSDK(unittest.TestCase):
         if os.path.exists(self.test_log_file_path):
             os.remove(self.test_log_file_path)
 
-    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log_with_claude")
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
     def test_parse_log_entry_success(self, mock_parse_log_with_claude):
-        mock_parse_log_with_claude.return_value = json.dumps({"field": "value"})
+        mock_parse_log_with_claude.return_value = {"field": "value"}
         log_entry = "sample log"
         result = self.sdk.parse_log_entry(log_entry)
         self.assertEqual(result, {"field": "value"})
         mock_parse_log_with_claude.assert_called_once_with(log_entry, output_format="json")
 
-    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log_with_claude")
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
     def test_parse_log_entry_claude_error(self, mock_parse_log_with_claude):
         mock_parse_log_with_claude.side_effect = Exception("Claude error")
         with patch.object(self.sdk.error_handler, "handle_error") as mock_handle_error:
@@ -33,16 +35,16 @@ class TestLogParsingSDK(unittest.TestCase):
             self.assertEqual(result, {})
             mock_handle_error.assert_called_once()
 
-    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log_with_claude")
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
     def test_parse_log_file_success(self, mock_parse_log_with_claude):
-        mock_parse_log_with_claude.side_effect = [json.dumps({"field": "value1"}), json.dumps({"field": "value2"})]
+        mock_parse_log_with_claude.side_effect = [{"field": "value1"}, {"field": "value2"}]
         result = self.sdk.parse_log_file(self.test_log_file_path)
         self.assertEqual(result, [{"field": "value1"}, {"field": "value2"}])
         self.assertEqual(mock_parse_log_with_claude.call_count, 2)
 
-    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log_with_claude")
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
     def test_parse_log_file_json_decode_error(self, mock_parse_log_with_claude):
-        mock_parse_log_with_claude.side_effect = ["invalid json", json.dumps({"field": "value2"})]
+        mock_parse_log_with_claude.side_effect = ["invalid json", {"field": "value2"}]
         with patch.object(self.sdk.error_handler, "handle_error") as mock_handle_error:
             result = self.sdk.parse_log_file(self.test_log_file_path)
             self.assertEqual(len(result), 2)
@@ -50,6 +52,186 @@ class TestLogParsingSDK(unittest.TestCase):
             self.assertEqual(result[1], {"field": "value2"})
             mock_handle_error.assert_called_once()
 
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
+    def test_parse_log_entry_uses_template_cache(self, mock_parse_log_with_claude):
+        mock_parse_log_with_claude.return_value = {"src_ip": "10.0.0.1", "port": 22}
+        first = self.sdk.parse_log_entry("accepted 10.0.0.1 port 22")
+        second = self.sdk.parse_log_entry("accepted 10.0.0.9 port 2222")
+        self.assertEqual(first, {"src_ip": "10.0.0.1", "port": 22})
+        self.assertEqual(second, {"src_ip": "10.0.0.9", "port": 2222})
+        mock_parse_log_with_claude.assert_called_once()
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
+    def test_serial_and_concurrent_modes_preserve_order_and_report_errors(self, mock_parse_log_with_claude):
+        def fake_parse(entry):
+            if entry == "bad entry":
+                raise ValueError("Claude error")
+            return {"message": entry}
+        mock_parse_log_with_claude.side_effect = fake_parse
+        entries = [f"entry {chr(97 + i)}" for i in range(8)] + ["bad entry", '{"already": "json"}']
+        for max_workers in (1, 4):
+            sdk = LogParsingSDK(self.api_key, parse_cache_size=0, max_workers=max_workers, max_batch_tokens=0)
+            result = sdk._parse_entries(entries)
+            self.assertEqual(result[:8], [{"message": entry} for entry in entries[:8]])
+            self.assertEqual(result[8], {"parsing_error": "Claude error", "raw_log": "bad entry"})
+            self.assertEqual(result[9], {"already": "json"})
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient._make_request")
+    def test_resume_from_checkpoint_skips_parsed_entries(self, mock_make_request):
+        mock_make_request.side_effect = lambda prompt, **kwargs: {"prompt_length": len(prompt)}
+        with tempfile.TemporaryDirectory() as directory:
+            sdk = LogParsingSDK(self.api_key, parse_cache_size=0, max_batch_tokens=0,
+                                result_store_path=os.path.join(directory, "results.sqlite"))
+            records = sdk.iter_parse_log_file(self.test_log_file_path, chunk_size=1, resume=True)
+            next(records)
+            next(records)
+            records.close()
+            self.assertEqual(mock_make_request.call_count, 2)
+
+            with open(self.test_log_file_path, "a") as f:
+                f.write("log entry 3\n")
+            # The second chunk was interrupted before its checkpoint, so it is read
+            # again but served from the result store.
+            resumed = sdk.parse_log_file(self.test_log_file_path, resume=True)
+            self.assertEqual(len(resumed), 2)
+            self.assertEqual(mock_make_request.call_count, 3)
+
+            rerun = sdk.parse_log_file(self.test_log_file_path)
+            self.assertEqual(len(rerun), 3)
+            self.assertEqual(mock_make_request.call_count, 3)
+            sdk.result_store.close()
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_logs")
+    def test_iter_parse_log_file_streams_in_chunks(self, mock_parse_logs_batch):
+        mock_parse_logs_batch.side_effect = lambda entries, **kwargs: [{"entry": e} for e in entries]
+        with open(self.test_log_file_path, "a") as f:
+            f.write('{"already": "json"}\n')
+        sdk = LogParsingSDK(self.api_key, parse_cache_size=0)
+        records = sdk.iter_parse_log_file(self.test_log_file_path, chunk_size=2)
+        self.assertEqual(next(records), {"entry": "log entry 1"})
+        self.assertEqual(list(records), [{"entry": "log entry 2"}, {"already": "json"}])
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_logs")
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
+    def test_parse_entries_batches_one_entry_per_template(self, mock_parse_log_with_claude, mock_parse_logs_batch):
+        mock_parse_logs_batch.side_effect = lambda entries, **kwargs: [
+            {"user": entry.split()[1], "src_ip": entry.split()[-1]} for entry in entries
+        ]
+        entries = [
+            "login alice from 10.0.0.1",
+            "logout alice from 10.0.0.1",
+            "login alice from 10.0.0.2",
+            "logout alice from 10.0.0.3",
+        ]
+        result = self.sdk._parse_entries(entries)
+        self.assertEqual([r["src_ip"] for r in result], ["10.0.0.1", "10.0.0.1", "10.0.0.2", "10.0.0.3"])
+        mock_parse_logs_batch.assert_called_once()
+        self.assertEqual(mock_parse_logs_batch.call_args[0][0], entries[:2])
+        mock_parse_log_with_claude.assert_not_called()
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_logs")
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
+    def test_uncacheable_template_is_sent_in_one_round(self, mock_parse_log_with_claude, mock_parse_logs_batch):
+        # A normalised timestamp cannot be rebuilt from the entry, so the template is never cached.
+        mock_parse_log_with_claude.side_effect = lambda entry, **kwargs: {"time": "2021-10-13T12:54:53Z"}
+        mock_parse_logs_batch.side_effect = lambda entries, **kwargs: [{"time": "2021-10-13T12:54:53Z"}
+                                                                      for _ in entries]
+        sdk = LogParsingSDK(self.api_key, max_workers=8)
+        entries = [f"job {i} done at 12:54:{i % 60:02d}" for i in range(80)]
+        result = sdk._parse_entries(entries)
+        self.assertEqual(len(result), 80)
+        self.assertEqual(mock_parse_log_with_claude.call_count, 1)
+        self.assertEqual(sum(len(call[0][0]) for call in mock_parse_logs_batch.call_args_list), 79)
+        self.assertLessEqual(mock_parse_logs_batch.call_count, 4)
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_logs")
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
+    def test_inferred_labels_are_confirmed_by_a_second_entry(self, mock_parse_log_with_claude,
+                                                             mock_parse_logs_batch):
+        def fake_parse(entry, **kwargs):
+            return {"user": int(entry.split()[2]), "outcome": "success"}
+        mock_parse_log_with_claude.side_effect = fake_parse
+        mock_parse_logs_batch.side_effect = lambda entries, **kwargs: [fake_parse(entry) for entry in entries]
+        entries = [f"login user {i} accepted" for i in range(30)]
+        result = self.sdk._parse_entries(entries)
+        self.assertEqual(result[29], {"user": 29, "outcome": "success"})
+        self.assertEqual(mock_parse_log_with_claude.call_count, 2)
+        mock_parse_logs_batch.assert_not_called()
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_logs")
+    def test_parallel_directory_parsing_matches_serial_order(self, mock_parse_logs_batch):
+        mock_parse_logs_batch.side_effect = lambda entries, *args, **kwargs: [
+            {"message": entry} for entry in entries
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("a.log", "b.log"):
+                with open(os.path.join(directory, name), "w") as f:
+                    for i in range(50):
+                        f.write(f'{{"file": "{name}", "i": {i}}}\n' if i % 2 else f"{name} event {i} happened\n")
+            with open(os.path.join(directory, "c.json"), "w") as f:
+                f.write('{\n  "a": 1,\n  "b": {"c": 2}\n}\n{"d": 3}\n')
+            serial = LogParsingSDK(self.api_key, parse_cache_size=0)
+            expected = serial.parse_logs_from_directory(directory)
+            parallel = LogParsingSDK(self.api_key, parse_cache_size=0)
+            results = parallel.parse_logs_from_directory(directory, processes=2, shard_bytes=512)
+        self.assertEqual(len(results), 102)
+        self.assertEqual(results[100], {"a": 1, "b": {"c": 2}})
+        self.assertEqual(results, expected)
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_logs")
+    def test_parallel_json_lines_match_serial_output(self, mock_parse_logs_batch, mock_parse_log_with_claude):
+        mock_parse_log_with_claude.side_effect = lambda entry, *args, **kwargs: {"message": entry}
+        mock_parse_logs_batch.side_effect = lambda entries, *args, **kwargs: [
+            {"message": entry} for entry in entries
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "a.log"), "w") as f:
+                for i in range(60):
+                    f.write(f'{{"i": {i}, "tags": ["x"]}}\n' if i % 3 else f"worker {i} did something\n")
+            serial = LogParsingSDK(self.api_key, parse_cache_size=0)
+            expected = io.StringIO()
+            serial.output_formatter.write_json_lines(serial.parse_logs_from_directory(directory), expected)
+            parallel = LogParsingSDK(self.api_key, parse_cache_size=0)
+            output = io.StringIO()
+            count = parallel.write_logs_from_directory(directory, output, processes=2, shard_bytes=256)
+        self.assertEqual(count, 60)
+        self.assertEqual(output.getvalue(), expected.getvalue())
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
+    def test_json_entries_are_decoded_once(self, mock_parse_log_with_claude):
+        from log_parser_sdk import json_extract
+        entries = ['{"a": 1}', ' [1, 2]', "Jun 11 00:39:14 web01 sshd[220900]: Connection closed"]
+        with patch.object(json_extract, "loads", wraps=json_extract.loads) as mock_loads:
+            result = self.sdk._parse_entries(entries)
+        self.assertEqual(result[:2], [{"a": 1}, [1, 2]])
+        self.assertEqual(result[2]["appname"], "sshd")
+        self.assertEqual(mock_loads.call_count, 2)
+        mock_parse_log_with_claude.assert_not_called()
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
+    def test_native_parsers_skip_claude(self, mock_parse_log_with_claude):
+        result = self.sdk.parse_log_entry("Jun 11 00:39:14 web01 sshd[220900]: Connection closed by 10.14.2.85")
+        self.assertEqual(result["appname"], "sshd")
+        self.assertEqual(result["procid"], 220900)
+        mock_parse_log_with_claude.assert_not_called()
+
+        mock_parse_log_with_claude.return_value = {"program": "sshd"}
+        sdk = LogParsingSDK(self.api_key, native_parsers=False)
+        self.assertEqual(sdk.parse_log_entry("Jun 11 00:39:14 web01 sshd[220900]: Connection closed"), {"program": "sshd"})
+
+    @patch("log_parser_sdk.claude_client.ClaudeClient.generate_grok_pattern_with_claude")
+    @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log")
+    def test_learned_grok_pattern_skips_claude(self, mock_parse_log_with_claude, mock_generate_grok):
+        mock_generate_grok.return_value = "%{WORD:user} logged in from %{IPV4:src_ip}"
+        self.sdk.learn_grok_patterns = True
+        first = self.sdk.parse_log_entry("alice logged in from 10.0.0.1")
+        second = self.sdk.parse_log_entry("bob logged in from 10.0.0.2")
+        self.assertEqual(first, {"user": "alice", "src_ip": "10.0.0.1"})
+        self.assertEqual(second, {"user": "bob", "src_ip": "10.0.0.2"})
+        mock_generate_grok.assert_called_once()
+        mock_parse_log_with_claude.assert_not_called()
+
     @patch("log_parser_sdk.claude_client.ClaudeClient.parse_log_with_claude")
     def test_generate_grok_pattern_success(self, mock_parse_log_with_claude):
         mock_parse_log_with_claude.return_value = "%{SYSLOGBASE}"
@@ -0,0 +1,119 @@
+import unittest
+from log_parser_sdk.native_parsers import NativeParser, NativeParserRegistry, parse_syslog_header
+
+TRAFFIC_LINE = (
+    "Jun 11 00:02:56 FW-PRI 1,2022/05/16 07:30:07,007958000225708,TRAFFIC,end,2560,2022/05/16 07:30:05,"
+    "10.138.16.89,10.137.16.103,0.0.0.0,0.0.0.0,Allow-Datastore,,,ssl,vsys1,trust,trust,ethernet1/1,"
+    "ethernet1/1,log-forwarding,2022/05/16 07:30:05,126443,1,34010,8443,0,0,0x10047a,tcp,allow,6186,1761,"
+    "4425,31,2022/05/16 07:28:47,61,private-ip-addresses,,317786561,0x8000000000000000,10.0.0.0-10.255.255.255,"
+    "10.0.0.0-10.255.255.255,,18,13,tcp-rst-from-client,38,46,0,0,,fw-prod-1,from-policy"
+)
+THREAT_LINE = (
+    "Jun 11 00:02:26 10.90.130.5 <14>Jul 13 05:43:20 pan01.example.com - 1,2022/07/13 05:43:20,016401007615,"
+    "THREAT,spyware,2305,2022/07/13 05:43:18,10.90.200.114,18.160.213.49,204.90.74.7,18.160.213.49,"
+    "Proxy to Internet,,,ssl,vsys1,DMZ,untrusted,ae3.200,ae1,Forward,2022/07/13 05:43:18,1730072,2,34352,443,"
+    "34352,443,0x403000,tcp,alert,\"training.example.com/\",Suspicious TLS Evasion Found(14978),low-risk,"
+    "informational,client-to-server,441662854"
+)
+SYSTEM_LINE = (
+    "Jun 11 00:02:53 fw1.example.com 1,2022/07/12 04:21:41,016201002769,SYSTEM,userid,0,2022/07/12 04:21:41,,"
+    "connect-server-monitor,,0,0,general,informational,\"User-ID server monitor dc01(vsys1): connected to dc01\","
+    "69700261,0x8000000000000000,0,0,0,0,,FWL127-001"
+)
+
+
+class TestSyslogHeader(unittest.TestCase):
+    def test_rfc3164_with_tag_and_pid(self):
+        self.assertEqual(parse_syslog_header("<38>Jun 11 00:39:15 web01 cron[12805]: session opened"), {
+            "timestamp": "Jun 11 00:39:15",
+            "hostname": "web01",
+            "appname": "cron",
+            "procid": 12805,
+            "message": "session opened",
+            "priority": 38,
+            "facility": 4,
+            "severity": 6,
+        })
+
+    def test_rfc3164_without_tag(self):
+        self.assertEqual(parse_syslog_header("Jun 11 00:39:17 web01 run-parts(/etc/cron.hourly)[2403 starting"), {
+            "timestamp": "Jun 11 00:39:17",
+            "hostname": "web01",
+            "message": "run-parts(/etc/cron.hourly)[2403 starting",
+        })
+
+    def test_rfc5424(self):
+        line = '<34>1 2003-10-11T22:14:15.003Z mymachine.example.com su - ID47 [exampleSDID@32473 iut="3"] su root failed'
+        self.assertEqual(parse_syslog_header(line), {
+            "version": 1,
+            "timestamp": "2003-10-11T22:14:15.003Z",
+            "hostname": "mymachine.example.com",
+            "appname": "su",
+            "msgid": "ID47",
+            "structured_data": '[exampleSDID@32473 iut="3"]',
+            "message": "su root failed",
+            "priority": 34,
+            "facility": 4,
+            "severity": 2,
+        })
+
+    def test_not_syslog(self):
+        self.assertIsNone(parse_syslog_header("Jun 10, 2025 8:02 PMa minute ago"))
+
+
+class TestNativeParserRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = NativeParserRegistry()
+
+    def test_panos_traffic(self):
+        self.assertEqual(self.registry.classify(TRAFFIC_LINE), "panos")
+        result = self.registry.parse(TRAFFIC_LINE)
+        self.assertEqual(result["type"], "TRAFFIC")
+        self.assertEqual(result["src"], "10.138.16.89")
+        self.assertEqual(result["dport"], 8443)
+        self.assertEqual(result["bytes"], 6186)
+        self.assertEqual(result["session_end_reason"], "tcp-rst-from-client")
+        self.assertEqual(result["device_name"], "fw-prod-1")
+        self.assertEqual(result["syslog"], {"timestamp": "Jun 11 00:02:56", "hostname": "FW-PRI"})
+        self.assertNotIn("FUTURE_USE", result)
+        self.assertNotIn("srcuser", result)
+
+    def test_panos_threat_behind_nested_syslog_header(self):
+        result = self.registry.parse(THREAT_LINE)
+        self.assertEqual(result["subtype"], "spyware")
+        self.assertEqual(result["misc"], "training.example.com/")
+        self.assertEqual(result["threatid"], "Suspicious TLS Evasion Found(14978)")
+        self.assertEqual(result["direction"], "client-to-server")
+        self.assertEqual(result["syslog"]["hostname"], "10.90.130.5")
+
+    def test_panos_system(self):
+        result = self.registry.parse(SYSTEM_LINE)
+        self.assertEqual(result["eventid"], "connect-server-monitor")
+        self.assertEqual(result["opaque"], "User-ID server monitor dc01(vsys1): connected to dc01")
+        self.assertEqual(result["device_name"], "FWL127-001")
+
+    def test_unknown_format_is_left_alone(self):
+        self.assertIsNone(self.registry.classify("user=root action=login"))
+        self.assertIsNone(self.registry.parse("user=root action=login"))
+        self.assertIsNone(self.registry.parse("Jun 10, 2025 8:02 PMa minute ago"))
+
+    def test_register_custom_parser_first(self):
+        class KeyValueParser(NativeParser):
+            name = "kv"
+
+            def matches(self, log_entry):
+                return "=" in log_entry
+
+            def parse(self, log_entry):
+                return dict(pair.split("=", 1) for pair in log_entry.split())
+
+        self.registry.register(KeyValueParser())
+        self.assertEqual(self.registry.names[0], "kv")
+        self.assertEqual(self.registry.parse("user=root action=login"), {"user": "root", "action": "login"})
+        self.assertEqual(self.registry.hits["kv"], 1)
+
+        self.registry.unregister("kv")
+        self.assertIsNone(self.registry.parse("user=root action=login"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import json
+from io import StringIO
 from log_parser_sdk.output_formatter import OutputFormatter
 
 class TestOutputFormatter(unittest.TestCase):
@@ -26,6 +27,41 @@ class TestOutputFormatter(unittest.TestCase):
         expected_json = json.dumps(data_list, indent=2)
         self.assertEqual(self.formatter.format_list_to_json(data_list), expected_json)
 
+    def test_write_json_lines(self):
+        output = StringIO()
+        count = self.formatter.write_json_lines(iter([{"a": 1}, {"b": [2]}]), output)
+        self.assertEqual(count, 2)
+        self.assertEqual(output.getvalue(), '{"a": 1}\n{"b": [2]}\n')
+
+    def test_write_csv_stream(self):
+        output = StringIO()
+        records = iter([{"a": 1, "n": {"x": "y"}}, {"a": 2, "extra": "multi\nline"}])
+        count = self.formatter.write_csv_stream(records, output)
+        self.assertEqual(count, 2)
+        self.assertEqual(output.getvalue().splitlines(), ["a,n_x,extra", "1,y,", '2,,"multi', 'line"'])
+
+    def test_write_csv_stream_declared_fields(self):
+        output = StringIO()
+        records = iter([{"a": 1, "n": {"x": "y"}}, {"a": 2, "extra": "dropped"}])
+        count = self.formatter.write_csv_stream(records, output, fieldnames=["a", "n_x"])
+        self.assertEqual(count, 2)
+        self.assertEqual(output.getvalue().splitlines(), ["a,n_x", "1,y", "2,"])
+        output = StringIO()
+        self.assertEqual(self.formatter.write_csv_stream(iter([]), output, fieldnames=["a"]), 0)
+        self.assertEqual(output.getvalue().splitlines(), ["a"])
+
+    def test_write_csv_stream_deep_flattening(self):
+        output = StringIO()
+        records = [{"z": 1, "n": {"m": {"k": True}}}, {"b": None}]
+        self.formatter.write_csv_stream(records, output, separator=".", sort_fields=True)
+        self.assertEqual(output.getvalue().splitlines(), ["b,n.m.k,z", ",True,1", ",,"])
+
+    def test_format_to_csv(self):
+        data_list = [{"b": 1, "a": {"x": {"y": 2}}}, {"c": 3}]
+        self.assertEqual(self.formatter.format_to_csv(data_list).splitlines(),
+                         ["a_x,b,c", "{'y': 2},1,", ",,3"])
+        self.assertEqual(self.formatter.format_to_csv([]), "")
+
 if __name__ == '__main__':
     unittest.main()
 
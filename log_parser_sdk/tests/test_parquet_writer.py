@@ -0,0 +1,77 @@
+import unittest
+import io
+import os
+import tempfile
+from log_parser_sdk.output_formatter import OutputFormatter, flatten_record
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from log_parser_sdk.parquet_writer import ParquetRecordWriter
+except ImportError:
+    pa = None
+
+
+class TestFlattenRecord(unittest.TestCase):
+    def test_flattens_to_any_depth(self):
+        record = {"a": {"b": {"c": 1}, "d": 2}, "e": [1, {"f": 3}]}
+        self.assertEqual(flatten_record(record), {"a_b_c": 1, "a_d": 2, "e": [1, {"f": 3}]})
+        self.assertEqual(flatten_record(record, separator="."), {"a.b.c": 1, "a.d": 2, "e": [1, {"f": 3}]})
+        self.assertEqual(flatten_record(record, max_depth=1), {"a_b": {"c": 1}, "a_d": 2, "e": [1, {"f": 3}]})
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestParquetRecordWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "records.parquet")
+
+    def tearDown(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def test_row_groups_and_dictionary_columns(self):
+        records = ({"action": "allow" if i % 3 else "deny", "session_id": i, "src": {"ip": f"10.0.0.{i}"}}
+                   for i in range(25))
+        count = OutputFormatter().write_parquet(records, self.path, row_group_size=10)
+        self.assertEqual(count, 25)
+        parquet_file = pq.ParquetFile(self.path)
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        schema = parquet_file.schema_arrow
+        self.assertEqual(schema.names, ["action", "session_id", "src_ip"])
+        self.assertTrue(pa.types.is_dictionary(schema.field("action").type))
+        self.assertEqual(schema.field("session_id").type, pa.int64())
+        self.assertEqual(schema.field("src_ip").type, pa.string())
+        rows = pq.read_table(self.path).to_pylist()
+        self.assertEqual(rows[3], {"action": "deny", "session_id": 3, "src_ip": "10.0.0.3"})
+        self.assertEqual(os.listdir(self.directory), ["records.parquet"])
+
+    def test_schema_evolves_across_row_groups(self):
+        records = [{"port": 80, "app": "web"}, {"port": 443, "app": "ssl"},
+                   {"port": 1.5, "tags": ["a"], "app": {"name": "dns"}},
+                   {"port": "any", "flag": True}]
+        with ParquetRecordWriter(self.path, row_group_size=2, dictionary_fields=[]) as writer:
+            writer.write_records(records)
+        table = pq.read_table(self.path)
+        self.assertEqual(table.schema.names, ["port", "app", "tags", "app_name", "flag"])
+        self.assertEqual(table.schema.field("port").type, pa.string())
+        self.assertEqual(table.to_pylist(), [
+            {"port": "80", "app": "web", "tags": None, "app_name": None, "flag": None},
+            {"port": "443", "app": "ssl", "tags": None, "app_name": None, "flag": None},
+            {"port": "1.5", "app": None, "tags": '["a"]', "app_name": "dns", "flag": None},
+            {"port": "any", "app": None, "tags": None, "app_name": None, "flag": True},
+        ])
+
+    def test_file_handle_and_abort(self):
+        output = io.BytesIO()
+        OutputFormatter().write_parquet([{"a": 1}], output)
+        self.assertEqual(pq.read_table(io.BytesIO(output.getvalue())).to_pylist(), [{"a": 1}])
+        with self.assertRaises(RuntimeError):
+            with ParquetRecordWriter(self.path, row_group_size=1) as writer:
+                writer.write({"a": 1})
+                raise RuntimeError("stop")
+        self.assertEqual(os.listdir(self.directory), [])
+
+if __name__ == '__main__':
+    unittest.main()
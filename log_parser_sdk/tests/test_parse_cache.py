@@ -0,0 +1,91 @@
+import unittest
+from log_parser_sdk.parse_cache import ParseCache
+
+TRAFFIC_1 = "Jun 09 17:49:30 TP-PA850-A 1,2021/10/13 12:54:53,011901019052,TRAFFIC,end,10.80.22.2,8.8.8.8,61879,53,0x19,udp,allow"
+TRAFFIC_2 = "Jun 09 17:49:31 TP-PA850-A 1,2021/10/13 12:55:07,011901019052,TRAFFIC,end,10.80.22.7,8.8.4.4,61880,443,0x1a,udp,allow"
+TRAFFIC_3 = "Jun 09 17:49:32 TP-PA850-A 1,2021/10/13 12:55:09,011901019052,TRAFFIC,end,10.80.22.9,1.1.1.1,61881,853,0x1b,udp,allow"
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ParseCache(max_size=2)
+
+    def test_template_masks_variable_fields(self):
+        self.assertEqual(ParseCache.template_of(TRAFFIC_1), ParseCache.template_of(TRAFFIC_2))
+        self.assertEqual(
+            ParseCache.template_of("user 42 logged in from 10.0.0.1 at 2021/10/13 12:54:53"),
+            "user <NUM> logged in from <IP> at <TS>",
+        )
+
+    def test_lookup_rebuilds_result_from_cached_mapping(self):
+        parsed = {
+            "timestamp": "Jun 09 17:49:30",
+            "host": "TP-PA850-A",
+            "network": {"src_ip": "10.80.22.2", "dst_ip": "8.8.8.8"},
+            "ports": [61879, 53],
+            "flags": "0x19",
+            "action": "allow",
+            "severity": "informational",
+        }
+        self.assertTrue(self.cache.store(TRAFFIC_1, parsed))
+        # "informational" is not in the entry, so it is only trusted once a second entry confirms it.
+        self.assertIsNone(self.cache.lookup(TRAFFIC_2))
+        self.assertTrue(self.cache.store(TRAFFIC_2, dict(
+            parsed, timestamp="Jun 09 17:49:31", network={"src_ip": "10.80.22.7", "dst_ip": "8.8.4.4"},
+            ports=[61880, 443], flags="0x1a")))
+        result = self.cache.lookup(TRAFFIC_3)
+        self.assertEqual(result, {
+            "timestamp": "Jun 09 17:49:32",
+            "host": "TP-PA850-A",
+            "network": {"src_ip": "10.80.22.9", "dst_ip": "1.1.1.1"},
+            "ports": [61881, 853],
+            "flags": "0x1b",
+            "action": "allow",
+            "severity": "informational",
+        })
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_inferred_labels_are_not_replayed_for_other_values(self):
+        self.assertTrue(self.cache.store("conn from 10.0.0.1 port 53 status 404",
+                                         {"service": "dns", "status_text": "Not Found"}))
+        self.assertIsNone(self.cache.lookup("conn from 10.0.0.2 port 22 status 200"))
+        self.assertFalse(self.cache.store("conn from 10.0.0.2 port 22 status 200",
+                                          {"service": "ssh", "status_text": "OK"}))
+        self.cache.store("conn from 10.0.0.3 port 53 status 404", {"service": "dns", "status_text": "Not Found"})
+        self.cache.store("conn from 10.0.0.4 port 53 status 404", {"service": "dns", "status_text": "Not Found"})
+        self.assertIsNone(self.cache.lookup("conn from 10.0.0.5 port 443 status 500"))
+
+    def test_labels_confirmed_only_by_different_values(self):
+        self.cache.store("login ok for 10.0.0.1", {"success": True, "src": "10.0.0.1"})
+        self.cache.store("login ok for 10.0.0.1", {"success": True, "src": "10.0.0.1"})
+        self.assertIsNone(self.cache.lookup("login ok for 10.0.0.2"))
+        self.cache.store("login ok for 10.0.0.3", {"success": True, "src": "10.0.0.3"})
+        self.assertEqual(self.cache.lookup("login ok for 10.0.0.4"), {"success": True, "src": "10.0.0.4"})
+        self.cache.store("service started", {"event": "start"})
+        self.assertEqual(self.cache.lookup("service started"), {"event": "start"})
+
+    def test_unmappable_result_is_not_cached(self):
+        self.assertFalse(self.cache.store(TRAFFIC_1, {"timestamp": "2021-10-13T12:54:53Z"}))
+        self.assertFalse(self.cache.store(TRAFFIC_1, {"raw_output": "not json"}))
+        self.assertIsNone(self.cache.lookup(TRAFFIC_2))
+        self.assertEqual(self.cache.stats()["uncacheable"], 2)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_ambiguous_mapping_is_a_miss_until_narrowed(self):
+        self.cache.store("a=5 b=5", {"b": 5})
+        self.assertIsNone(self.cache.lookup("a=1 b=2"))
+        self.cache.store("a=1 b=2", {"b": 2})
+        self.assertEqual(self.cache.lookup("a=7 b=9"), {"b": 9})
+
+    def test_lru_eviction(self):
+        self.cache.store("alpha 1", {"n": 1})
+        self.cache.store("beta 1", {"n": 1})
+        self.cache.lookup("alpha 2")
+        self.cache.store("gamma 1", {"n": 1})
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertIsNone(self.cache.lookup("beta 2"))
+        self.assertEqual(self.cache.lookup("alpha 3"), {"n": 3})
+
+if __name__ == '__main__':
+    unittest.main()
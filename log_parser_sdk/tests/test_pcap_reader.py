@@ -0,0 +1,101 @@
+import unittest
+import os
+import tempfile
+from scapy.all import Dot1Q, Ether, IP, IPv6, Raw, TCP, UDP, wrpcap
+from scapy.utils import PcapNgWriter
+from log_parser_sdk.input_handler import InputHandler
+from log_parser_sdk.pcap_reader import PcapFormatError, TcpStreamReassembler, iter_pcap_payloads
+
+SYSLOG = b"<13>Jun 11 00:39:16 host app: octet framed"
+
+
+def tcp(seq, payload=b"", flags="A"):
+    segment = Ether() / IP(src="10.0.0.1", dst="10.0.0.2") / TCP(sport=40000, dport=601, flags=flags, seq=seq)
+    return segment / Raw(payload) if payload else segment
+
+
+class TestPcapReader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        first, second = b"first line\nsecond ", b"line\n%d %s" % (len(SYSLOG), SYSLOG)
+        self.packets = [
+            Ether() / IP() / UDP(sport=5000, dport=514) / Raw(b"<13>Jun 11 00:39:16 host app: udp message\n"),
+            Ether() / Dot1Q(vlan=5) / IP() / UDP(sport=5000, dport=514) / Raw(b"vlan message"),
+            Ether() / IPv6() / UDP(sport=5000, dport=514) / Raw(b"ipv6 message"),
+            Ether() / IP() / UDP(sport=53, dport=53) / Raw(b"other port"),
+            tcp(999, flags="S"),
+            tcp(1000 + len(first), second),  # Arrives before the segment it follows.
+            tcp(1000, first),
+            tcp(1000, first),  # Retransmission.
+            tcp(1000 + len(first) + len(second), b"\ntrailing", flags="FA"),
+            Ether() / IP() / TCP(sport=443, dport=50000) / Raw(bytes(range(256))),
+        ]
+        self.expected = [
+            "<13>Jun 11 00:39:16 host app: udp message", "vlan message", "ipv6 message", "other port",
+            "first line", "second line", SYSLOG.decode(), "trailing",
+        ]
+
+    def tearDown(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def payloads(self, path, **options):
+        with open(path, "rb") as f:
+            return list(iter_pcap_payloads(f, **options))
+
+    def test_pcap_and_pcapng(self):
+        pcap_path = os.path.join(self.directory, "capture.pcap")
+        pcapng_path = os.path.join(self.directory, "capture.pcapng")
+        wrpcap(pcap_path, self.packets)
+        with PcapNgWriter(pcapng_path) as writer:
+            for packet in self.packets:
+                writer.write(packet)
+        self.assertEqual(self.payloads(pcap_path), self.expected)
+        self.assertEqual(self.payloads(pcapng_path), self.expected)
+
+    def test_filters_and_unreassembled_segments(self):
+        path = os.path.join(self.directory, "capture.pcap")
+        wrpcap(path, self.packets)
+        self.assertEqual(self.payloads(path, protocols=["udp"], ports=[514]), self.expected[:3])
+        segments = self.payloads(path, ports=[601], reassemble_tcp=False)
+        self.assertEqual(segments[1], "first line\nsecond")
+
+    def test_not_a_capture(self):
+        path = os.path.join(self.directory, "capture.pcap")
+        with open(path, "wb") as f:
+            f.write(b"plain text")
+        with self.assertRaises(PcapFormatError):
+            self.payloads(path)
+
+    def test_reassembler_flushes_unterminated_data(self):
+        reassembler = TcpStreamReassembler()
+        self.assertEqual(reassembler.add("stream", 1, 0x10, b"one\ntw"), [b"one"])
+        self.assertEqual(reassembler.flush(), [b"tw"])
+
+    def test_reassembler_evicts_least_recently_active_streams(self):
+        reassembler = TcpStreamReassembler(max_streams=3)
+        self.assertEqual(reassembler.add("a", 1, 0x10, b"kept\npart"), [b"kept"])
+        evicted = []
+        for port in range(1000):
+            evicted.extend(reassembler.add(("scan", port), 0, 0x02, b""))
+            self.assertLessEqual(len(reassembler._streams), 3)
+        self.assertEqual(evicted, [b"part"])
+        self.assertEqual(reassembler.add("b", 1, 0x10, b"one\ntw"), [b"one"])
+        reassembler.add("c", 1, 0x10, b"x")
+        # Activity on b keeps it, so the scan stream is evicted before it.
+        self.assertEqual(reassembler.add("b", 7, 0x10, b"o\n"), [b"two"])
+        self.assertEqual(reassembler.add("d", 1, 0x10, b"y"), [])
+        self.assertEqual(reassembler.add("e", 1, 0x10, b"z"), [b"x"])
+
+    def test_input_handler_engines(self):
+        path = os.path.join(self.directory, "capture.pcap")
+        wrpcap(path, self.packets)
+        handler = InputHandler()
+        self.assertEqual(handler.read_pcap_file(path, max_packets=3), self.expected[:3])
+        self.assertEqual(len(handler.read_pcap_file(path, engine="scapy", max_packets=3)), 3)
+        with self.assertRaises(ValueError):
+            handler.read_pcap_file(path, engine="unknown")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from log_parser_sdk.compact_records import RecordCompactor
+from log_parser_sdk.query_index import QueryIndex, to_epoch_micros
+
+
+def make_records():
+    records = []
+    for minute in range(60):
+        records.append({
+            "type": "THREAT" if minute % 3 == 0 else "TRAFFIC",
+            "src": f"10.80.22.{minute % 4}",
+            "action": "deny" if minute % 5 == 0 else "allow",
+            "receive_time": f"2021/10/13 12:{minute:02d}:00",
+            "syslog": {"hostname": "PA-01" if minute < 30 else "PA-02"},
+            "seq": minute,
+        })
+    return records
+
+
+class TestToEpochMicros(unittest.TestCase):
+    def test_formats(self):
+        expected = int(datetime(2021, 10, 13, 12, 54, 53, tzinfo=timezone.utc).timestamp()) * 1_000_000
+        self.assertEqual(to_epoch_micros("2021/10/13 12:54:53"), expected)
+        self.assertEqual(to_epoch_micros("2021-10-13T12:54:53Z"), expected)
+        self.assertEqual(to_epoch_micros("2021-10-13T12:54:53.250Z"), expected + 250000)
+        self.assertEqual(to_epoch_micros("2021-10-13T14:54:53+02:00"), expected)
+        self.assertEqual(to_epoch_micros(datetime(2021, 10, 13, 12, 54, 53)), expected)
+        self.assertEqual(to_epoch_micros(expected / 1_000_000), expected)
+        self.assertIsNone(to_epoch_micros("Jun 11 00:39:44"))
+        self.assertIsNone(to_epoch_micros(None))
+
+
+class TestQueryIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "index.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_field_and_time_queries(self):
+        with QueryIndex(self.path, batch_size=7) as index:
+            self.assertEqual(index.add_records(make_records()), 60)
+            hits = index.query("2021/10/13 12:00:00", "2021/10/13 12:30:00", type="THREAT", src="10.80.22.2")
+            self.assertEqual([record["seq"] for record in hits], [6, 18])
+            self.assertEqual(index.count(type="THREAT", action=["deny", "drop"]), 4)
+            self.assertEqual(index.count(syslog_hostname="PA-02"), 30)
+            self.assertEqual(index.count(start="2021-10-13T12:59:00"), 1)
+            self.assertEqual([record["seq"] for record in index.query(src="10.80.22.1", limit=2)], [1, 5])
+            self.assertEqual(index.values("type"), [("TRAFFIC", 40), ("THREAT", 20)])
+            with self.assertRaises(ValueError):
+                index.query(seq=3)
+            with self.assertRaises(ValueError):
+                index.query(start="noon")
+
+    def test_streaming_and_reopen(self):
+        records = make_records()
+        with QueryIndex(self.path, batch_size=10) as index:
+            passed = []
+            for record in index.index_records(iter(records[:30])):
+                passed.append(record)
+            self.assertEqual(passed, records[:30])
+            self.assertEqual(len(index), 30)
+        with QueryIndex(self.path) as index:
+            index.add_records(records[30:])
+            self.assertEqual(len(index), 60)
+            self.assertEqual(index.count(src="10.80.22.0"), 15)
+        with self.assertRaises(ValueError):
+            QueryIndex(self.path, indexed_fields=("src",))
+
+    def test_cloudtrail_event_times(self):
+        with QueryIndex(self.path) as index:
+            index.add_records([{"eventName": "ConsoleLogin", "eventTime": f"2021-10-13T12:{minute:02d}:00Z"}
+                               for minute in range(10)])
+            self.assertEqual(index.count("2021-10-13T12:05:00Z", "2021-10-13T12:07:00Z", eventName="ConsoleLogin"), 2)
+
+    def test_compact_records_lists_and_missing_times(self):
+        compactor = RecordCompactor()
+        with QueryIndex(self.path, indexed_fields=("src", "tags")) as index:
+            index.add(compactor.compact({"src": "10.0.0.1", "tags": ["scan", "tor"]}))
+            index.add({"src": "10.0.0.1", "time": "2021/10/13 12:00:00"})
+            index.add(None)
+            self.assertEqual(index.query(tags="tor"), [{"src": "10.0.0.1", "tags": ["scan", "tor"]}])
+            self.assertEqual([record.get("time") for record in index.query(src="10.0.0.1")],
+                             ["2021/10/13 12:00:00", None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from log_parser_sdk.rate_limiter import TokenBucket, RateLimiter, estimate_tokens
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(capacity=2, rate=1.0, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_burst_up_to_capacity_then_waits(self):
+        self.bucket.acquire()
+        self.bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        self.bucket.acquire()
+        self.assertAlmostEqual(sum(self.clock.sleeps), 1.0)
+
+    def test_try_acquire_reports_wait_time(self):
+        self.assertEqual(self.bucket.try_acquire(2), 0.0)
+        self.assertAlmostEqual(self.bucket.try_acquire(1), 1.0)
+
+    def test_request_larger_than_capacity_waits_for_full_bucket(self):
+        self.bucket.acquire(2)
+        self.bucket.acquire(10)
+        self.assertAlmostEqual(sum(self.clock.sleeps), 2.0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_and_tokens_per_minute(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+        for _ in range(60):
+            limiter.acquire(tokens=10)
+        self.assertEqual(clock.sleeps, [])
+        limiter.acquire(tokens=10)
+        self.assertAlmostEqual(sum(clock.sleeps), 1.0)
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens("a" * 400), 101)
+
+if __name__ == '__main__':
+    unittest.main()
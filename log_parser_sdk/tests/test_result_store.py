@@ -0,0 +1,50 @@
+import unittest
+import os
+import json
+import tempfile
+from unittest.mock import patch
+from log_parser_sdk.result_store import ResultStore
+from log_parser_sdk.claude_client import ClaudeClient
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.sqlite")
+        self.store = ResultStore(self.path, prompt_version="1")
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_put_and_get_normalizes_whitespace(self):
+        self.store.put("Jun 11  sshd: accepted", '{"a": 1}')
+        self.assertEqual(self.store.get("Jun 11 sshd: accepted "), '{"a": 1}')
+        self.assertIsNone(self.store.get("Jun 11 sshd: rejected"))
+
+    def test_results_persist_and_depend_on_prompt_version(self):
+        self.store.put_many([("line a", '{"a": 1}'), ("line b", '{"b": 2}')])
+        self.store.close()
+        self.store = ResultStore(self.path, prompt_version="1")
+        self.assertEqual(self.store.get_many(["line b", "line c", "line a"]), ['{"b": 2}', None, '{"a": 1}'])
+        other_version = ResultStore(self.path, prompt_version="2")
+        self.assertIsNone(other_version.get("line a"))
+        other_version.close()
+
+    def test_checkpoints(self):
+        self.assertIsNone(self.store.get_checkpoint("some.log"))
+        self.store.set_checkpoint("some.log", 1234)
+        self.assertEqual(self.store.get_checkpoint(os.path.abspath("some.log")), 1234)
+
+    @patch.object(ClaudeClient, "_make_request")
+    def test_claude_client_skips_stored_entries(self, mock_make_request):
+        client = ClaudeClient("test_api_key", result_store=self.store)
+        self.store.put("line a", json.dumps({"a": 1}))
+        mock_make_request.return_value = {"b": 2}
+        self.assertEqual(client.parse_log_with_claude("line a"), json.dumps({"a": 1}))
+        self.assertEqual(client.parse_log_with_claude("line b"), json.dumps({"b": 2}))
+        self.assertEqual(client.parse_logs_batch(["line a", "line b"]), [json.dumps({"a": 1}), json.dumps({"b": 2})])
+        mock_make_request.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from log_parser_sdk.token_budget import OutputBudget, TokenLedger
+
+
+class TestTokenLedger(unittest.TestCase):
+    def test_snapshot_totals_and_cost(self):
+        ledger = TokenLedger(input_price=10.0, output_price=20.0)
+        ledger.record_usage({"input_tokens": 100, "output_tokens": 50, "cache_creation_input_tokens": 400})
+        ledger.record_usage({"input_tokens": 100, "output_tokens": 50, "cache_read_input_tokens": 400}, truncated=True)
+        ledger.record_entries(4)
+        snapshot = ledger.snapshot()
+        self.assertEqual(snapshot["requests"], 2)
+        self.assertEqual(snapshot["truncated_responses"], 1)
+        self.assertAlmostEqual(snapshot["cache_hit_ratio"], 0.4)
+        self.assertEqual(snapshot["tokens_per_entry"], 1100 / 4)
+        # 200 input at 10, 400 cache writes at 12.5, 400 cache reads at 1, 100 output at 20, per million.
+        self.assertAlmostEqual(snapshot["estimated_cost_usd"], (2000 + 5000 + 400 + 2000) / 1_000_000)
+        ledger.reset()
+        self.assertEqual(ledger.snapshot()["requests"], 0)
+
+
+class TestOutputBudget(unittest.TestCase):
+    def test_budget_follows_observed_ratios(self):
+        budget = OutputBudget(initial_ratio=4.0, headroom=1.5, floor=0, minimum=10, maximum=1000)
+        self.assertEqual(budget.max_tokens("parse", 100), 600)
+        budget.observe("parse", 100, 100)
+        self.assertEqual(budget.max_tokens("parse", 100), 150)
+        self.assertEqual(budget.max_tokens("grok", 100), 600)
+        budget.observe("parse", 100, 100, truncated=True)
+        self.assertEqual(budget.max_tokens("parse", 100), 300)
+        self.assertEqual(budget.max_tokens("parse", 1), 10)
+        self.assertEqual(budget.max_tokens("parse", 10000), 1000)
+
+if __name__ == '__main__':
+    unittest.main()
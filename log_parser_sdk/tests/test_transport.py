@@ -0,0 +1,72 @@
+import unittest
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock
+from log_parser_sdk.claude_client import ClaudeClient
+from log_parser_sdk.transport import PooledTransport
+
+
+class _MessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"content": [{"type": "text", "text": '{"ok": true}'}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.headers.get("Connection", "").lower() == "close":
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPooledTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _MessagesHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/messages"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        with PooledTransport() as transport:
+            for _ in range(5):
+                self.assertEqual(transport.post(self.url, json={}).status_code, 200)
+            metrics = transport.metrics.snapshot()
+        self.assertEqual(metrics["requests"], 5)
+        self.assertEqual(metrics["connections_opened"], 1)
+        self.assertEqual(metrics["connections_reused"], 4)
+
+    def test_keepalive_disabled_opens_a_connection_per_request(self):
+        with PooledTransport(keepalive=False) as transport:
+            for _ in range(3):
+                transport.post(self.url, json={})
+            self.assertEqual(transport.metrics.snapshot()["connections_opened"], 3)
+
+    def test_claude_client_sends_through_transport(self):
+        transport = PooledTransport()
+        client = ClaudeClient("test_api_key", base_url=self.url, transport=transport)
+        self.assertEqual(client.parse_log_with_claude("sample log"), '{"ok": true}')
+        self.assertEqual(transport.metrics.snapshot()["requests"], 1)
+        transport.close()
+
+    def test_claude_client_passes_headers_and_timeout(self):
+        transport = Mock()
+        transport.post.return_value.json.return_value = {"content": [{"text": '{"a": 1}'}]}
+        client = ClaudeClient("test_api_key", transport=transport)
+        client.timeout = 5
+        client.parse_log_with_claude("sample log")
+        kwargs = transport.post.call_args.kwargs
+        self.assertEqual(kwargs["headers"]["x-api-key"], "test_api_key")
+        self.assertEqual(kwargs["timeout"], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from log_parser_sdk.output_formatter import OutputFormatter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from log_parser_sdk.typed_columns import (TypedColumnConverter, hex_to_uint64, ipv4_to_uint32, parse_timestamps,
+                                              to_int64)
+except ImportError:
+    pa = None
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestColumnConversions(unittest.TestCase):
+    def test_ipv4(self):
+        array = pa.array(["10.80.22.2", "255.255.255.255", "256.1.1.1", "1.2.3", None])
+        self.assertEqual(ipv4_to_uint32(array).to_pylist(), [173020674, 4294967295, None, None, None])
+
+    def test_hex(self):
+        array = pa.array(["0x2000", "0XFF", "0x8000000000000000", "0x", "2000", None])
+        self.assertEqual(hex_to_uint64(array).to_pylist(), [8192, 255, 2 ** 63, None, None, None])
+
+    def test_int(self):
+        self.assertEqual(to_int64(pa.array(["12", "-3", "007", "1e3", None])).to_pylist(), [12, -3, 7, None, None])
+        self.assertEqual(to_int64(pa.array([2 ** 64 - 1, 5], pa.uint64())).to_pylist(), [None, 5])
+
+    def test_timestamps(self):
+        array = pa.array(["2021/10/13 12:54:53", "2003-10-11T22:14:15.003-07:00", "2003-10-11T22:14:15Z",
+                          "Jun 11 00:39:44", None])
+        self.assertEqual(parse_timestamps(array).to_pylist(), [
+            datetime(2021, 10, 13, 12, 54, 53), datetime(2003, 10, 12, 5, 14, 15, 3000),
+            datetime(2003, 10, 11, 22, 14, 15), None, None])
+
+
+@unittest.skipIf(pa is None, "pyarrow is not installed")
+class TestTypedColumnConverter(unittest.TestCase):
+    def records(self):
+        return [
+            {"src": "10.0.0.1", "receive_time": "2021/10/13 12:54:53", "flags": "0x10", "serial": "0123",
+             "bytes": "100", "port": 80, "syslog": {"hostname": "PA-01"}},
+            {"src": "10.0.0.2", "receive_time": "2021/10/13 12:54:54", "flags": "0x20", "serial": "0124",
+             "port": "81", "seqno": 2 ** 63},
+        ]
+
+    def test_inferred_batch(self):
+        converter = TypedColumnConverter()
+        batch = converter.convert(self.records())
+        self.assertEqual(batch.schema.field("src").type, pa.uint32())
+        self.assertEqual(batch.schema.field("receive_time").type, pa.timestamp("us"))
+        self.assertEqual(batch.schema.field("flags").type, pa.uint64())
+        self.assertEqual(batch.schema.field("serial").type, pa.string())
+        self.assertEqual(batch.column("bytes").to_pylist(), [100, None])
+        self.assertEqual(batch.column("port").to_pylist(), [80, 81])
+        self.assertEqual(batch.column("syslog_hostname").to_pylist(), ["PA-01", None])
+        self.assertEqual(batch.column("seqno").to_pylist(), [None, 2 ** 63])
+        self.assertEqual(converter.kinds["src"], "ipv4")
+
+    def test_inferred_column_falls_back_to_strings(self):
+        converter = TypedColumnConverter()
+        converter.convert([{"src": "10.0.0.1"}])
+        batch = converter.convert([{"src": "10.0.0.2"}, {"src": "fe80::1"}])
+        self.assertEqual(batch.column("src").to_pylist(), ["10.0.0.2", "fe80::1"])
+        self.assertEqual(converter.kinds["src"], "string")
+
+    def test_declared_columns_count_errors(self):
+        converter = TypedColumnConverter({"src": "ipv4", "flags": "string"}, infer=False)
+        batch = converter.convert([{"src": "10.0.0.1", "flags": "0x1"}, {"src": "fe80::1", "flags": "0x2"}])
+        self.assertEqual(batch.column("src").to_pylist(), [167772161, None])
+        self.assertEqual(batch.column("flags").to_pylist(), ["0x1", "0x2"])
+        self.assertEqual(converter.conversion_errors, {"src": 1})
+        with self.assertRaises(ValueError):
+            TypedColumnConverter({"src": "ipv6"})
+
+    def test_new_nested_fields_are_kept(self):
+        converter = TypedColumnConverter()
+        converter.convert([{"syslog": {"hostname": "a"}}])
+        batch = converter.convert([{"syslog": {"hostname": "b", "procid": 7}}])
+        self.assertEqual(batch.to_pylist(), [{"syslog_hostname": "b", "syslog_procid": 7}])
+
+    def test_write_parquet_with_typed_columns(self):
+        records = [{"src": f"10.0.0.{i}", "receive_time": f"2021/10/13 12:54:{i:02d}", "action": "allow"}
+                   for i in range(25)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "typed.parquet")
+            count = OutputFormatter().write_parquet(records, path, row_group_size=10,
+                                                    typed_columns=TypedColumnConverter())
+            table = pq.read_table(path)
+        self.assertEqual(count, 25)
+        self.assertEqual(table.schema.field("src").type, pa.uint32())
+        self.assertEqual(table.schema.field("receive_time").type, pa.timestamp("us"))
+        self.assertEqual(table.column("src").to_pylist()[24], 167772184)
+
+    def test_typed_rows_are_rewritten_as_text_when_a_column_falls_back(self):
+        records = [{"src": f"10.0.0.{i}", "flags": f"0x{i + 16:x}", "receive_time": f"2021/10/13 12:54:0{i}"}
+                   for i in range(10)]
+        records.append({"src": "host-a", "flags": "none", "receive_time": "yesterday"})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "typed.parquet")
+            OutputFormatter().write_parquet(records, path, row_group_size=5, typed_columns=TypedColumnConverter())
+            table = pq.read_table(path)
+        self.assertEqual(table.schema.field("src").type, pa.string())
+        self.assertEqual(table.column("src").to_pylist(), [f"10.0.0.{i}" for i in range(10)] + ["host-a"])
+        self.assertEqual(table.column("flags").to_pylist(), [f"0x{i + 16:x}" for i in range(10)] + ["none"])
+        self.assertEqual(table.column("receive_time").to_pylist(),
+                         [f"2021-10-13 12:54:0{i}" for i in range(10)] + ["yesterday"])
+
+
+    def test_hex_rows_are_rewritten_in_canonical_form(self):
+        records = [{"flags": flags} for flags in ("0x0", "0x00002000", "0XFFFFFFFFFFFFFFFF", "none")]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "typed.parquet")
+            OutputFormatter().write_parquet(records, path, row_group_size=3, typed_columns=TypedColumnConverter())
+            table = pq.read_table(path)
+        self.assertEqual(table.column("flags").to_pylist(), ["0x0", "0x2000", "0xffffffffffffffff", "none"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import math
+import threading
+from collections import deque
+
+# USD per million tokens for the default model (claude-3-opus-20240229).
+DEFAULT_INPUT_PRICE = 15.0
+DEFAULT_OUTPUT_PRICE = 75.0
+# Prompt caching bills cache writes at 1.25x and cache reads at 0.1x the input price.
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+
+
+class TokenLedger:
+    """
+    Thread-safe running totals of the tokens a ClaudeClient has used, from the
+    usage block of each response, and of the log entries they parsed. The
+    snapshot includes the estimated cost and tokens per parsed entry, so
+    changes to prompts, batching and caching can be measured run over run.
+    """
+
+    def __init__(self, input_price: float = DEFAULT_INPUT_PRICE, output_price: float = DEFAULT_OUTPUT_PRICE):
+        self.input_price = input_price
+        self.output_price = output_price
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.entries = 0
+            self.input_tokens = 0
+            self.output_tokens = 0
+            self.cache_creation_input_tokens = 0
+            self.cache_read_input_tokens = 0
+            self.truncated_responses = 0
+
+    def record_usage(self, usage: dict, truncated: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += usage.get("input_tokens") or 0
+            self.output_tokens += usage.get("output_tokens") or 0
+            self.cache_creation_input_tokens += usage.get("cache_creation_input_tokens") or 0
+            self.cache_read_input_tokens += usage.get("cache_read_input_tokens") or 0
+            if truncated:
+                self.truncated_responses += 1
+
+    def record_entries(self, count: int):
+        with self._lock:
+            self.entries += count
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            # input_tokens counts only the uncached part of each prompt.
+            prompt_tokens = self.input_tokens + self.cache_creation_input_tokens + self.cache_read_input_tokens
+            total_tokens = prompt_tokens + self.output_tokens
+            cost = (self.input_tokens * self.input_price
+                    + self.cache_creation_input_tokens * self.input_price * CACHE_WRITE_MULTIPLIER
+                    + self.cache_read_input_tokens * self.input_price * CACHE_READ_MULTIPLIER
+                    + self.output_tokens * self.output_price) / 1_000_000
+            return {
+                "requests": self.requests,
+                "entries": self.entries,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "cache_creation_input_tokens": self.cache_creation_input_tokens,
+                "cache_read_input_tokens": self.cache_read_input_tokens,
+                "cache_hit_ratio": self.cache_read_input_tokens / prompt_tokens if prompt_tokens else 0.0,
+                "truncated_responses": self.truncated_responses,
+                "tokens_per_entry": total_tokens / self.entries if self.entries else 0.0,
+                "estimated_cost_usd": round(cost, 6),
+            }
+
+
+class OutputBudget:
+    """
+    Sizes max_tokens for each request from the length of its input.
+
+    For every kind of request (single parse, batch parse, Grok pattern) it
+    keeps the ratio of output tokens to input tokens seen in the last
+    `window` responses and budgets the largest recent ratio times `headroom`,
+    plus `floor` tokens, clamped to [minimum, maximum]. Until a kind has
+    observations it uses `initial_ratio`. A truncated response counts as twice
+    its ratio so the next budget grows.
+    """
+
+    def __init__(self, initial_ratio: float = 4.0, headroom: float = 1.5, floor: int = 64, minimum: int = 128,
+                 maximum: int = 4096, window: int = 50):
+        self.initial_ratio = initial_ratio
+        self.headroom = headroom
+        self.floor = floor
+        self.minimum = minimum
+        self.maximum = maximum
+        self.window = window
+        self._ratios = {}
+        self._lock = threading.Lock()
+
+    def max_tokens(self, kind: str, input_tokens: int) -> int:
+        with self._lock:
+            ratios = self._ratios.get(kind)
+            ratio = max(ratios) if ratios else self.initial_ratio
+        budget = math.ceil(input_tokens * ratio * self.headroom) + self.floor
+        return max(self.minimum, min(self.maximum, budget))
+
+    def observe(self, kind: str, input_tokens: int, output_tokens: int, truncated: bool = False):
+        if input_tokens <= 0:
+            return
+        ratio = output_tokens / input_tokens * (2 if truncated else 1)
+        with self._lock:
+            self._ratios.setdefault(kind, deque(maxlen=self.window)).append(ratio)
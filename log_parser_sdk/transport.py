@@ -0,0 +1,121 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class TransportMetrics:
+    """
+    Thread-safe counters for a PooledTransport: how many requests were sent,
+    how many of them had to open a new connection, and the time spent
+    connecting (TCP plus TLS handshake) versus on whole requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.connect_seconds = 0.0
+        self.request_seconds = 0.0
+
+    def record_connect(self, seconds: float):
+        with self._lock:
+            self.connections_opened += 1
+            self.connect_seconds += seconds
+
+    def record_request(self, seconds: float):
+        with self._lock:
+            self.requests += 1
+            self.request_seconds += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            reused = max(self.requests - self.connections_opened, 0)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": reused,
+                "reuse_ratio": reused / self.requests if self.requests else 0.0,
+                "avg_connect_ms": 1000 * self.connect_seconds / self.connections_opened if self.connections_opened else 0.0,
+                "avg_request_ms": 1000 * self.request_seconds / self.requests if self.requests else 0.0,
+            }
+
+
+def _metered_pool_classes(metrics: TransportMetrics) -> dict:
+    """
+    Returns urllib3 pool classes whose connections report how long each new
+    connection took to establish.
+    """
+    def metered(connection_cls):
+        class MeteredConnection(connection_cls):
+            def connect(self):
+                start = time.perf_counter()
+                super().connect()
+                metrics.record_connect(time.perf_counter() - start)
+        return MeteredConnection
+
+    class MeteredHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = metered(HTTPConnection)
+
+    class MeteredHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = metered(HTTPSConnection)
+
+    return {"http": MeteredHTTPConnectionPool, "https": MeteredHTTPSConnectionPool}
+
+
+class _MeteredHTTPAdapter(HTTPAdapter):
+    def __init__(self, metrics: TransportMetrics, **kwargs):
+        self._metrics = metrics
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _metered_pool_classes(self._metrics)
+
+
+class PooledTransport:
+    """
+    A keep-alive HTTP transport for the Claude API built on one shared
+    requests.Session. Connections are pooled per host and reused across
+    requests and threads, so only the first request to a host (or one that
+    finds every pooled connection busy) pays for the TCP and TLS handshake.
+
+    pool_maxsize should be at least the number of threads sending requests at
+    once; extra concurrent requests still work but their connections are not
+    kept. With keepalive=False every request closes its connection, which is
+    mainly useful for comparison.
+    """
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16, connect_timeout: float = 10.0,
+                 read_timeout: float = 60.0, keepalive: bool = True, verify=True):
+        self.timeout = (connect_timeout, read_timeout)
+        self.keepalive = keepalive
+        self.metrics = TransportMetrics()
+        # Passed per request: requests lets REQUESTS_CA_BUNDLE override Session.verify.
+        self.verify = verify
+        self.session = requests.Session()
+        adapter = _MeteredHTTPAdapter(self.metrics, pool_connections=pool_connections,
+                                      pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not keepalive:
+            self.session.headers["Connection"] = "close"
+
+    def post(self, url: str, headers: dict = None, json=None, timeout=None) -> requests.Response:
+        start = time.perf_counter()
+        try:
+            return self.session.post(url, headers=headers, json=json, timeout=timeout or self.timeout,
+                                     verify=None if self.verify is True else self.verify)
+        finally:
+            self.metrics.record_request(time.perf_counter() - start)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
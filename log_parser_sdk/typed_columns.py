@@ -0,0 +1,347 @@
+from __future__ import annotations
+import json
+from .compact_records import CompactRecord, record_default
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # Optional: pip install log_parser_sdk[parquet]
+    pa = pc = None
+
+# Column kinds understood by TypedColumnConverter and the Arrow type each produces.
+KINDS = ("ipv4", "timestamp", "hex", "int", "string")
+# Field metadata key naming the kind of a converted "ipv4" or "hex" column, whose integers alone do not say so.
+KIND_METADATA = b"log_parser_sdk.kind"
+
+# strptime formats tried for "timestamp" columns before ISO 8601. Each must match the whole value.
+TIMESTAMP_FORMATS = ("%Y/%m/%d %H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_IPV4 = rf"^{_OCTET}\.{_OCTET}\.{_OCTET}\.{_OCTET}$"
+_HEX = r"^0[xX][0-9a-fA-F]{1,16}$"
+_INT = r"^-?\d{1,18}$"
+# Inferred integers may not have leading zeros, so serial numbers and the like stay text.
+_INFERRED_INT = r"^-?(?:0|[1-9]\d{0,17})$"
+_ISO_DATE = r"^\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])[T ](?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d(?:\.\d{1,9})?"
+_ISO_NAIVE = _ISO_DATE + "$"
+_ISO_OFFSET = _ISO_DATE + r"(?:Z|[+-](?:[01]\d|2[0-3]):?[0-5]\d)$"
+
+
+def _hex_pairs():
+    digits = "0123456789abcdef"
+    return pa.array([high + low for high in digits for low in digits])
+
+
+_HEX_PAIRS = _hex_pairs() if pa is not None else None
+
+
+def _only_matching(array, pattern: str):
+    # Nulls out the values that do not match, so the casts below cannot fail on them.
+    return pc.if_else(pc.match_substring_regex(array, pattern), array, pa.scalar(None, array.type))
+
+
+def _as_strings(array):
+    if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+        return array
+    if pa.types.is_dictionary(array.type):
+        return array.cast(pa.string())
+    return None
+
+
+def ipv4_to_uint32(array):
+    """
+    Converts dotted-quad IPv4 strings to their uint32 value
+    ("10.80.22.2" -> 172971522). Anything else becomes null.
+    """
+    strings = _as_strings(array)
+    if strings is None:
+        return pa.nulls(len(array), pa.uint32())
+    octets = pc.cast(pc.split_pattern(_only_matching(strings, _IPV4), pattern="."), pa.list_(pa.uint32()))
+    base = pa.scalar(256, pa.uint32())
+    value = pc.list_element(octets, 0)
+    for position in (1, 2, 3):
+        value = pc.add(pc.multiply(value, base), pc.list_element(octets, position))
+    return value
+
+
+def hex_to_uint64(array):
+    """
+    Converts "0x"-prefixed hex strings of up to 16 digits ("0x2000" -> 8192)
+    to uint64. Anything else becomes null.
+    """
+    strings = _as_strings(array)
+    if strings is None:
+        return pa.nulls(len(array), pa.uint64())
+    digits = pc.utf8_lower(pc.utf8_slice_codeunits(_only_matching(strings, _HEX), 2))
+    longest = pc.max(pc.utf8_length(digits)).as_py()
+    if longest is None:
+        return pa.nulls(len(array), pa.uint64())
+    # Two digits at a time: left-pad to an even width and look each pair up as a byte.
+    width = longest + longest % 2
+    digits = pc.utf8_lpad(digits, width=width, padding="0")
+    base = pa.scalar(256, pa.uint64())
+    value = None
+    for position in range(0, width, 2):
+        pair = pc.index_in(pc.utf8_slice_codeunits(digits, position, position + 2), value_set=_HEX_PAIRS)
+        pair = pc.cast(pair, pa.uint64())
+        value = pair if value is None else pc.add(pc.multiply(value, base), pair)
+    return value
+
+
+def to_int64(array):
+    """
+    Converts decimal integer strings, or any integer column, to int64.
+    Anything else becomes null.
+    """
+    if pa.types.is_integer(array.type):
+        if pa.types.is_uint64(array.type):
+            array = pc.if_else(pc.less_equal(array, pa.scalar(2 ** 63 - 1, pa.uint64())), array,
+                               pa.scalar(None, pa.uint64()))
+        return pc.cast(array, pa.int64())
+    strings = _as_strings(array)
+    if strings is None:
+        return pa.nulls(len(array), pa.int64())
+    return pc.cast(_only_matching(strings, _INT), pa.int64())
+
+
+def _timestamp_candidates(strings, formats: tuple[str, ...]):
+    for time_format in formats:
+        yield pc.strptime(strings, format=time_format, unit="us", error_is_null=True)
+    for pattern, arrow_type in ((_ISO_NAIVE, pa.timestamp("us")), (_ISO_OFFSET, pa.timestamp("us", "UTC"))):
+        try:
+            yield pc.cast(pc.cast(_only_matching(strings, pattern), arrow_type), pa.timestamp("us"))
+        except pa.ArrowInvalid:
+            pass  # A day the calendar does not have; those values stay null.
+
+
+def parse_timestamps(array, formats: tuple[str, ...] = TIMESTAMP_FORMATS):
+    """
+    Converts timestamp strings to timestamp[us]. Each strptime format is
+    tried in turn, then ISO 8601 with optional fractional seconds; values
+    with a "Z" or a UTC offset are converted to UTC and the others are kept
+    as written. Later formats only run while some values are still
+    unparsed. Anything else becomes null.
+    """
+    if pa.types.is_timestamp(array.type):
+        return pc.cast(array, pa.timestamp("us"))
+    strings = _as_strings(array)
+    if strings is None:
+        return pa.nulls(len(array), pa.timestamp("us"))
+    result = pa.nulls(len(array), pa.timestamp("us"))
+    for candidate in _timestamp_candidates(strings, formats):
+        result = pc.coalesce(result, candidate)
+        if result.null_count == strings.null_count:
+            break
+    return result
+
+
+_CONVERTERS = {"ipv4": ipv4_to_uint32, "timestamp": parse_timestamps, "hex": hex_to_uint64, "int": to_int64}
+# Checked in this order when a column's kind is inferred; the first kind every sampled value fits wins.
+_INFERENCE_PATTERNS = (("ipv4", _IPV4), ("hex", _HEX), ("int", _INFERRED_INT))
+
+
+def _as_text(value):
+    if value is None or type(value) is str:
+        return value
+    if isinstance(value, (dict, list, CompactRecord)):
+        return json.dumps(value, default=record_default)
+    return str(value)
+
+
+def _column_array(values: list):
+    try:
+        return pa.array(values)
+    except OverflowError:
+        try:
+            # Unsigned 64-bit counters such as PAN-OS sequence numbers and pcap IDs.
+            return pa.array(values, pa.uint64())
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            pass
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    # Mixed types, e.g. ports that are ints in some records and strings in others.
+    return pa.array([_as_text(value) for value in values], pa.string())
+
+
+def _collect_fields(record: dict, fields: dict):
+    # Field name -> the fields of its nested dicts, merged over records in first-seen order.
+    for name, value in record.items():
+        nested = fields.get(name)
+        if nested is None:
+            nested = fields[name] = {}
+        if type(value) is dict:
+            _collect_fields(value, nested)
+
+
+def _type_covers(struct_type, fields: dict) -> bool:
+    for name, nested in fields.items():
+        index = struct_type.get_field_index(name)
+        if index < 0:
+            return False
+        if nested:
+            child_type = struct_type.field(index).type
+            if not pa.types.is_struct(child_type) or not _type_covers(child_type, nested):
+                return False
+    return True
+
+
+def _records_array(records: list, known_type=None):
+    """
+    Returns the records as one Arrow struct array, built in C++ where
+    possible: with the struct type of the previous batch if it has every
+    field of these records (Arrow would silently drop the others), else with
+    an inferred type. If a field mixes types or overflows int64, each
+    top-level field is built on its own instead.
+    """
+    fields = {}
+    for record in records:
+        _collect_fields(record, fields)
+    if known_type is not None and _type_covers(known_type, fields):
+        try:
+            return pa.array(records, known_type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            pass
+    try:
+        return pa.array(records)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        pass
+    arrays = [_column_array([record.get(name) for record in records]) for name in fields]
+    return pa.StructArray.from_arrays(arrays, names=list(fields)) if arrays else pa.array([{}] * len(records))
+
+
+def _flatten_struct(array, prefix: str, separator: str, columns: dict):
+    for field, child in zip(array.type, array.flatten()):
+        name = f"{prefix}{separator}{field.name}" if prefix else field.name
+        if pa.types.is_struct(child.type) and child.type.num_fields:
+            _flatten_struct(child, name, separator, columns)
+        else:
+            columns[name] = child
+
+
+class TypedColumnConverter:
+    """
+    Groups parsed records into Arrow record batches and converts their
+    string columns to typed columns in bulk with pyarrow.compute: IPv4
+    addresses to uint32, timestamps to timestamp[us], "0x" hex flags to
+    uint64 and decimal counters to int64. Records are flattened like the CSV writer
+    (nested keys joined by `separator`), and every column carries Arrow's
+    null mask, so fields missing from a record are null rather than "".
+
+    Kinds come from `column_types` ({"src": "ipv4", ...}; "string" keeps a
+    column as text). Values of those columns that do not convert become null
+    and are counted in `conversion_errors`. With `infer`, the other string
+    columns are typed from up to `sample_size` values of the first batch that
+    has any: a kind is chosen only if every sampled value fits it. If a later
+    value of an inferred column does not convert, that batch keeps the
+    column as strings and the column stays a string column from then on, so
+    no value is ever lost to inference. Converted "ipv4" and "hex" columns
+    carry their kind in the field metadata (KIND_METADATA), which lets
+    ParquetRecordWriter write the earlier batches of such a column back as
+    text.
+
+    The batches can be written with ParquetRecordWriter.write_batch (or
+    OutputFormatter.write_parquet(typed_columns=...)), or handed to pandas,
+    Polars or DuckDB as they are. Requires pyarrow.
+    """
+
+    def __init__(self, column_types: dict[str, str] = None, infer: bool = True, separator: str = "_",
+                 timestamp_formats: tuple[str, ...] = TIMESTAMP_FORMATS, sample_size: int = 64):
+        if pa is None:
+            raise ImportError("Typed columns require pyarrow: pip install log_parser_sdk[parquet]")
+        column_types = dict(column_types or {})
+        for name, kind in column_types.items():
+            if kind not in KINDS:
+                raise ValueError(f"Unknown column kind {kind!r} for {name!r}; expected one of {KINDS}")
+        self.column_types = column_types
+        self.infer = infer
+        self.separator = separator
+        self.timestamp_formats = tuple(timestamp_formats)
+        self.sample_size = sample_size
+        self.conversion_errors = {}
+        self._inferred = {}  # Column name -> kind chosen by inference.
+        self._struct_type = None  # Arrow type of the last batch, tried first for the next one.
+
+    @property
+    def kinds(self) -> dict[str, str]:
+        """
+        The kind of every column seen so far, declared or inferred.
+        """
+        return {**self._inferred, **self.column_types}
+
+    def convert(self, records):
+        """
+        Converts a sequence of records into one pyarrow.RecordBatch.
+        """
+        records = [record.to_dict() if isinstance(record, CompactRecord) else record
+                   for record in records if record is not None]
+        struct = _records_array(records, self._struct_type)
+        self._struct_type = struct.type
+        columns = {}
+        _flatten_struct(struct, "", self.separator, columns)
+        arrays = [self.convert_column(name, array) for name, array in columns.items()]
+        kinds = self.kinds
+        fields = [pa.field(name, array.type,
+                           metadata={KIND_METADATA: kinds[name]} if kinds.get(name) in ("ipv4", "hex") else None)
+                  for name, array in zip(columns, arrays)]
+        return pa.RecordBatch.from_arrays(arrays, schema=pa.schema(fields))
+
+    def iter_batches(self, records, batch_size: int = 10000):
+        """
+        Converts an iterable of records batch_size records at a time and
+        yields the record batches.
+        """
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield self.convert(batch)
+                batch = []
+        if batch:
+            yield self.convert(batch)
+
+    def convert_column(self, name: str, array):
+        """
+        Converts one column (an Arrow array) according to its declared or
+        inferred kind.
+        """
+        kind = self.column_types.get(name)
+        if kind is not None:
+            if kind == "string":
+                return array
+            converted = self._convert(kind, array)
+            failed = converted.null_count - array.null_count
+            if failed:
+                self.conversion_errors[name] = self.conversion_errors.get(name, 0) + failed
+            return converted
+        if not self.infer or _as_strings(array) is None:
+            return array
+        kind = self._inferred.get(name)
+        if kind is None:
+            kind = self._infer_kind(array)
+            if kind is None:
+                return array
+            self._inferred[name] = kind
+        if kind == "string":
+            return array
+        converted = self._convert(kind, array)
+        if converted.null_count != array.null_count:
+            self._inferred[name] = "string"
+            return array
+        return converted
+
+    def _convert(self, kind: str, array):
+        if kind == "timestamp":
+            return parse_timestamps(array, self.timestamp_formats)
+        return _CONVERTERS[kind](array)
+
+    def _infer_kind(self, array) -> str | None:
+        # None until the column has a non-null value to look at.
+        sample = _as_strings(array).drop_null()[:self.sample_size]
+        if not len(sample):
+            return None
+        for kind, pattern in _INFERENCE_PATTERNS:
+            if pc.all(pc.match_substring_regex(sample, pattern)).as_py():
+                return kind
+        if parse_timestamps(sample, self.timestamp_formats).null_count == 0:
+            return "timestamp"
+        return "string"